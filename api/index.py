@@ -16,7 +16,24 @@ os.environ.setdefault('HF_HOME', '/tmp/huggingface')
 os.environ.setdefault('SENTENCE_TRANSFORMERS_HOME', '/tmp/sentence_transformers')
 
 # Import the FastAPI app
-from src.api.server import app
+from src.api.server import app, get_query_handler
+
+# On serverless platforms, load the model and open the knowledge base at cold
+# start instead of on the first user query
+if os.getenv("VERCEL") or os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
+    try:
+        get_query_handler()
+    except Exception as e:
+        print(f"Warning: Cold start warmup failed: {e}")
+
+# Create the Mangum adapter once at cold start so warm invocations reuse it
+# (mangum is only needed on Vercel, so local dev still works without it)
+try:
+    from mangum import Mangum
+    _asgi_handler = Mangum(app, lifespan="off")
+except ImportError:
+    _asgi_handler = None
+
 
 # Vercel expects a handler function - this is the entry point
 def handler(request):
@@ -24,18 +41,16 @@ def handler(request):
     Vercel serverless function handler
     This wraps the FastAPI ASGI app for Vercel
     """
-    from mangum import Mangum
-    
-    # Create Mangum adapter to convert ASGI app to AWS Lambda handler
-    asgi_handler = Mangum(app, lifespan="off")
+    if _asgi_handler is None:
+        raise RuntimeError("mangum is required to run the Vercel handler")
     
     # Convert Vercel request to ASGI scope
-    return asgi_handler(request)
+    return _asgi_handler(request)
 
 # Export handler for Vercel
 __all__ = ['handler']
 
 # For local testing
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    from src.api.server import run_server
+    run_server()
@@ -72,23 +72,17 @@ async function sendMessage() {
     showLoading();
 
     try {
-        // Call backend API
-        const response = await fetch(`${API_URL}/query`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({ 
-                question: message,
-                session_id: sessionId  // Add session_id for conversation memory
-            }),
-        });
-
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
+        // Stream the answer; fall back to the plain endpoint if streaming fails
+        let data;
+        try {
+            data = await streamAnswer(message);
+        } catch (streamError) {
+            // The server only records an exchange once its answer is complete,
+            // so asking again doesn't leave a duplicate question in memory
+            console.warn('Streaming failed, falling back to /query:', streamError);
+            showLoading();
+            data = await fetchAnswer(message);
         }
-
-        const data = await response.json();
         
         // Hide loading indicator
         hideLoading();
@@ -126,6 +120,108 @@ async function sendMessage() {
     }
 }
 
+// Ask the backend and wait for the whole answer
+async function fetchAnswer(question) {
+    const response = await fetch(`${API_URL}/query`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ 
+            question: question,
+            session_id: sessionId  // Add session_id for conversation memory
+        }),
+    });
+
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    return response.json();
+}
+
+// Ask the backend over Server-Sent Events, showing the answer as it is generated.
+// Uses fetch rather than EventSource because EventSource can only send GET requests.
+async function streamAnswer(question) {
+    const response = await fetch(`${API_URL}/query/stream`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream',
+        },
+        body: JSON.stringify({ 
+            question: question,
+            session_id: sessionId
+        }),
+    });
+
+    if (!response.ok || !response.body) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let liveDiv = null;
+    let liveText = '';
+    let result = null;
+
+    try {
+        while (result === null) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+
+            // Events are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let eventName = 'message';
+                let dataText = '';
+                for (const line of rawEvent.split('\n')) {
+                    if (line.startsWith('event:')) {
+                        eventName = line.slice(6).trim();
+                    } else if (line.startsWith('data:')) {
+                        dataText += line.slice(5).trim();
+                    }
+                }
+                const payload = dataText ? JSON.parse(dataText) : {};
+
+                if (eventName === 'token') {
+                    if (!liveDiv) {
+                        hideLoading();
+                        liveDiv = document.createElement('div');
+                        liveDiv.className = 'message assistant';
+                        chatMessages.appendChild(liveDiv);
+                    }
+                    liveText += payload.text || '';
+                    liveDiv.textContent = liveText;
+                    chatMessages.scrollTop = chatMessages.scrollHeight;
+                } else if (eventName === 'done') {
+                    result = payload;
+                    break;
+                } else if (eventName === 'error') {
+                    throw new Error(payload.detail || 'Streaming error');
+                }
+            }
+        }
+    } finally {
+        // The final message is rendered by addMessage with source-link handling
+        if (liveDiv) {
+            liveDiv.remove();
+        }
+    }
+
+    if (result === null) {
+        throw new Error('Stream ended before the answer was complete');
+    }
+    return result;
+}
+
 // Add message to chat
 function addMessage(text, type, sourceUrl = null) {
     const messageDiv = document.createElement('div');
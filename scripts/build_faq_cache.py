@@ -0,0 +1,112 @@
+"""
+Script to precompute answers to anticipated questions (price, dates, EMI, ...)
+Answers each templated question once with the full RAG pipeline and stores
+the answers with their question embeddings for FAQAnswerCache
+"""
+import os
+import sys
+from pathlib import Path
+
+import orjson
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.embeddings.embedder import EmbeddingGenerator
+from src.embeddings.vector_db import VectorDB
+from src.processor.utils import dig
+from src.query.llm_handler import GeminiLLMHandler, LLM_ERROR_PREFIX
+from src.query.query_handler import QueryHandler
+from src.query.response_cache import FAQAnswerCache
+
+
+FAQ_CACHE_PATH = Path(__file__).parent.parent / "data" / "processed" / "faq_cache"
+
+# Question templates, filled in with each course's names
+FAQ_TEMPLATES = [
+    "What is the cost of the {course}?",
+    "What is the price of the {course}?",
+    "How much does the {course} cost?",
+    "What is the fee for the {course}?",
+    "When does the {course} start?",
+    "What is the start date of the {course}?",
+    "When is the next batch of the {course}?",
+    "What are the EMI options for the {course}?",
+    "Can I pay for the {course} in installments?",
+    "What are the payment options for the {course}?",
+    "What is the curriculum of the {course}?",
+    "What topics are covered in the {course}?",
+    "Who are the instructors for the {course}?",
+    "Who are the mentors of the {course}?",
+    "Tell me about placements for the {course}",
+    "Does the {course} offer placement support?",
+    "What do learners say about the {course}?",
+    "Is the {course} live or recorded?",
+    "Tell me about the {course}",
+]
+
+
+def course_names(cohort_name: str):
+    """Ways of naming a course in the templates: full name and a short one"""
+    short_name = cohort_name.replace("Certification Course", "").strip()
+    return [cohort_name, f"{short_name} course"]
+
+
+def main():
+    """Build the FAQ answer cache from processed course data"""
+    processed_file = Path(__file__).parent.parent / "data" / "processed" / "nextleap_courses.json"
+    
+    if not processed_file.exists():
+        print(f"Error: Processed data file not found: {processed_file}")
+        print("Please run scrape_data.py first to generate course data.")
+        return
+    
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        print("ERROR: GEMINI_API_KEY environment variable is required!")
+        sys.exit(1)
+    
+    courses_data = orjson.loads(processed_file.read_bytes())
+    questions = []
+    for course in courses_data:
+        cohort_name = dig(course, "cohort", "cohort_name")
+        if not cohort_name:
+            continue
+        for name in course_names(cohort_name):
+            questions.extend(template.format(course=name) for template in FAQ_TEMPLATES)
+    print(f"Answering {len(questions)} questions for {len(courses_data)} courses...")
+    
+    embedder = EmbeddingGenerator()
+    handler = QueryHandler(VectorDB(), embedder, GeminiLLMHandler(api_key=api_key))
+    embeddings = embedder.generate_embeddings(questions, batch_size=64)
+    
+    entries = []
+    vectors = []
+    for i, (question, embedding) in enumerate(zip(questions, embeddings)):
+        # Own session per question so each is answered as an opening question
+        result = handler.answer_query(question, session_id=f"faq-{i}", query_embedding=embedding)
+        if not result.get("contexts_used") or result["answer"].startswith(LLM_ERROR_PREFIX):
+            print(f"  Skipping (no usable answer): {question}")
+            continue
+        if result.get("direct"):
+            # Exact lookups are answered from metadata anyway; as FAQ entries
+            # they would also answer paraphrases that ask something else
+            print(f"  Skipping (answered from metadata): {question}")
+            continue
+        entries.append({
+            "question": question,
+            "scope": QueryHandler._query_course(question),
+            "answer": result["answer"],
+            "source_url": result.get("source_url")
+        })
+        vectors.append(embedding)
+    
+    if not entries:
+        print("\nNo answers to save")
+        return
+    FAQAnswerCache.save(str(FAQ_CACHE_PATH), vectors, entries)
+    print(f"\nSaved {len(entries)} FAQ answers to {FAQ_CACHE_PATH}.npy/.json")
+
+
+if __name__ == "__main__":
+    main()
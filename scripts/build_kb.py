@@ -2,18 +2,75 @@
 Script to build knowledge base from scraped course data
 Creates chunks, generates embeddings, and stores in vector database
 """
+import os
 import sys
-import json
+import hashlib
 from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import orjson
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.processor.chunker import CourseChunker
-from src.embeddings.embedder import EmbeddingGenerator
+from src.embeddings.embedder import DEFAULT_MODEL_NAME, EmbeddingGenerator
 from src.embeddings.vector_db import VectorDB
 
 
+# Content hash -> embedding cache, so rebuilds only embed chunks that changed
+EMBEDDING_CACHE_FILE = Path(__file__).parent.parent / "data" / "processed" / "emb_cache.npz"
+
+# Whether build_kb stores L2-normalized embeddings
+NORMALIZE_EMBEDDINGS = True
+
+
+def embedding_config() -> str:
+    """
+    What the cached embeddings depend on besides the text: model, backend
+    (EMBEDDING_BACKEND) and normalization. Vectors made under a different
+    config aren't comparable, so the cache is only used when it matches.
+    """
+    return f"{DEFAULT_MODEL_NAME}|{EmbeddingGenerator.resolve_backend()}|normalize={NORMALIZE_EMBEDDINGS}"
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of a chunk's content used as the embedding cache key"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def load_embedding_cache(config: str, cache_file: Path = EMBEDDING_CACHE_FILE) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Load the embedding cache written under config
+    
+    Returns:
+        The cache, or None if it is missing, unreadable or was written
+        under another embedding config (or by a version that didn't record one)
+    """
+    if not cache_file.exists():
+        return None
+    try:
+        with np.load(cache_file, allow_pickle=False) as data:
+            if "config" not in data or str(data["config"]) != config:
+                print("Embedding cache was built with a different model/backend, ignoring it")
+                return None
+            return dict(zip(data["keys"].tolist(), data["vectors"]))
+    except Exception as e:
+        print(f"Warning: Could not load embedding cache: {e}")
+        return None
+
+
+def save_embedding_cache(cache: Dict[str, np.ndarray], config: str, cache_file: Path = EMBEDDING_CACHE_FILE):
+    """Write the embedding cache back to disk, tagged with its embedding config"""
+    if not cache:
+        return
+    keys = list(cache.keys())
+    vectors = np.stack([cache[key] for key in keys]).astype(np.float32)
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(cache_file, keys=np.array(keys), vectors=vectors, config=np.array(config))
+
+
 def main():
     """Build knowledge base from processed course data"""
     
@@ -26,33 +83,49 @@ def main():
         return
     
     print("Loading course data...")
-    with open(processed_file, 'r', encoding='utf-8') as f:
-        courses_data = json.load(f)
+    courses_data = orjson.loads(processed_file.read_bytes())
     
     print(f"Loaded {len(courses_data)} courses")
     
     # Step 1: Chunk the data
     print("\nStep 1: Chunking course data...")
     chunker = CourseChunker()
-    chunks = chunker.chunk_all_courses(courses_data)
+    chunks, chunk_texts = chunker.chunk_all_courses_with_texts(courses_data)
     print(f"Created {len(chunks)} chunks")
     
     # Step 2: Generate embeddings
     print("\nStep 2: Generating embeddings...")
     # Set cache directories to /tmp to avoid including in Docker image
-    import os
     os.environ['TRANSFORMERS_CACHE'] = '/tmp/transformers_cache'
     os.environ['HF_HOME'] = '/tmp/huggingface'
     os.environ['SENTENCE_TRANSFORMERS_HOME'] = '/tmp/sentence_transformers'
-    embedder = EmbeddingGenerator()
-    chunk_texts = [chunk["content"] for chunk in chunks]
-    embeddings = embedder.generate_embeddings(chunk_texts)
+    config = embedding_config()
+    cache = load_embedding_cache(config)
+    # Without a matching cache, the stored vectors may come from another
+    # model or backend too, so every chunk is rewritten below
+    overwrite = cache is None
+    cache = cache or {}
+    keys = [content_hash(text) for text in chunk_texts]
+    misses = [i for i, key in enumerate(keys) if key not in cache]
+    print(f"Embedding cache: {len(chunk_texts) - len(misses)} hits, {len(misses)} misses")
+    
+    if misses:
+        embedder = EmbeddingGenerator()
+        new_embeddings = embedder.generate_embeddings([chunk_texts[i] for i in misses], batch_size=64, normalize=NORMALIZE_EMBEDDINGS)
+        for i, embedding in zip(misses, new_embeddings):
+            cache[keys[i]] = np.asarray(embedding, dtype=np.float32)
+    
+    # Only keep entries for the current chunks so the cache doesn't grow forever
+    cache = {key: cache[key] for key in keys}
+    save_embedding_cache(cache, config)
+    embeddings = np.stack([cache[key] for key in keys]) if keys else np.zeros((0, 0), dtype=np.float32)
     print(f"Generated {len(embeddings)} embeddings")
     
     # Step 3: Store in vector database
     print("\nStep 3: Storing in vector database...")
     vector_db = VectorDB()
-    vector_db.add_chunks(chunks, embeddings)
+    vector_db.add_chunks(chunks, embeddings, replace=True, overwrite=overwrite)
+    vector_db.finalize()
     
     # Print summary
     info = vector_db.get_collection_info()
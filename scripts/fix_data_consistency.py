@@ -7,8 +7,10 @@ This script:
 4. Tests queries to ensure correctness
 """
 import sys
+import argparse
 from pathlib import Path
-import json
+
+import orjson
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -47,6 +49,10 @@ def update_missing_dates(courses_data):
 
 def main():
     """Main function to fix data consistency"""
+    parser = argparse.ArgumentParser(description="Fix data consistency issues in processed course data")
+    parser.add_argument("--verbose", action="store_true", help="Print the current data status per course")
+    args = parser.parse_args()
+    
     print("="*70)
     print("DATA CONSISTENCY FIX SCRIPT")
     print("="*70)
@@ -59,26 +65,24 @@ def main():
         print("❌ No existing data found. Please run scrape_data.py first.")
         return
     
-    with open(data_path, 'r', encoding='utf-8') as f:
-        courses = json.load(f)
+    courses = orjson.loads(data_path.read_bytes())
     
     print(f"Loaded {len(courses)} courses")
     print()
     
-    # Validate data
     validator = DataValidator()
-    validation_results = validator.validate_all_courses(courses)
     
-    print("Current Data Status:")
-    print("-" * 70)
-    for course in courses:
-        name = course.get("cohort", {}).get("cohort_name", "Unknown")
-        batch_date = course.get("batch", {}).get("batch_start_date")
-        cost = course.get("batch", {}).get("cost")
-        print(f"{name}:")
-        print(f"  Start Date: {batch_date}")
-        print(f"  Cost: ₹{cost}")
-    print()
+    if args.verbose:
+        print("Current Data Status:")
+        print("-" * 70)
+        for course in courses:
+            name = course.get("cohort", {}).get("cohort_name", "Unknown")
+            batch_date = course.get("batch", {}).get("batch_start_date")
+            cost = course.get("batch", {}).get("cost")
+            print(f"{name}:")
+            print(f"  Start Date: {batch_date}")
+            print(f"  Cost: ₹{cost}")
+        print()
     
     # Update missing dates
     print("Updating missing dates...")
@@ -86,7 +90,7 @@ def main():
     print(f"Updated {updated} courses")
     print()
     
-    # Re-validate
+    # Validate once, after the overrides have been applied
     validation_results = validator.validate_all_courses(courses)
     consistency_issues = validator.check_data_consistency(courses)
     
@@ -104,8 +108,7 @@ def main():
     print()
     
     # Save updated data
-    with open(data_path, 'w', encoding='utf-8') as f:
-        json.dump(courses, f, indent=2, ensure_ascii=False)
+    data_path.write_bytes(orjson.dumps(courses, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     
     print(f"✅ Data saved to: {data_path}")
     print()
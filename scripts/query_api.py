@@ -5,31 +5,35 @@ Now uses Gemini 2.0 Flash for answer generation
 """
 import sys
 import os
+import asyncio
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.embeddings.embedder import EmbeddingGenerator
+from src.embeddings.embedder import EmbeddingGenerator, BatchingEmbedder
 from src.embeddings.vector_db import VectorDB
 from src.query.query_handler import QueryHandler
 from src.query.llm_handler import GeminiLLMHandler
+from src.query.response_cache import AnswerCache, SemanticAnswerCache
 
 
 # Initialize components (singleton pattern)
 _vector_db = None
 _embedder = None
+_batching_embedder = None
 _llm_handler = None
 _query_handler = None
 
 
 def get_query_handler():
     """Get or create query handler instance with Gemini LLM"""
-    global _vector_db, _embedder, _llm_handler, _query_handler
+    global _vector_db, _embedder, _batching_embedder, _llm_handler, _query_handler
     
     if _query_handler is None:
         _vector_db = VectorDB()
         _embedder = EmbeddingGenerator()
+        _batching_embedder = BatchingEmbedder(_embedder)
         
         # Initialize Gemini LLM
         api_key = os.getenv("GEMINI_API_KEY")
@@ -39,7 +43,8 @@ def get_query_handler():
             sys.exit(1)
         _llm_handler = GeminiLLMHandler(api_key=api_key)
         
-        _query_handler = QueryHandler(_vector_db, _embedder, _llm_handler)
+        answer_cache = AnswerCache(path=os.getenv("ANSWER_CACHE_PATH", "/tmp/answer_cache.sqlite3"))
+        _query_handler = QueryHandler(_vector_db, _embedder, _llm_handler, answer_cache=answer_cache, semantic_cache=SemanticAnswerCache())
     
     return _query_handler
 
@@ -63,6 +68,34 @@ def answer_question(question: str) -> dict:
     }
 
 
+async def answer_question_async(question: str) -> dict:
+    """
+    Answer a question, batching its embedding with concurrent callers
+    
+    Args:
+        question: User question
+        
+    Returns:
+        Dictionary with answer and source_url
+    """
+    handler = get_query_handler()
+    cached = await asyncio.to_thread(handler.cached_answer, question)
+    if cached is not None:
+        return {"answer": cached["answer"], "source_url": cached["source_url"]}
+    query_embedding = await _batching_embedder.embed(question)
+    result = await handler.answer_query_async(question, query_embedding=query_embedding, check_cache=False)
+    
+    return {
+        "answer": result["answer"],
+        "source_url": result["source_url"]
+    }
+
+
+async def answer_questions(questions: list) -> list:
+    """Answer several questions concurrently (their embeddings share forward passes)"""
+    return await asyncio.gather(*(answer_question_async(q) for q in questions))
+
+
 if __name__ == "__main__":
     """CLI interface for testing"""
     if len(sys.argv) < 2:
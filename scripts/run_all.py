@@ -7,16 +7,18 @@ import time
 import os
 from pathlib import Path
 
+import requests
+
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 def run_backend():
     """Run the FastAPI backend server"""
     print("Starting backend server...")
+    # Children inherit our stdout/stderr - an undrained PIPE would block
+    # the server once the OS pipe buffer fills up
     backend_process = subprocess.Popen(
-        [sys.executable, "scripts/run_server.py"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
+        [sys.executable, "scripts/run_server.py"]
     )
     return backend_process
 
@@ -24,12 +26,33 @@ def run_frontend():
     """Run the frontend HTTP server"""
     print("Starting frontend server...")
     frontend_process = subprocess.Popen(
-        [sys.executable, "scripts/run_frontend.py"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
+        [sys.executable, "scripts/run_frontend.py"]
     )
     return frontend_process
 
+# Seconds to wait for each server to answer; the backend loads the
+# embedding model and knowledge base before /health responds
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", "60"))
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = READY_TIMEOUT, interval: float = 0.5) -> bool:
+    """
+    Poll a URL until it answers, instead of sleeping a fixed amount
+    
+    Returns:
+        True once the URL answers; False on timeout or if process exits first
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            requests.get(url, timeout=1)
+            return True
+        except requests.RequestException:
+            time.sleep(interval)
+    return False
+
 if __name__ == "__main__":
     print("="*60)
     print("Starting Nextleap Chatbot - Backend & Frontend")
@@ -38,15 +61,30 @@ if __name__ == "__main__":
     
     # Start backend
     backend = run_backend()
-    time.sleep(3)  # Wait for backend to start
+    backend_ready = wait_until_ready("http://localhost:8000/health", backend)
+    if backend.poll() is not None:
+        print("❌ Backend exited during startup, see its output above")
+        sys.exit(1)
+    if not backend_ready:
+        print(f"⚠️  Backend did not answer /health within {READY_TIMEOUT:.0f}s (set READY_TIMEOUT to wait longer)")
     
     # Start frontend
     frontend = run_frontend()
-    time.sleep(2)  # Wait for frontend to start
+    frontend_ready = wait_until_ready("http://localhost:3000", frontend)
+    if frontend.poll() is not None:
+        print("❌ Frontend exited during startup, see its output above")
+        backend.terminate()
+        backend.wait()
+        sys.exit(1)
+    if not frontend_ready:
+        print(f"⚠️  Frontend did not answer within {READY_TIMEOUT:.0f}s")
     
     print()
     print("="*60)
-    print("✅ Servers are running!")
+    if backend_ready and frontend_ready:
+        print("✅ Servers are running!")
+    else:
+        print("⏳ Servers started but are not ready yet; check the output above")
     print("="*60)
     print("Backend API: http://localhost:8000")
     print("Frontend UI: http://localhost:3000")
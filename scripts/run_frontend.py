@@ -2,7 +2,6 @@
 Simple HTTP server to run the frontend locally
 """
 import http.server
-import socketserver
 import os
 import sys
 
@@ -23,7 +22,8 @@ class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
 if __name__ == "__main__":
     os.chdir(FRONTEND_DIR)
     
-    with socketserver.TCPServer(("", PORT), MyHTTPRequestHandler) as httpd:
+    # Threaded server so the browser's parallel asset requests aren't served one at a time
+    with http.server.ThreadingHTTPServer(("", PORT), MyHTTPRequestHandler) as httpd:
         print(f"Frontend server running at http://localhost:{PORT}")
         print("Press Ctrl+C to stop")
         try:
@@ -23,8 +23,7 @@ else:
     sys.exit(1)
 
 # Import and run server
-from src.api.server import app
-import uvicorn
+from src.api.server import run_server
 
 if __name__ == "__main__":
     print("\n" + "="*50)
@@ -34,5 +33,4 @@ if __name__ == "__main__":
     print("API docs at: http://localhost:8000/docs")
     print("="*50 + "\n")
     
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=False)
-
+    run_server(host="0.0.0.0", port=8000)
@@ -3,9 +3,10 @@ Script to scrape data from Nextleap course pages
 """
 import sys
 import os
-import json
 from pathlib import Path
 
+import orjson
+
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -18,7 +19,7 @@ def main():
     """Main scraping function"""
     
     # Initialize scraper
-    scraper = NextleapScraper()
+    scraper = NextleapScraper(http_cache=os.getenv("SCRAPER_HTTP_CACHE"))
     validator = DataValidator()
     
     # Get course URLs
@@ -27,7 +28,7 @@ def main():
     
     # Add known URLs
     known_urls = get_all_course_urls()
-    all_urls = list(set(discovered_urls + known_urls))
+    all_urls = list(set(discovered_urls).union(known_urls))
     
     print(f"Found {len(all_urls)} course URLs:")
     for url in all_urls:
@@ -52,8 +53,7 @@ def main():
     raw_dir.mkdir(parents=True, exist_ok=True)
     
     raw_file = raw_dir / f"raw_data_{Path(__file__).stem}.json"
-    with open(raw_file, 'w', encoding='utf-8') as f:
-        json.dump(courses_data, f, indent=2, ensure_ascii=False)
+    raw_file.write_bytes(orjson.dumps(courses_data, option=orjson.OPT_INDENT_2))
     print(f"Raw data saved to: {raw_file}")
     
     # Save validated data
@@ -61,8 +61,7 @@ def main():
     processed_dir.mkdir(parents=True, exist_ok=True)
     
     processed_file = processed_dir / "nextleap_courses.json"
-    with open(processed_file, 'w', encoding='utf-8') as f:
-        json.dump(validated_courses, f, indent=2, ensure_ascii=False)
+    processed_file.write_bytes(orjson.dumps(validated_courses, option=orjson.OPT_INDENT_2))
     print(f"Validated data saved to: {processed_file}")
     
     # Run data validation and fix script to ensure consistency
@@ -77,8 +76,7 @@ def main():
         if fixes:
             print(f"Applied {len(fixes)} data fixes")
             # Reload the fixed data
-            with open(processed_file, 'r', encoding='utf-8') as f:
-                validated_courses = json.load(f)
+            validated_courses = orjson.loads(processed_file.read_bytes())
     except Exception as e:
         print(f"Warning: Could not run validation script: {e}")
     
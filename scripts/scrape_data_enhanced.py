@@ -1,9 +1,10 @@
 """
 Enhanced data scraping script with validation and consistency checks
 """
+import os
 import sys
 from pathlib import Path
-import json
+import orjson
 from datetime import datetime
 
 # Add project root to path
@@ -22,18 +23,23 @@ def main():
     print()
     
     # Initialize scraper
-    scraper = EnhancedScraper(use_selenium=True)
+    scraper = EnhancedScraper(use_selenium=True, http_cache=os.getenv("SCRAPER_HTTP_CACHE"),
+                              selenium_workers=int(os.getenv("SELENIUM_WORKERS", "1")),
+                              selenium_cache=os.getenv("SELENIUM_CACHE_DIR"))
     
     # Get all course URLs
     urls = get_all_course_urls()
     print(f"Found {len(urls)} course URLs to scrape")
     print()
     
-    # Scrape all courses
+    # Scrape all courses (static pages concurrently, one shared browser for
+    # the Selenium fallback), then post-process in order
+    scraped = scraper.scrape_all(urls, max_workers=4)
+    scraper.close()
+    
     all_courses = []
-    for url in urls:
+    for url, course_data in zip(urls, scraped):
         print(f"Scraping: {url}")
-        course_data = scraper.scrape_course_page_enhanced(url)
         
         if course_data:
             # Validate and fix data
@@ -58,8 +64,7 @@ def main():
     # Save raw data
     raw_data_path = Path(__file__).parent.parent / "data" / "raw" / "raw_data_enhanced.json"
     raw_data_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(raw_data_path, 'w', encoding='utf-8') as f:
-        json.dump(all_courses, f, indent=2, ensure_ascii=False)
+    raw_data_path.write_bytes(orjson.dumps(all_courses, option=orjson.OPT_INDENT_2))
     print(f"Saved raw data to: {raw_data_path}")
     
     # Process and validate all courses
@@ -87,8 +92,7 @@ def main():
     # Save processed data
     processed_data_path = Path(__file__).parent.parent / "data" / "processed" / "nextleap_courses.json"
     processed_data_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(processed_data_path, 'w', encoding='utf-8') as f:
-        json.dump(all_courses, f, indent=2, ensure_ascii=False)
+    processed_data_path.write_bytes(orjson.dumps(all_courses, option=orjson.OPT_INDENT_2))
     print(f"\nSaved processed data to: {processed_data_path}")
     print("\n✅ Enhanced scraping complete!")
 
@@ -2,11 +2,15 @@
 Test script to run 5 different queries against the backend
 """
 import requests
-import json
+import orjson
 import time
 
 BASE_URL = "http://localhost:8000"
 
+# One keep-alive connection for the health checks and all queries
+session = requests.Session()
+session.headers["Content-Type"] = "application/json"
+
 test_queries = [
     "When is the product manager fellowship starting?",
     "What is the cost of the data analyst course?",
@@ -22,9 +26,9 @@ def test_query(question: str):
     print('='*70)
     
     try:
-        response = requests.post(
+        response = session.post(
             f"{BASE_URL}/query",
-            json={"question": question},
+            data=orjson.dumps({"question": question}),
             timeout=30
         )
         response.raise_for_status()
@@ -51,7 +55,7 @@ if __name__ == "__main__":
     print("\nWaiting for server to be ready...")
     for i in range(10):
         try:
-            response = requests.get(f"{BASE_URL}/health", timeout=2)
+            response = session.get(f"{BASE_URL}/health", timeout=2)
             if response.status_code == 200:
                 print("✅ Server is ready!")
                 break
@@ -3,7 +3,8 @@ Test script to inspect the actual HTML structure of Nextleap pages
 """
 import sys
 from pathlib import Path
-import json
+import orjson
+import lxml.html
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -16,14 +17,14 @@ def test_single_page():
     test_url = "https://nextleap.app/course/data-analyst-course"
     print(f"Testing URL: {test_url}")
     
-    soup = scraper.fetch_page(test_url)
-    if soup:
+    tree = scraper.fetch_page(test_url)
+    if tree is not None:
         # Save HTML for inspection
         html_file = Path(__file__).parent.parent / "data" / "raw" / "test_page.html"
         html_file.parent.mkdir(parents=True, exist_ok=True)
         
         with open(html_file, 'w', encoding='utf-8') as f:
-            f.write(soup.prettify())
+            f.write(lxml.html.tostring(tree, pretty_print=True, encoding='unicode'))
         print(f"HTML saved to: {html_file}")
         
         # Try to extract data
@@ -31,8 +32,7 @@ def test_single_page():
         if data:
             # Save extracted data
             data_file = Path(__file__).parent.parent / "data" / "raw" / "test_extraction.json"
-            with open(data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            data_file.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
             print(f"Extracted data saved to: {data_file}")
             
             # Print summary
@@ -2,38 +2,61 @@
 Test script for the FastAPI server
 """
 import requests
-import json
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 
 BASE_URL = "http://localhost:8000"
 
+# One pooled keep-alive connection shared by every test call
+SESSION = requests.Session()
+SESSION.headers.update({'Connection': 'keep-alive'})
+
 def test_health():
     """Test health endpoint"""
     print("Testing health endpoint...")
-    response = requests.get(f"{BASE_URL}/health")
+    response = SESSION.get(f"{BASE_URL}/health")
     print(f"Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    print(f"Response: {orjson.dumps(orjson.loads(response.content), option=orjson.OPT_INDENT_2).decode()}")
     print()
 
 def test_query_post(question: str):
     """Test query endpoint (POST)"""
     print(f"Testing POST /query with question: '{question}'")
-    response = requests.post(
+    response = SESSION.post(
         f"{BASE_URL}/query",
         json={"question": question}
     )
     print(f"Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    print(f"Response: {orjson.dumps(orjson.loads(response.content), option=orjson.OPT_INDENT_2).decode()}")
     print()
 
+def test_queries_concurrent(questions: list):
+    """Test query endpoint (POST) with all questions in flight at once"""
+    print(f"Testing {len(questions)} concurrent POST /query requests...")
+    
+    def post(question: str):
+        return SESSION.post(f"{BASE_URL}/query", json={"question": question})
+    
+    with ThreadPoolExecutor(max_workers=len(questions)) as executor:
+        responses = list(executor.map(post, questions))
+    
+    # Print in question order once everything has come back
+    for question, response in zip(questions, responses):
+        print(f"Question: '{question}'")
+        print(f"Status: {response.status_code}")
+        print(f"Response: {orjson.dumps(orjson.loads(response.content), option=orjson.OPT_INDENT_2).decode()}")
+        print("-"*50)
+        print()
+
 def test_query_get(question: str):
     """Test query endpoint (GET)"""
     print(f"Testing GET /query with question: '{question}'")
-    response = requests.get(
+    response = SESSION.get(
         f"{BASE_URL}/query",
         params={"question": question}
     )
     print(f"Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    print(f"Response: {orjson.dumps(orjson.loads(response.content), option=orjson.OPT_INDENT_2).decode()}")
     print()
 
 if __name__ == "__main__":
@@ -52,9 +75,7 @@ if __name__ == "__main__":
         "Who are the instructors for product management course?"
     ]
     
-    for query in test_queries:
-        test_query_post(query)
-        print("-"*50)
-        print()
+    # Total time is the slowest answer rather than the sum of all of them
+    test_queries_concurrent(test_queries)
 
 
@@ -2,12 +2,13 @@
 Script to validate and fix data inconsistencies
 Ensures all data matches what's on the website
 """
-import json
+import orjson
 import requests
-from bs4 import BeautifulSoup
+import lxml.html
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 # Manual overrides for data that can't be scraped reliably
 # These should be verified against the actual website
@@ -28,27 +29,37 @@ DATA_OVERRIDES = {
     }
 }
 
+# url -> (expected cost, expected start date), built once so the validation
+# loop is a single lookup per course
+OVERRIDES = {
+    url: (override.get("cost"), override.get("batch_start_date"))
+    for url, override in DATA_OVERRIDES.items()
+}
+
+
+# Course-specific pricing patterns, compiled once at import
+_PRICE_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(?:course fee|enrollment fee|program fee|course cost)[:\s]*[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)',
+    r'[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)\s*(?:course fee|enrollment fee|program fee)',
+))
+
+# Words near a price that suggest it's a struck-through/original price
+_CONTEXT_WORDS = frozenset({'discount', 'was', 'original', 'save'})
 
-def scrape_price_from_website(url: str) -> str:
+
+def scrape_price_from_website(url: str, session: Optional[requests.Session] = None) -> str:
     """
     Scrape the actual price from the website
     Returns the price as string or None if not found
     """
     try:
-        response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=15)
-        soup = BeautifulSoup(response.text, 'lxml')
-        page_text = soup.get_text()
-        
-        # Look for course-specific pricing patterns
-        price_patterns = [
-            r'(?:course fee|enrollment fee|program fee|course cost)[:\s]*[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)',
-            r'[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)\s*(?:course fee|enrollment fee|program fee)',
-        ]
+        response = (session or requests).get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=15)
+        # Only the page text is needed, so skip building a BeautifulSoup tree
+        page_text = lxml.html.fromstring(response.content).text_content()
         
         candidate_prices = []
-        for pattern in price_patterns:
-            matches = re.finditer(pattern, page_text, re.IGNORECASE)
-            for match in matches:
+        for pattern in _PRICE_PATTERNS:
+            for match in pattern.finditer(page_text):
                 price_str = match.group(1).replace(',', '')
                 try:
                     price = float(price_str)
@@ -63,7 +74,7 @@ def scrape_price_from_website(url: str) -> str:
                             score += 3
                         if 'fee' in context or 'cost' in context:
                             score += 2
-                        if any(word in context for word in ['discount', 'was', 'original', 'save']):
+                        if any(word in context for word in _CONTEXT_WORDS):
                             score -= 2
                         
                         candidate_prices.append({
@@ -95,14 +106,26 @@ def validate_and_fix_data():
         return
     
     print("Loading course data...")
-    with open(data_file, 'r') as f:
-        courses = json.load(f)
+    courses = orjson.loads(data_file.read_bytes())
     
     print(f"Found {len(courses)} courses")
     print("="*60)
     
     fixes_applied = []
     
+    # Fetch prices for courses without overrides concurrently over one
+    # pooled session, so the wait is the slowest page rather than the sum
+    scrape_urls = list(dict.fromkeys(
+        course.get("source_url", "") for course in courses
+        if course.get("source_url", "") not in OVERRIDES
+    ))
+    scraped_prices = {}
+    if scrape_urls:
+        print(f"Scraping prices for {len(scrape_urls)} courses...")
+        with requests.Session() as session, ThreadPoolExecutor(max_workers=min(20, len(scrape_urls))) as executor:
+            prices = executor.map(lambda url: scrape_price_from_website(url, session), scrape_urls)
+            scraped_prices = dict(zip(scrape_urls, prices))
+    
     for course in courses:
         url = course.get("source_url", "")
         cohort_name = course.get("cohort", {}).get("cohort_name", "Unknown")
@@ -114,10 +137,9 @@ def validate_and_fix_data():
         current_cost = batch.get("cost")
         
         # Check if we have an override
-        if url in DATA_OVERRIDES:
-            override = DATA_OVERRIDES[url]
-            expected_cost = override.get("cost")
-            expected_date = override.get("batch_start_date")
+        override = OVERRIDES.get(url)
+        if override is not None:
+            expected_cost, expected_date = override
             
             # Fix cost if different
             if expected_cost and current_cost != expected_cost:
@@ -135,9 +157,8 @@ def validate_and_fix_data():
                     fixes_applied.append(f"{cohort_name}: Date updated to {expected_date}")
                     print(f"  ✅ Date fixed: {expected_date}")
         else:
-            # Try to scrape from website
-            print(f"  Scraping price from website...")
-            scraped_price = scrape_price_from_website(url)
+            # Use the price scraped from the website
+            scraped_price = scraped_prices.get(url)
             if scraped_price and scraped_price != current_cost:
                 print(f"  ⚠️  Cost mismatch: Stored {current_cost}, Website shows {scraped_price}")
                 batch["cost"] = scraped_price
@@ -148,8 +169,7 @@ def validate_and_fix_data():
     if fixes_applied:
         print("\n" + "="*60)
         print("Saving fixed data...")
-        with open(data_file, 'w') as f:
-            json.dump(courses, f, indent=2)
+        data_file.write_bytes(orjson.dumps(courses, option=orjson.OPT_INDENT_2))
         
         print(f"\n✅ Applied {len(fixes_applied)} fixes:")
         for fix in fixes_applied:
@@ -2,29 +2,55 @@
 FastAPI server for Nextleap FAQ chatbot
 """
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from pydantic import BaseModel
 from typing import Optional
 import sys
 from pathlib import Path
 import os
+import threading
+import time
+from contextlib import asynccontextmanager
+import anyio
+import orjson
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from src.embeddings.embedder import EmbeddingGenerator
+from src.embeddings.embedder import EmbeddingGenerator, BatchingEmbedder
 from src.embeddings.vector_db import VectorDB
 from src.query.query_handler import QueryHandler
 from src.query.llm_handler import GeminiLLMHandler
 from src.query.conversation_memory import ConversationMemory
+from src.query.response_cache import AnswerCache, FAQAnswerCache, SemanticAnswerCache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Size the threadpool and load all components before serving requests"""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = int(os.getenv("THREADPOOL_SIZE", 64))
+    
+    try:
+        await run_in_threadpool(get_query_handler)
+    except Exception as e:
+        # Keep serving so /health can report the error; queries retry the init
+        print(f"Warning: Startup initialization failed: {e}")
+    yield
 
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Nextleap FAQ Chatbot API",
     description="API for answering questions about Nextleap courses",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware - Allow frontend to access API
@@ -36,18 +62,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """GZip that leaves Server-Sent Event streams alone (compression would buffer them)"""
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith("/stream"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Compress JSON answers and frontend assets above 1KB
+app.add_middleware(StreamAwareGZipMiddleware, minimum_size=1024)
+
 # Global variables for initialized components
 _vector_db = None
 _embedder = None
+_batching_embedder = None
 _llm_handler = None
 _query_handler = None
 _conversation_memory = None
 _initialization_error = None
+_init_lock = threading.Lock()
+
+# (time.monotonic() when counted, chunk count) for /health
+_chunk_count_cache = None
+CHUNK_COUNT_TTL = 30
 
 
 def get_query_handler():
-    """Initialize and return query handler (singleton pattern)"""
-    global _vector_db, _embedder, _llm_handler, _query_handler, _conversation_memory, _initialization_error
+    """
+    Initialize and return query handler (singleton pattern)
+    
+    Normally called once by the lifespan hook (or at cold start on Vercel,
+    where Mangum runs without lifespan); the lock keeps concurrent first
+    requests from loading the model twice.
+    """
+    if _query_handler is not None:
+        return _query_handler
+    
+    with _init_lock:
+        return _initialize_components()
+
+
+def _initialize_components():
+    """Build all components (call with _init_lock held)"""
+    global _vector_db, _embedder, _batching_embedder, _llm_handler, _query_handler, _conversation_memory, _initialization_error
     
     if _query_handler is None:
         try:
@@ -73,6 +133,20 @@ def get_query_handler():
             
             print("  - Initializing EmbeddingGenerator...")
             _embedder = EmbeddingGenerator()
+            _batching_embedder = BatchingEmbedder(
+                _embedder,
+                max_batch=int(os.getenv("EMBED_MAX_BATCH", 32)),
+                wait_ms=float(os.getenv("EMBED_WAIT_MS", 5))
+            )
+            
+            # Warm up the model and the collection so the first user query
+            # doesn't pay for kernel initialization and the first index read
+            print("  - Warming up embedder and vector search...")
+            try:
+                warmup_embedding = _embedder.generate_embedding("warmup")
+                _vector_db.search(warmup_embedding, n_results=1)
+            except Exception as warmup_error:
+                print(f"  - Warning: Warmup failed: {warmup_error}")
             
             # Initialize Gemini LLM
             api_key = os.getenv("GEMINI_API_KEY")
@@ -84,11 +158,24 @@ def get_query_handler():
             
             # Initialize conversation memory
             print("  - Initializing ConversationMemory...")
-            _conversation_memory = ConversationMemory(max_messages=20)
+            # With several workers, keep history in SQLite so a session's
+            # follow-up questions work whichever worker they land on
+            conversation_db = os.getenv("CONVERSATION_DB_PATH")
+            if not conversation_db and int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+                conversation_db = "/tmp/conversations.sqlite3"
+            _conversation_memory = ConversationMemory(max_messages=20, path=conversation_db)
             
             # Initialize query handler with memory
             print("  - Initializing QueryHandler...")
-            _query_handler = QueryHandler(_vector_db, _embedder, _llm_handler, _conversation_memory)
+            # Persisted under /tmp so warm serverless containers keep answers
+            answer_cache = AnswerCache(path=os.getenv("ANSWER_CACHE_PATH", "/tmp/answer_cache.sqlite3"))
+            semantic_cache = SemanticAnswerCache(threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")))
+            # Precomputed answers to anticipated questions (scripts/build_faq_cache.py)
+            faq_cache = FAQAnswerCache(
+                os.getenv("FAQ_CACHE_PATH", "data/processed/faq_cache"),
+                threshold=float(os.getenv("FAQ_CACHE_THRESHOLD", "0.88"))
+            )
+            _query_handler = QueryHandler(_vector_db, _embedder, _llm_handler, _conversation_memory, answer_cache, semantic_cache, faq_cache)
             
             print("Components initialized successfully!")
             _initialization_error = None
@@ -103,6 +190,28 @@ def get_query_handler():
     return _query_handler
 
 
+async def answer_question_async(question: str, session_id: str = "default") -> dict:
+    """
+    Answer a question, batching its embedding with other in-flight requests
+    
+    Args:
+        question: User question
+        session_id: Session identifier for conversation memory
+        
+    Returns:
+        Dictionary with answer and source URL
+    """
+    handler = _query_handler or await run_in_threadpool(get_query_handler)
+    # The answer cache may read its SQLite file, so keep it off the event loop
+    cached = await run_in_threadpool(handler.cached_answer, question, session_id=session_id)
+    if cached is not None:
+        return cached
+    query_embedding = await _batching_embedder.embed(question)
+    # Vector search runs in a thread; the Gemini call is awaited, so
+    # concurrent requests overlap their LLM round trips
+    return await handler.answer_query_async(question, session_id=session_id, query_embedding=query_embedding, check_cache=False)
+
+
 # Request/Response models
 class QueryRequest(BaseModel):
     question: str
@@ -120,6 +229,21 @@ class HealthResponse(BaseModel):
     knowledge_base_chunks: int
 
 
+def _get_chunk_count() -> int:
+    """Knowledge base size, re-counted at most every CHUNK_COUNT_TTL seconds"""
+    global _chunk_count_cache
+    
+    if _chunk_count_cache is not None and time.monotonic() - _chunk_count_cache[0] < CHUNK_COUNT_TTL:
+        return _chunk_count_cache[1]
+    
+    # Reuse the initialized singleton; only open Chroma here before startup finishes
+    vector_db = _vector_db if _vector_db is not None else VectorDB()
+    count = vector_db.get_collection_info().get("chunk_count", 0)
+    if _vector_db is not None:
+        _chunk_count_cache = (time.monotonic(), count)
+    return count
+
+
 # API Endpoints - Define these BEFORE frontend routes
 @app.get("/health", response_model=HealthResponse)
 async def health():
@@ -127,9 +251,10 @@ async def health():
     try:
         # Try to get collection info, but don't fail if not initialized yet
         try:
-            vector_db = VectorDB()
-            info = vector_db.get_collection_info()
-            chunk_count = info.get("chunk_count", 0)
+            if _chunk_count_cache is not None and time.monotonic() - _chunk_count_cache[0] < CHUNK_COUNT_TTL:
+                chunk_count = _chunk_count_cache[1]
+            else:
+                chunk_count = await run_in_threadpool(_get_chunk_count)
         except Exception as e:
             print(f"Warning: Could not get collection info: {e}")
             chunk_count = 0
@@ -167,8 +292,7 @@ async def query(request: QueryRequest):
         Query response with answer and source URL
     """
     try:
-        handler = get_query_handler()
-        result = handler.answer_query(request.question, session_id=request.session_id)
+        result = await answer_question_async(request.question, session_id=request.session_id)
         
         return QueryResponse(
             answer=result["answer"],
@@ -187,6 +311,51 @@ async def query(request: QueryRequest):
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
 
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest):
+    """
+    Answer a question, streaming the answer as Server-Sent Events
+    
+    Events: "source" ({source_url}), then "token" ({text}) pieces as the
+    LLM produces them, then "done" ({answer, source_url}). Clients that
+    don't read streams should keep using POST /query.
+    
+    Args:
+        request: Query request with question and optional session_id
+        
+    Returns:
+        text/event-stream response
+    """
+    try:
+        handler = _query_handler or await run_in_threadpool(get_query_handler)
+        cached = await run_in_threadpool(handler.cached_answer, request.question, session_id=request.session_id)
+        query_embedding = None
+        if cached is None:
+            query_embedding = await _batching_embedder.embed(request.question)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+    
+    def event_stream():
+        if cached is not None:
+            # cached_answer already recorded the exchange; send it in one piece
+            events = [("source", {"source_url": cached.get("source_url")}), ("token", {"text": cached["answer"]}), ("done", cached)]
+        else:
+            events = handler.answer_query_stream(request.question, session_id=request.session_id, query_embedding=query_embedding, check_cache=False)
+        try:
+            for event, data in events:
+                yield f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+        except Exception as e:
+            print(f"Error streaming answer: {e}")
+            yield f"event: error\ndata: {orjson.dumps({'detail': str(e)}).decode()}\n\n"
+    
+    # The sync generator (blocking Gemini stream) is iterated in the threadpool
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/query")
 async def query_get(question: str):
     """
@@ -199,8 +368,7 @@ async def query_get(question: str):
         Query response with answer and source URL
     """
     try:
-        handler = get_query_handler()
-        result = handler.answer_query(question)
+        result = await answer_question_async(question)
         
         return QueryResponse(
             answer=result["answer"],
@@ -211,32 +379,23 @@ async def query_get(question: str):
 
 
 # Serve frontend static files - Define AFTER API routes
-frontend_path = Path(__file__).parent.parent.parent / "frontend"
-if frontend_path.exists():
-    # Serve index.html for root
-    @app.get("/")
-    async def root():
-        """Serve the frontend index.html"""
-        index_file = frontend_path / "index.html"
-        if index_file.exists():
-            return FileResponse(str(index_file))
-        # Fallback to health check if frontend not found
-        return await health()
+class SPAStaticFiles(StaticFiles):
+    """Static files with ETag/304 handling that fall back to index.html for SPA routes"""
     
-    # Serve static files (CSS, JS) - catch-all for frontend routes
-    @app.get("/{filename}")
-    async def serve_static(filename: str):
-        """Serve static files (CSS, JS) or SPA routes"""
-        # Check if it's a static file
-        static_file = frontend_path / filename
-        if static_file.exists() and static_file.is_file():
-            return FileResponse(str(static_file))
-        
-        # For SPA routing, serve index.html for unknown routes
-        index_file = frontend_path / "index.html"
-        if index_file.exists():
-            return FileResponse(str(index_file))
-        raise HTTPException(status_code=404, detail="Not found")
+    async def get_response(self, path: str, scope):
+        try:
+            return await super().get_response(path, scope)
+        except StarletteHTTPException as e:
+            # StaticFiles raises Starlette's exception, not FastAPI's subclass
+            if e.status_code != 404:
+                raise
+            return await super().get_response("index.html", scope)
+
+
+frontend_path = Path(__file__).parent.parent.parent / "frontend"
+if (frontend_path / "index.html").exists():
+    # Mounted last so every API route above takes precedence
+    app.mount("/", SPAStaticFiles(directory=str(frontend_path), html=True), name="frontend")
 else:
     # If frontend not found, provide health check at root
     @app.get("/")
@@ -245,6 +404,32 @@ else:
         return await health()
 
 
-if __name__ == "__main__":
+def run_server(host: str = "0.0.0.0", port: int = 8000):
+    """
+    Run the API with uvicorn on uvloop + httptools
+    
+    WEB_CONCURRENCY sets the number of worker processes; each loads its own
+    model and opens the same on-disk Chroma DB read-only in its lifespan.
+    uvloop doesn't support Windows, so the loop falls back to asyncio there
+    (UVICORN_LOOP / UVICORN_HTTP override both choices).
+    """
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    
+    default_loop = "asyncio" if sys.platform == "win32" else "uvloop"
+    workers = int(os.getenv("WEB_CONCURRENCY", 1))
+    
+    uvicorn.run(
+        # Multiple workers need an import string so each process loads the app
+        "src.api.server:app" if workers > 1 else app,
+        host=host,
+        port=port,
+        reload=False,
+        loop=os.getenv("UVICORN_LOOP", default_loop),
+        http=os.getenv("UVICORN_HTTP", "httptools"),
+        workers=workers,
+        log_level=os.getenv("UVICORN_LOG_LEVEL", "info")
+    )
+
+
+if __name__ == "__main__":
+    run_server()
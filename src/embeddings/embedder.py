@@ -1,61 +1,263 @@
 """
 Embedding generator for course data chunks
 """
-from typing import List
+from typing import Iterator, List, Optional
+from pathlib import Path
+import asyncio
+import functools
+import os
+
+# Use every core for the transformer GEMMs (containers often default to 1).
+# OpenMP/MKL read these when torch/numpy are first imported, so set them first.
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", os.cpu_count() or 1))
+os.environ.setdefault("OMP_NUM_THREADS", str(EMBED_THREADS))
+os.environ.setdefault("MKL_NUM_THREADS", str(EMBED_THREADS))
+
 from sentence_transformers import SentenceTransformer
 import numpy as np
+import torch
+
+torch.set_num_threads(EMBED_THREADS)
+try:
+    # One op at a time; parallelism comes from the intra-op GEMM threads and
+    # doesn't compete with FastAPI's threadpool
+    torch.set_num_interop_threads(1)
+except RuntimeError:
+    # Already set, or inter-op work has started (e.g. module reloaded)
+    pass
+
+# Model used when none is given (build_kb.py keys its embedding cache on it)
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
 
 
 class EmbeddingGenerator:
     """Generate embeddings for text chunks"""
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, backend: str = None):
         """
         Initialize embedding model
         
         Args:
             model_name: Name of the sentence transformer model
+            backend: "torch" (default) or "onnx" for an int8-quantized
+                ONNX Runtime model (or set EMBEDDING_BACKEND env var)
         """
+        self.model_name = model_name
+        self.backend = self.resolve_backend(backend)
         try:
             print(f"Loading embedding model: {model_name}...")
             # Use device='cpu' explicitly to avoid CUDA issues on Railway
             # Cache models in a writable location (Railway's ephemeral storage)
             # Set environment variables to prevent model downloads during import
-            import os
             os.environ['TRANSFORMERS_CACHE'] = '/tmp/transformers_cache'
             os.environ['HF_HOME'] = '/tmp/huggingface'
             os.environ['SENTENCE_TRANSFORMERS_HOME'] = '/tmp/sentence_transformers'
             cache_dir = '/tmp/transformers_cache'
             os.makedirs(cache_dir, exist_ok=True)
-            self.model = SentenceTransformer(model_name, device='cpu', cache_folder=cache_dir)
+            if self.backend == "onnx":
+                self._load_onnx_model(model_name, cache_dir)
+            else:
+                self.model = SentenceTransformer(model_name, device='cpu', cache_folder=cache_dir)
             print("Model loaded successfully!")
         except Exception as e:
             print(f"Error loading embedding model: {e}")
             raise
     
-    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+    @staticmethod
+    def resolve_backend(backend: Optional[str] = None) -> str:
+        """Backend an EmbeddingGenerator created with backend would use"""
+        return (backend or os.getenv("EMBEDDING_BACKEND", "torch")).lower()
+    
+    def _load_onnx_model(self, model_name: str, cache_dir: str):
+        """
+        Export the model to ONNX and dynamically quantize it to int8
+        
+        The quantized model and tokenizer are saved under cache_dir, so only
+        the first load pays for the export; later cold starts load them directly.
+        Requires the optional `optimum[onnxruntime]` package.
+        """
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+        
+        model_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+        quantized_dir = Path(cache_dir) / f"{model_id.replace('/', '_')}-onnx-int8"
+        quantized_file = "model_quantized.onnx"
+        
+        if not (quantized_dir / quantized_file).exists():
+            print("Exporting and quantizing ONNX model (first run only)...")
+            model = ORTModelForFeatureExtraction.from_pretrained(
+                model_id, export=True, provider="CPUExecutionProvider", cache_dir=cache_dir
+            )
+            quantizer = ORTQuantizer.from_pretrained(model)
+            # Dynamic int8 activations, per-channel int8 weights (VNNI GEMMs)
+            quantization_config = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=True)
+            quantizer.quantize(save_dir=quantized_dir, quantization_config=quantization_config)
+            AutoTokenizer.from_pretrained(model_id, cache_dir=cache_dir).save_pretrained(quantized_dir)
+        
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = EMBED_THREADS
+        session_options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            quantized_dir, file_name=quantized_file, provider="CPUExecutionProvider",
+            session_options=session_options
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(quantized_dir)
+    
+    def _encode_onnx(self, texts: List[str], batch_size: int, normalize: bool = True) -> np.ndarray:
+        """Mean-pooled (optionally L2-normalized) embeddings from the ONNX model"""
+        # Length-sort so each batch only pads to similarly sized texts
+        order = np.argsort([len(text) for text in texts])
+        embeddings = [None] * len(texts)
+        
+        for start in range(0, len(texts), batch_size):
+            batch_idx = order[start:start + batch_size]
+            inputs = self.tokenizer(
+                [texts[i] for i in batch_idx],
+                padding=True, truncation=True, max_length=256, return_tensors="np"
+            )
+            hidden = np.asarray(self.model(**inputs).last_hidden_state)
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            for i, vector in zip(batch_idx, pooled):
+                embeddings[i] = vector
+        
+        return np.stack(embeddings).astype(np.float32)
+    
+    def _encode(self, texts: List[str], batch_size: int = 64, normalize: bool = True) -> np.ndarray:
+        """Encode texts with whichever backend was loaded"""
+        if self.backend == "onnx":
+            return self._encode_onnx(texts, batch_size, normalize)
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=normalize,
+            show_progress_bar=False
+        )
+    
+    def generate_embeddings(self, texts: List[str], batch_size: int = 64, normalize: bool = True) -> np.ndarray:
         """
         Generate embeddings for a list of texts
         
+        SentenceTransformer.encode sorts the texts by length before batching
+        and restores the original order afterwards, so each batch only pads
+        to similarly sized texts.
+        
         Args:
             texts: List of text strings
-            
+            batch_size: Number of texts per forward pass
+            normalize: L2-normalize the embeddings
+        
         Returns:
-            List of embedding vectors
+            (len(texts), d) float32 array (rows in the same order as texts);
+            VectorDB converts to lists only where Chroma needs them
         """
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
-        return embeddings.tolist()
+        return self._encode(texts, batch_size=batch_size, normalize=normalize).astype(np.float32, copy=False)
     
-    def generate_embedding(self, text: str) -> List[float]:
+    def generate_embeddings_batched(self, texts: List[str], batch_size: int = 64, chunk_size: int = 1024, normalize: bool = True) -> Iterator[np.ndarray]:
+        """
+        Generate embeddings chunk by chunk without materializing them all
+        
+        Args:
+            texts: List of text strings
+            batch_size: Number of texts per forward pass
+            chunk_size: Number of texts per yielded block
+            normalize: L2-normalize the embeddings
+        
+        Returns:
+            Iterator of (<= chunk_size, d) arrays, in the same order as texts
+        """
+        for start in range(0, len(texts), chunk_size):
+            yield self._encode(texts[start:start + chunk_size], batch_size=batch_size, normalize=normalize)
+    
+    def generate_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text
         
         Args:
             text: Text string
-            
+        
         Returns:
-            Embedding vector
+            L2-normalized float32 vector of shape (d,); VectorDB converts it
+            to a list only where Chroma needs one
         """
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
+        return self._encode([text])[0].astype(np.float32, copy=False)
+
 
+class BatchingEmbedder:
+    """
+    Coalesce concurrent single-text embedding requests into batched forward passes
+    
+    Callers await embed(); a background task drains up to max_batch queued
+    texts (waiting at most wait_ms for more to arrive after the first) and
+    embeds them with one generate_embeddings call in a worker thread.
+    """
+    
+    def __init__(self, embedder: EmbeddingGenerator, max_batch: int = 32, wait_ms: float = 5):
+        """
+        Initialize the batching layer
+        
+        Args:
+            embedder: Embedding generator that does the actual encoding
+            max_batch: Maximum number of texts per forward pass
+            wait_ms: How long to wait for more texts once one has arrived
+        """
+        self.embedder = embedder
+        self.max_batch = max_batch
+        self.wait_seconds = wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def embed(self, text: str) -> np.ndarray:
+        """
+        Generate embedding for a single text, batched with concurrent callers
+        
+        Args:
+            text: Text string
+        
+        Returns:
+            Embedding vector (a row of the batch's embedding matrix)
+        """
+        if self._worker is None or self._worker.done():
+            # Created lazily so the queue belongs to the running event loop
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+    
+    async def _run(self):
+        """Drain the queue in batches forever"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.wait_seconds
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            texts = [text for text, _ in batch]
+            try:
+                # One forward pass for the whole batch
+                encode = functools.partial(self.embedder.generate_embeddings, texts, batch_size=len(texts))
+                embeddings = await loop.run_in_executor(None, encode)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
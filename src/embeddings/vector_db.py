@@ -3,21 +3,52 @@ Vector database operations using ChromaDB
 """
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
+import hashlib
+import numpy as np
+import orjson
+import os
+
+
+# Chunks per collection.add call: large enough to keep HNSW inserts
+# efficient, small enough to bound the Python lists Chroma needs
+ADD_BATCH_SIZE = 2048
+
+# List metadata is also stored element by element ({key}_0, {key}_1, ...)
+# so filters can match a single value; only this many elements are kept
+LIST_METADATA_MAX = 8
+
+# Storage formats for the in-memory matrix used by filtered searches
+QUANTIZATIONS = ("fp32", "fp16", "int8")
 
 
 class VectorDB:
     """Vector database for storing and retrieving course data"""
     
-    def __init__(self, db_path: str = "data/knowledge_base/chroma_db", collection_name: str = "nextleap_courses"):
+    def __init__(self, db_path: str = "data/knowledge_base/chroma_db", collection_name: str = "nextleap_courses", quantization: str = "fp16",
+                 m: int = 32, ef_construction: int = 200, ef_search: int = 80):
         """
         Initialize vector database
         
+        The HNSW parameters (and cosine space) only apply when the collection
+        is created; an existing collection keeps the ones it was built with,
+        so delete the chroma_db directory and rebuild the KB to change them.
+        
         Args:
             db_path: Path to store ChromaDB
             collection_name: Name of the collection
+            quantization: How the in-memory matrix for filtered searches is
+                stored: "fp32", "fp16" (half the RAM) or "int8" (a quarter,
+                per-vector scale)
+            m: HNSW graph degree (higher = better recall, more memory)
+            ef_construction: HNSW candidate list size while building
+            ef_search: HNSW candidate list size per query
         """
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization} (expected one of {QUANTIZATIONS})")
+        self.quantization = quantization
+        
         self.db_path = Path(db_path)
         self.db_path.mkdir(parents=True, exist_ok=True)
         
@@ -27,55 +58,355 @@ class VectorDB:
             settings=Settings(anonymized_telemetry=False)
         )
         
-        # Get or create collection
-        # Use get_or_create_collection which handles both cases
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
-            metadata={"description": "Nextleap course data"}
-        )
+        # Get or create collection. An existing collection is opened as is:
+        # passing new hnsw:* metadata to it would relabel the index without
+        # rebuilding it.
+        try:
+            self.collection = self.client.get_collection(name=collection_name)
+        except ValueError:
+            self.collection = self.client.create_collection(
+                name=collection_name,
+                metadata={
+                    "description": "Nextleap course data",
+                    "hnsw:space": "cosine",
+                    "hnsw:M": m,
+                    "hnsw:construction_ef": ef_construction,
+                    "hnsw:search_ef": ef_search,
+                    "hnsw:num_threads": os.cpu_count() or 1,
+                    # Persist the HNSW index in large steps instead of every
+                    # 1000 adds; the SQLite log stays the source of truth
+                    "hnsw:batch_size": 10000,
+                    "hnsw:sync_threshold": 100000
+                }
+            )
+        
+        # Inverted index over metadata (field -> value -> chunk ids) used for
+        # filtered searches instead of Chroma's where scan
+        self.inverted_index_path = self.db_path / "inverted_index.json"
+        self._inv = self._load_inverted_index()
+        
+        # Normalized (N, d) copy of the embeddings for equality-filtered
+        # searches, loaded on the first one and stored as self.quantization
+        # (int8 keeps per-row scales alongside). Unfiltered searches use
+        # Chroma's HNSW index and never load it
+        self._matrix = None
+        self._matrix_scales = None
+        self._matrix_ids = None
+        self._matrix_rows = None  # chunk id -> row in the matrix
+    
+    def finalize(self):
+        """
+        Flush state after a bulk load (add_chunks calls)
+        
+        Writes the inverted index and asks the Chroma client to persist if
+        its version still has an explicit persist(); newer PersistentClients
+        write through their own log and need nothing here.
+        """
+        if self._inv is not None:
+            self._save_inverted_index()
+        persist = getattr(self.client, "persist", None)
+        if persist is not None:
+            try:
+                persist()
+            except NotImplementedError:
+                pass
+    
+    def _load_inverted_index(self) -> Optional[Dict[str, Dict[str, set]]]:
+        """Load the metadata inverted index written by add_chunks, if any"""
+        self._inv_mtime = None  # mtime_ns of the file as last read/written
+        if not self.inverted_index_path.exists():
+            return None
+        try:
+            self._inv_mtime = self.inverted_index_path.stat().st_mtime_ns
+            data = orjson.loads(self.inverted_index_path.read_bytes())
+            return {field: {value: set(ids) for value, ids in values.items()} for field, values in data.items()}
+        except Exception as e:
+            print(f"Warning: Could not load inverted index: {e}")
+            return None
+    
+    def _save_inverted_index(self):
+        """Write the inverted index next to the Chroma database"""
+        data = {field: {value: sorted(ids) for value, ids in values.items()} for field, values in self._inv.items()}
+        self.inverted_index_path.write_bytes(orjson.dumps(data))
+        self._inv_mtime = self.inverted_index_path.stat().st_mtime_ns
+    
+    def _reload_if_rebuilt(self):
+        """
+        Drop the inverted index and matrix if the KB was rebuilt elsewhere
+        
+        Every add_chunks that changes the collection rewrites the inverted
+        index file, so a changed mtime means another VectorDB (e.g.
+        build_kb.py under a running server) has changed the collection.
+        """
+        try:
+            mtime = self.inverted_index_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._inv_mtime:
+            self._inv = self._load_inverted_index()
+            self._matrix, self._matrix_scales, self._matrix_ids, self._matrix_rows = None, None, None, None
+    
+    @staticmethod
+    def _index_metadata(inv: Dict[str, Dict[str, set]], chunk_ids: List[str], metadatas: List[Dict]):
+        """Add each chunk id under every (field, value) of its metadata"""
+        for chunk_id, metadata in zip(chunk_ids, metadatas):
+            for field, value in metadata.items():
+                inv.setdefault(field, {}).setdefault(str(value), set()).add(chunk_id)
+    
+    def _get_inverted_index(self) -> Dict[str, Dict[str, set]]:
+        """Return the inverted index, building it from the collection if there is no sidecar"""
+        if self._inv is None:
+            stored = self.collection.get(include=["metadatas"])
+            inv = {}
+            self._index_metadata(inv, stored["ids"], stored["metadatas"])
+            self._inv = inv
+            if stored["ids"]:
+                self._save_inverted_index()
+        return self._inv
+    
+    def _filter_candidates(self, filter_dict: Dict) -> Optional[set]:
+        """
+        Chunk ids matching an equality filter, by intersecting inverted-index sets
+        
+        Args:
+            filter_dict: Metadata filter ({field: value, ...})
+            
+        Returns:
+            Set of matching ids, or None if the filter uses Chroma operators
+            (e.g. $and, $in) that the inverted index doesn't handle
+        """
+        if any(field.startswith("$") or isinstance(value, dict) for field, value in filter_dict.items()):
+            return None
+        inv = self._get_inverted_index()
+        sets = []
+        for field, value in filter_dict.items():
+            value = str(value)
+            # A list field matches if the value is any one of its elements
+            matches = set(inv.get(field, {}).get(value, ()))
+            for i in range(LIST_METADATA_MAX):
+                matches.update(inv.get(f"{field}_{i}", {}).get(value, ()))
+            sets.append(matches)
+        sets.sort(key=len)
+        return set.intersection(*sets) if sets else set()
+    
+    def _chroma_where(self, filter_dict: Dict) -> Dict:
+        """
+        Rewrite equality conditions on list fields for Chroma's where
+        
+        {"emi_options": v} becomes {"$or": [{"emi_options": v},
+        {"emi_options_0": v}, ...]} so it matches a single element;
+        several conditions are combined with $and.
+        """
+        if any(field.startswith("$") or isinstance(value, dict) for field, value in filter_dict.items()):
+            return filter_dict
+        inv = self._get_inverted_index()
+        conditions = []
+        for field, value in filter_dict.items():
+            element_fields = [f"{field}_{i}" for i in range(LIST_METADATA_MAX) if f"{field}_{i}" in inv]
+            if element_fields and isinstance(value, str):
+                conditions.append({"$or": [{name: value} for name in [field] + element_fields]})
+            else:
+                conditions.append({field: value})
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+    
+    def _search_candidates(self, query_embedding: List[float], n_results: int, candidates: set) -> Dict:
+        """Exact cosine-similarity search restricted to the candidate chunk ids"""
+        rows = np.array(sorted(self._matrix_rows[chunk_id] for chunk_id in candidates if chunk_id in self._matrix_rows), dtype=np.int64)
+        if len(rows) == 0:
+            return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+        
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scales = self._matrix_scales[rows] if self._matrix_scales is not None else None
+        scores = self._decode(self._matrix[rows], scales) @ query
+        
+        k = min(n_results, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top_ids = [str(i) for i in self._matrix_ids[rows[top]]]
+        return self._results_for_ids(top_ids, scores[top])
     
-    def add_chunks(self, chunks: List[Dict], embeddings: List[List[float]]):
+    def _encode(self, matrix: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Convert a normalized float32 matrix to the configured storage format
+        
+        Args:
+            matrix: (N, d) float32 array with unit-length rows
+            
+        Returns:
+            (stored matrix, per-row scales or None)
+        """
+        if self.quantization == "fp16":
+            return matrix.astype(np.float16), None
+        if self.quantization == "int8":
+            scales = 127.0 / np.clip(np.abs(matrix).max(axis=1), 1e-12, None)
+            codes = np.round(matrix * scales[:, None]).astype(np.int8)
+            return codes, scales.astype(np.float32)
+        return matrix, None
+    
+    @staticmethod
+    def _decode(block: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+        """Convert rows of the stored matrix back to float32"""
+        block = block.astype(np.float32, copy=False)
+        if scales is not None:
+            block = block / scales[:, None]
+        return block
+    
+    def _load_matrix(self) -> bool:
+        """
+        Read all embeddings from Chroma into one contiguous, L2-normalized matrix
+        
+        Returns:
+            True if the matrix is available
+        """
+        if self._matrix is not None:
+            return True
+        stored = self.collection.get(include=["embeddings"])
+        if not stored["ids"]:
+            # Don't cache an empty matrix; the KB may be built later
+            return False
+        matrix = np.ascontiguousarray(stored["embeddings"], dtype=np.float32)
+        matrix /= np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+        self._matrix, self._matrix_scales = self._encode(matrix)
+        self._matrix_ids = np.array(stored["ids"])
+        self._matrix_rows = {chunk_id: row for row, chunk_id in enumerate(stored["ids"])}
+        return True
+    
+    @staticmethod
+    def chunk_id(chunk: Dict) -> str:
+        """Stable id for a chunk: a hash of its content and source URL"""
+        key = chunk["content"] + chunk.get("metadata", {}).get("source_url", "")
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()
+    
+    def existing_ids(self, ids: List[str]) -> set:
+        """Return the subset of ids already stored in the collection"""
+        existing = set()
+        for start in range(0, len(ids), ADD_BATCH_SIZE):
+            existing.update(self.collection.get(ids=ids[start:start + ADD_BATCH_SIZE], include=[])["ids"])
+        return existing
+    
+    def add_chunks(self, chunks: List[Dict], embeddings: np.ndarray, replace: bool = False, overwrite: bool = False) -> List[str]:
         """
         Add chunks with embeddings to the database
         
+        Chunks are keyed by content hash (see chunk_id), so adding the same
+        content again is a no-op: only chunks whose id isn't stored yet are
+        written to Chroma.
+        
         Args:
             chunks: List of chunk dictionaries with content and metadata
-            embeddings: List of embedding vectors
+            embeddings: (len(chunks), d) float32 array (lists are converted)
+            replace: Also delete stored chunks that aren't in chunks (a full rebuild)
+            overwrite: Also rewrite chunks that are already stored, e.g. when
+                their embeddings came from a different model
+            
+        Returns:
+            Chunk ids, one per distinct chunk, in input order
         """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
         if len(chunks) != len(embeddings):
             raise ValueError("Number of chunks must match number of embeddings")
+        if len(chunks) and embeddings.ndim != 2:
+            raise ValueError(f"Expected a 2-D embeddings array, got shape {embeddings.shape}")
+        
+        # Prepare data for ChromaDB; identical chunks (same id) are stored once
+        positions = {}
+        for i, chunk in enumerate(chunks):
+            positions.setdefault(self.chunk_id(chunk), i)
+        all_ids = list(positions)
+        
+        if replace:
+            stale = [chunk_id for chunk_id in self.collection.get(include=[])["ids"] if chunk_id not in positions]
+            for start in range(0, len(stale), ADD_BATCH_SIZE):
+                self.collection.delete(ids=stale[start:start + ADD_BATCH_SIZE])
+            if stale:
+                print(f"Removed {len(stale)} stale chunks from vector database")
+                self._inv = None  # rebuilt from the collection below
         
-        # Prepare data for ChromaDB
-        ids = [f"chunk_{i}" for i in range(len(chunks))]
-        documents = [chunk["content"] for chunk in chunks]
+        existing = set() if overwrite else self.existing_ids(all_ids)
+        ids = [chunk_id for chunk_id in all_ids if chunk_id not in existing]
+        rows = [positions[chunk_id] for chunk_id in ids]
+        documents = [chunks[i]["content"] for i in rows]
         metadatas = []
         
-        for chunk in chunks:
+        for chunk in (chunks[i] for i in rows):
             metadata = chunk.get("metadata", {}).copy()
             # ChromaDB requires metadata values to be strings, numbers, or bools
-            # Convert lists to strings
-            for key, value in metadata.items():
+            # Convert lists to a display string plus one key per element
+            for key, value in list(metadata.items()):
                 if isinstance(value, list):
                     metadata[key] = ", ".join(str(v) for v in value)
+                    for i, element in enumerate(value[:LIST_METADATA_MAX]):
+                        metadata[f"{key}_{i}"] = str(element)
                 elif value is None:
                     metadata[key] = ""
             
             metadatas.append(metadata)
         
-        # Add to collection
-        self.collection.add(
-            ids=ids,
-            embeddings=embeddings,
-            documents=documents,
-            metadatas=metadatas
-        )
+        # Add to collection in fixed-size batches; Chroma only accepts plain
+        # lists, so only one batch at a time is converted from the array
+        embeddings = embeddings[rows]
+        for start in range(0, len(ids), ADD_BATCH_SIZE):
+            end = start + ADD_BATCH_SIZE
+            self.collection.upsert(
+                ids=ids[start:end],
+                embeddings=embeddings[start:end].tolist(),
+                documents=documents[start:end],
+                metadatas=metadatas[start:end]
+            )
+        
+        print(f"Added {len(ids)} chunks to vector database ({len(existing)} already stored)")
+        if not ids and not (replace and self._inv is None):
+            return all_ids
+        self._matrix, self._matrix_scales, self._matrix_ids, self._matrix_rows = None, None, None, None
         
-        print(f"Added {len(chunks)} chunks to vector database")
+        # Index the new metadata for filtered searches
+        if self._inv is None and self.collection.count() > len(ids):
+            self._get_inverted_index()  # also covers this batch (already in Chroma)
+        else:
+            if self._inv is None:
+                self._inv = {}
+            self._index_metadata(self._inv, ids, metadatas)
+            self._save_inverted_index()
+        
+        return all_ids
+    
+    def _results_for_ids(self, top_ids: List[str], scores: np.ndarray) -> Dict:
+        """Fetch documents/metadata for ranked ids and shape them like a Chroma query result"""
+        stored = self.collection.get(ids=top_ids, include=["documents", "metadatas"])
+        by_id = {
+            chunk_id: (doc, meta)
+            for chunk_id, doc, meta in zip(stored["ids"], stored["documents"], stored["metadatas"])
+        }
+        found = [(chunk_id, score) for chunk_id, score in zip(top_ids, scores) if chunk_id in by_id]
+        
+        return {
+            "ids": [[chunk_id for chunk_id, _ in found]],
+            "documents": [[by_id[chunk_id][0] for chunk_id, _ in found]],
+            "metadatas": [[by_id[chunk_id][1] for chunk_id, _ in found]],
+            "distances": [[self._distance_from_similarity(score) for _, score in found]]
+        }
+    
+    def _distance_from_similarity(self, score: float) -> float:
+        """
+        Convert a cosine similarity into the collection's distance space
+        
+        Keeps distances comparable with Chroma's own query results (squared
+        L2 by default, which is 2 - 2cos for normalized vectors).
+        """
+        space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+        if space == "l2":
+            return float(2 - 2 * score)
+        return float(1 - score)
     
     def search(self, query_embedding: List[float], n_results: int = 5, filter_dict: Optional[Dict] = None) -> Dict:
         """
         Search for similar chunks
         
+        Unfiltered searches go to Chroma's HNSW index. Equality filters are
+        resolved through the inverted index and only the matching rows are
+        scored exactly; other filters use Chroma's where.
+        
         Args:
             query_embedding: Query embedding vector
             n_results: Number of results to return
@@ -84,10 +415,17 @@ class VectorDB:
         Returns:
             Dictionary with results
         """
-        where = filter_dict if filter_dict else None
+        if filter_dict:
+            self._reload_if_rebuilt()
+            # Equality filters: intersect inverted-index sets, then score only those rows
+            candidates = self._filter_candidates(filter_dict)
+            if candidates is not None and self._load_matrix():
+                return self._search_candidates(query_embedding, n_results, candidates)
+        
+        where = self._chroma_where(filter_dict) if filter_dict else None
         
         results = self.collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=[np.asarray(query_embedding, dtype=np.float32).tolist()],
             n_results=n_results,
             where=where
         )
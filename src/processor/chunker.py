@@ -2,8 +2,20 @@
 Text chunker for Nextleap course data
 Splits course data into searchable chunks with metadata
 """
-from typing import List, Dict
-import json
+from typing import Iterator, List, Dict, Tuple
+from itertools import chain
+import re
+
+from src.processor.utils import dig
+
+
+# Runs of spaces/tabs (scraped text is full of them); newlines are kept
+_HORIZONTAL_WS = re.compile(r"[ \t\r\f\v\u00a0]+")
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse horizontal whitespace runs and strip each line"""
+    return "\n".join(line.strip() for line in _HORIZONTAL_WS.sub(" ", text).split("\n"))
 
 
 class CourseChunker:
@@ -20,49 +32,68 @@ class CourseChunker:
         self.chunk_size = chunk_size
         self.overlap = overlap
     
-    def chunk_course_data(self, course_data: Dict) -> List[Dict]:
+    def _windows(self, text: str) -> Iterator[Tuple[int, str]]:
+        """
+        Split long text into overlapping windows of chunk_size characters
+        
+        Windows start every chunk_size - overlap characters; text that fits
+        in one chunk comes back whole.
+        
+        Args:
+            text: Text to split
+            
+        Returns:
+            Iterator of (start offset, window text)
+        """
+        size = self.chunk_size
+        stride = max(1, size - self.overlap)
+        for start in range(0, max(1, len(text) - size + stride), stride):
+            yield start, text[start:start + size]
+    
+    def chunk_course_data(self, course_data: Dict) -> Iterator[Dict]:
         """
         Chunk a single course's data into searchable pieces
         
+        Content is whitespace-normalized as each chunk is yielded, so the
+        tokenizer sees shorter strings and the build_kb embedding cache isn't
+        invalidated by whitespace-only changes.
+        
         Args:
             course_data: Single course data dictionary
             
         Returns:
-            List of chunks with metadata
+            Iterator of chunks with metadata
         """
-        chunks = []
         source_url = course_data.get("source_url", "")
-        cohort_name = course_data.get("cohort", {}).get("cohort_name", "Unknown")
-        
-        # Chunk 1: Cohort Information
         cohort = course_data.get("cohort", {})
-        cohort_text = f"Cohort: {cohort.get('cohort_name', '')}\n"
-        cohort_text += f"Description: {cohort.get('cohort_description', '')}"
-        
-        if cohort_text.strip():
-            chunks.append({
-                "content": cohort_text.strip(),
-                "metadata": {
-                    "type": "cohort",
-                    "cohort_name": cohort_name,
-                    "source_url": source_url,
-                    "field": "cohort_info"
-                }
-            })
+        cohort_name = dig(cohort, "cohort_name", default="Unknown")
+        
+        # Chunk 1: Cohort Information (always has at least the two labels)
+        cohort_text = f"Cohort: {cohort.get('cohort_name', '')}\nDescription: {cohort.get('cohort_description', '')}"
+        yield {
+            "content": normalize_whitespace(cohort_text.strip()),
+            "metadata": {
+                "type": "cohort",
+                "cohort_name": cohort_name,
+                "source_url": source_url,
+                "field": "cohort_info"
+            }
+        }
         
         # Chunk 2: Batch Information
         batch = course_data.get("batch", {})
-        batch_text = f"Batch Information for {cohort_name}:\n"
+        batch_lines = [f"Batch Information for {cohort_name}:"]
         if batch.get("batch_start_date"):
-            batch_text += f"Start Date: {batch.get('batch_start_date')}\n"
+            batch_lines.append(f"Start Date: {batch['batch_start_date']}")
         if batch.get("cost"):
-            batch_text += f"Cost: {batch.get('cost')}\n"
+            batch_lines.append(f"Cost: {batch['cost']}")
         if batch.get("course_type"):
-            batch_text += f"Course Type: {batch.get('course_type')}"
+            batch_lines.append(f"Course Type: {batch['course_type']}")
         
-        if batch_text.strip() and len(batch_text.strip()) > len(f"Batch Information for {cohort_name}:\n"):
-            chunks.append({
-                "content": batch_text.strip(),
+        # Only worth a chunk if there is something besides the header
+        if len(batch_lines) > 1:
+            yield {
+                "content": normalize_whitespace("\n".join(batch_lines).strip()),
                 "metadata": {
                     "type": "batch",
                     "cohort_name": cohort_name,
@@ -72,45 +103,46 @@ class CourseChunker:
                     "batch_start_date": batch.get("batch_start_date"),
                     "course_type": batch.get("course_type")
                 }
-            })
+            }
         
         # Chunk for Payment Options (after batch chunk)
         payment_options = course_data.get("payment_options", {})
-        if payment_options.get("emi_options"):
-            payment_text = f"Payment Options for {cohort_name}:\n"
-            payment_text += "EMI Options:\n"
-            for emi in payment_options["emi_options"]:
-                payment_text += f"- {emi}\n"
-            
-            if payment_text.strip():
-                chunks.append({
-                    "content": payment_text.strip(),
-                    "metadata": {
-                        "type": "payment",
-                        "cohort_name": cohort_name,
-                        "source_url": source_url,
-                        "field": "payment_options",
-                        "emi_options": payment_options.get("emi_options", [])
-                    }
-                })
+        emi_options = payment_options.get("emi_options")
+        if emi_options:
+            payment_lines = [f"Payment Options for {cohort_name}:", "EMI Options:"]
+            payment_lines.extend(f"- {emi}" for emi in emi_options)
+            yield {
+                "content": normalize_whitespace("\n".join(payment_lines).strip()),
+                "metadata": {
+                    "type": "payment",
+                    "cohort_name": cohort_name,
+                    "source_url": source_url,
+                    "field": "payment_options",
+                    "emi_options": emi_options
+                }
+            }
         
         # Chunk 3: Curriculum (split into multiple chunks if needed)
         curriculum = course_data.get("curriculum", {})
         curriculum_items = curriculum.get("curriculum", [])
         
         if curriculum_items:
-            # Create one chunk per curriculum item for better searchability
+            # Create one chunk per curriculum item for better searchability;
+            # the keys shared by every item are built once
+            base_metadata = {
+                "type": "curriculum",
+                "cohort_name": cohort_name,
+                "source_url": source_url,
+                "field": "curriculum"
+            }
+            prefix = f"Curriculum for {cohort_name}: "
             for idx, item in enumerate(curriculum_items):
-                chunks.append({
-                    "content": f"Curriculum for {cohort_name}: {item}",
-                    "metadata": {
-                        "type": "curriculum",
-                        "cohort_name": cohort_name,
-                        "source_url": source_url,
-                        "field": "curriculum",
-                        "item_index": idx
+                # Long items are split into overlapping windows
+                for start, window in self._windows(normalize_whitespace(str(item))):
+                    yield {
+                        "content": normalize_whitespace(prefix + window),
+                        "metadata": {**base_metadata, "item_index": idx, "window_start": start}
                     }
-                })
         
         # Chunk 4: Mentors/Instructors
         mentors = course_data.get("mentors_instructors", {})
@@ -118,14 +150,14 @@ class CourseChunker:
         mentors_list = mentors.get("mentors", [])
         
         if instructors_list or mentors_list:
-            mentors_text = f"Instructors and Mentors for {cohort_name}:\n"
+            mentors_lines = [f"Instructors and Mentors for {cohort_name}:"]
             if instructors_list:
-                mentors_text += f"Instructors: {', '.join(instructors_list)}\n"
+                mentors_lines.append(f"Instructors: {', '.join(instructors_list)}")
             if mentors_list:
-                mentors_text += f"Mentors: {', '.join(mentors_list)}"
+                mentors_lines.append(f"Mentors: {', '.join(mentors_list)}")
             
-            chunks.append({
-                "content": mentors_text.strip(),
+            yield {
+                "content": normalize_whitespace("\n".join(mentors_lines).strip()),
                 "metadata": {
                     "type": "mentors_instructors",
                     "cohort_name": cohort_name,
@@ -134,40 +166,43 @@ class CourseChunker:
                     "instructors": instructors_list,
                     "mentors": mentors_list
                 }
-            })
+            }
         
         # Chunk 5: Placements
         placements = course_data.get("placements", {})
         placement_text = placements.get("placement_text")
         
         if placement_text:
-            chunks.append({
-                "content": f"Placement Information for {cohort_name}: {placement_text}",
-                "metadata": {
-                    "type": "placements",
-                    "cohort_name": cohort_name,
-                    "source_url": source_url,
-                    "field": "placements"
+            for start, window in self._windows(normalize_whitespace(placement_text)):
+                yield {
+                    "content": normalize_whitespace(f"Placement Information for {cohort_name}: {window}"),
+                    "metadata": {
+                        "type": "placements",
+                        "cohort_name": cohort_name,
+                        "source_url": source_url,
+                        "field": "placements",
+                        "window_start": start
+                    }
                 }
-            })
         
         # Chunk 6: Reviews
         reviews = course_data.get("reviews", {})
         reviews_list = reviews.get("reviews", [])
         
         if reviews_list:
-            reviews_text = "\n".join(reviews_list[:3])  # Limit to first 3 reviews
-            chunks.append({
-                "content": f"Reviews for {cohort_name}: {reviews_text}",
-                "metadata": {
-                    "type": "reviews",
-                    "cohort_name": cohort_name,
-                    "source_url": source_url,
-                    "field": "reviews"
+            # All reviews, windowed, rather than only the first 3
+            reviews_text = normalize_whitespace("\n".join(reviews_list))
+            for start, window in self._windows(reviews_text):
+                yield {
+                    "content": normalize_whitespace(f"Reviews for {cohort_name}: {window}"),
+                    "metadata": {
+                        "type": "reviews",
+                        "cohort_name": cohort_name,
+                        "source_url": source_url,
+                        "field": "reviews",
+                        "window_start": start
+                    }
                 }
-            })
-        
-        return chunks
     
     def chunk_all_courses(self, courses_data: List[Dict]) -> List[Dict]:
         """
@@ -179,11 +214,25 @@ class CourseChunker:
         Returns:
             List of all chunks with metadata
         """
+        return list(chain.from_iterable(map(self.chunk_course_data, courses_data)))
+    
+    def chunk_all_courses_with_texts(self, courses_data: List[Dict]) -> Tuple[List[Dict], List[str]]:
+        """
+        Chunk all courses data and collect chunk contents in the same pass
+        
+        Args:
+            courses_data: List of course data dictionaries
+            
+        Returns:
+            (chunks, texts) where texts[i] is chunks[i]["content"]
+        """
         all_chunks = []
+        all_texts = []
         
         for course in courses_data:
-            chunks = self.chunk_course_data(course)
-            all_chunks.extend(chunks)
+            for chunk in self.chunk_course_data(course):
+                all_chunks.append(chunk)
+                all_texts.append(chunk["content"])
         
-        return all_chunks
+        return all_chunks, all_texts
 
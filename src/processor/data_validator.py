@@ -2,9 +2,10 @@
 Data validator to ensure consistency between scraped data and website
 """
 from typing import Dict, List
-import json
 from datetime import datetime
 
+from src.processor.utils import dig
+
 
 class DataValidator:
     """Validate and ensure data consistency"""
@@ -24,7 +25,7 @@ class DataValidator:
         url = course_data.get("source_url", "unknown")
         
         # Check required fields
-        if not course_data.get("cohort", {}).get("cohort_name"):
+        if not dig(course_data, "cohort", "cohort_name"):
             issues.append(f"Missing cohort name for {url}")
         
         # Validate batch information
@@ -77,17 +78,18 @@ class DataValidator:
             List of consistency issues
         """
         issues = []
-        
-        # Check for duplicate URLs
-        urls = [c.get("source_url") for c in courses]
-        if len(urls) != len(set(urls)):
-            issues.append("Duplicate URLs found in course data")
-        
-        # Check for courses with same name but different data
+        seen_urls = set()
         cohort_names = {}
+        
+        # One pass: duplicate URLs, and courses with same name but different data
         for course in courses:
-            name = course.get("cohort", {}).get("cohort_name")
             url = course.get("source_url")
+            if url in seen_urls:
+                issues.append(f"Duplicate URL: {url}")
+            else:
+                seen_urls.add(url)
+            
+            name = dig(course, "cohort", "cohort_name")
             if name in cohort_names:
                 if cohort_names[name] != url:
                     issues.append(f"Duplicate cohort name '{name}' with different URLs")
@@ -0,0 +1,25 @@
+"""
+Small helpers shared by the chunker and the validators
+"""
+from typing import Any, Dict
+
+
+def dig(data: Dict, *keys: str, default: Any = None) -> Any:
+    """
+    Look up a nested value, e.g. dig(course, "cohort", "cohort_name")
+    
+    Args:
+        data: Dictionary to start from
+        *keys: Keys to follow, outermost first
+        default: Returned when a key is missing, a level isn't a dict, or the value is None
+    
+    Returns:
+        The nested value or default
+    """
+    for key in keys:
+        if not isinstance(data, dict):
+            return default
+        data = data.get(key)
+        if data is None:
+            return default
+    return data
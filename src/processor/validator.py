@@ -3,15 +3,37 @@ Data validator for scraped Nextleap data
 Ensures data quality and URL validation
 """
 from typing import Dict, List, Optional
-from urllib.parse import urlparse
 import re
 
+from src.processor.utils import dig
+
+
+# Generic taglines that get scraped instead of a real course name, compiled
+# once into a single alternation instead of searching pattern by pattern
+INVALID_COHORT_NAME_PATTERN = re.compile(
+    "|".join([
+        "learning is now",
+        "invite-only",
+        "nextleap is",
+        "accelerate your career",
+        "^[-\\s]+$"  # Only dashes or spaces
+    ]),
+    re.IGNORECASE
+)
+
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+VALID_SCHEMES = frozenset(['http', 'https'])
+
 
 class DataValidator:
     """Validates scraped data"""
     
     def __init__(self):
-        self.valid_domains = ['nextleap.app', 'www.nextleap.app']
+        self.valid_domains = frozenset(['nextleap.app', 'www.nextleap.app'])
+        # Every scheme/domain combination, so validate_url is one startswith call
+        self._url_prefixes = tuple(
+            f"{scheme}://{domain}/" for scheme in sorted(VALID_SCHEMES) for domain in sorted(self.valid_domains)
+        )
     
     def validate_url(self, url: str) -> bool:
         """
@@ -20,35 +42,25 @@ class DataValidator:
         if not url or not isinstance(url, str):
             return False
         
-        try:
-            parsed = urlparse(url)
-            
-            # Check domain
-            if parsed.netloc not in self.valid_domains:
-                return False
-            
-            # Check scheme
-            if parsed.scheme not in ['http', 'https']:
-                return False
-            
-            # Check if URL is not empty
-            if not parsed.path or parsed.path == '/':
-                return False
-            
-            return True
-        except Exception:
+        # Check scheme and domain
+        if not url.startswith(self._url_prefixes):
             return False
+        
+        # Check that there is a path after the domain (not just "/", "/?..." or "/#...")
+        rest = url[url.index("/", url.index("//") + 2) + 1:]
+        return bool(rest) and rest[0] not in "?#"
     
     def validate_course_data(self, data: Dict) -> Dict:
         """
         Validate and clean course data
-        Returns validated data with validation status
+        Returns validated data with validation status (the data is only
+        copied for valid courses; invalid ones get the input back as is)
         """
         validation_result = {
             "is_valid": True,
             "errors": [],
             "warnings": [],
-            "data": data.copy()
+            "data": data
         }
         
         # Validate source URL
@@ -57,35 +69,21 @@ class DataValidator:
             validation_result["is_valid"] = False
             validation_result["errors"].append("Invalid or missing source_url")
             return validation_result
-        else:
-            validation_result["data"]["source_url"] = source_url
         
         # Validate cohort data - must have a valid course name
-        cohort = data.get("cohort", {})
-        cohort_name = cohort.get("cohort_name", "").strip()
+        cohort_name = dig(data, "cohort", "cohort_name", default="").strip()
         
         # Check for invalid course names (generic taglines, etc.)
-        invalid_patterns = [
-            "learning is now",
-            "invite-only",
-            "nextleap is",
-            "accelerate your career",
-            "^[-\\s]+$"  # Only dashes or spaces
-        ]
-        
         is_invalid_name = False
         if not cohort_name:
             validation_result["is_valid"] = False
             validation_result["errors"].append("Missing cohort name")
             is_invalid_name = True
         else:
-            cohort_lower = cohort_name.lower()
-            for pattern in invalid_patterns:
-                if re.search(pattern, cohort_lower, re.IGNORECASE):
-                    validation_result["is_valid"] = False
-                    validation_result["errors"].append(f"Invalid cohort name: '{cohort_name}' (appears to be a generic tagline)")
-                    is_invalid_name = True
-                    break
+            if INVALID_COHORT_NAME_PATTERN.search(cohort_name):
+                validation_result["is_valid"] = False
+                validation_result["errors"].append(f"Invalid cohort name: '{cohort_name}' (appears to be a generic tagline)")
+                is_invalid_name = True
         
         # Validate curriculum - must have curriculum content
         curriculum = data.get("curriculum", {})
@@ -112,11 +110,15 @@ class DataValidator:
         if not batch.get("cost"):
             validation_result["warnings"].append("Missing cost information")
         
+        # Invalid courses are dropped, so don't copy them
+        if not validation_result["is_valid"]:
+            return validation_result
+        
         # Ensure all nested dicts have source_url
+        validated = validation_result["data"] = data.copy()
         for key in ["cohort", "batch", "curriculum", "mentors_instructors", "placements", "reviews"]:
-            if key in validation_result["data"]:
-                if isinstance(validation_result["data"][key], dict):
-                    validation_result["data"][key]["source_url"] = source_url
+            if isinstance(validated.get(key), dict):
+                validated[key]["source_url"] = source_url
         
         return validation_result
     
@@ -128,7 +130,7 @@ class DataValidator:
             return None
         
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_PATTERN.sub(' ', text)
         text = text.strip()
         
         # Remove empty strings
@@ -137,6 +139,12 @@ class DataValidator:
         
         return text
     
+    def _clean_list(self, items: List[str]) -> List[str]:
+        """
+        Clean each item once, dropping the ones that end up empty
+        """
+        return [cleaned for cleaned in map(self.clean_text, items) if cleaned]
+    
     def validate_all_courses(self, courses_data: List[Dict]) -> List[Dict]:
         """
         Validate all course data
@@ -177,20 +185,14 @@ class DataValidator:
         if "curriculum" in data:
             curriculum = data["curriculum"]
             if isinstance(curriculum.get("curriculum"), list):
-                curriculum["curriculum"] = [
-                    self.clean_text(item) for item in curriculum["curriculum"]
-                    if self.clean_text(item)
-                ]
+                curriculum["curriculum"] = self._clean_list(curriculum["curriculum"])
             curriculum["curriculum_text"] = self.clean_text(curriculum.get("curriculum_text"))
         
         # Clean mentors
         if "mentors_instructors" in data:
             mentors = data["mentors_instructors"]
             if isinstance(mentors.get("mentors"), list):
-                mentors["mentors"] = [
-                    self.clean_text(item) for item in mentors["mentors"]
-                    if self.clean_text(item)
-                ]
+                mentors["mentors"] = self._clean_list(mentors["mentors"])
             mentors["mentors_text"] = self.clean_text(mentors.get("mentors_text"))
         
         # Clean placements
@@ -202,9 +204,6 @@ class DataValidator:
         if "reviews" in data:
             reviews = data["reviews"]
             if isinstance(reviews.get("reviews"), list):
-                reviews["reviews"] = [
-                    self.clean_text(item) for item in reviews["reviews"]
-                    if self.clean_text(item)
-                ]
+                reviews["reviews"] = self._clean_list(reviews["reviews"])
             reviews["reviews_text"] = self.clean_text(reviews.get("reviews_text"))
 
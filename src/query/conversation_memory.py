@@ -3,22 +3,138 @@ Conversation memory manager for chatbot
 Maintains conversation history for context-aware responses
 """
 from typing import List, Dict, Optional
-from collections import deque
+from collections import OrderedDict, deque
 from datetime import datetime
+from itertools import islice
+from pathlib import Path
+import orjson
+import sqlite3
+import threading
+import time
+
+
+# Display names for the roles we store, so the prompt builder doesn't
+# capitalize() on every message
+_ROLE_LABELS = {"user": "User", "assistant": "Assistant", "system": "System"}
+
+
+def _render(message: Dict) -> str:
+    """A message as one line of LLM conversation context"""
+    role = message["role"]
+    return f"{_ROLE_LABELS.get(role) or role.capitalize()}: {message['content']}"
+
+
+class _SQLiteStore:
+    """
+    Conversation messages in a SQLite file, shared by every worker process
+    
+    Keeps the same sliding-window (max_messages) and LRU (max_sessions)
+    limits as the in-process store.
+    """
+    
+    def __init__(self, path: str, max_messages: int, max_sessions: int):
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                meta TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions (last_used);
+        """)
+    
+    def add(self, session_id: str, message: Dict):
+        """Append a message, trimming the session to max_messages and the store to max_sessions"""
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT INTO sessions (session_id, last_used) VALUES (?, ?) "
+                    "ON CONFLICT(session_id) DO UPDATE SET last_used = excluded.last_used",
+                    (session_id, time.time())
+                )
+                conn.execute(
+                    "INSERT INTO messages (session_id, role, content, timestamp, meta) VALUES (?, ?, ?, ?, ?)",
+                    (session_id, message["role"], message["content"], message["timestamp"],
+                     orjson.dumps(message["metadata"]).decode())
+                )
+                conn.execute(
+                    "DELETE FROM messages WHERE session_id = ? AND id <= ("
+                    "SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (session_id, session_id, self.max_messages)
+                )
+                (count,) = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+                if count > self.max_sessions:
+                    stale = [row[0] for row in conn.execute(
+                        "SELECT session_id FROM sessions ORDER BY last_used LIMIT ?", (count - self.max_sessions,)
+                    )]
+                    conn.executemany("DELETE FROM messages WHERE session_id = ?", [(s,) for s in stale])
+                    conn.executemany("DELETE FROM sessions WHERE session_id = ?", [(s,) for s in stale])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def history(self, session_id: str, last_n: Optional[int] = None) -> List[Dict]:
+        """Return the session's messages, oldest first (only the last last_n if given)"""
+        limit = last_n if last_n else self.max_messages
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content, timestamp, meta FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                (session_id, limit)
+            ).fetchall()
+        return [
+            {"role": role, "content": content, "timestamp": timestamp, "metadata": orjson.loads(meta)}
+            for role, content, timestamp, meta in reversed(rows)
+        ]
+    
+    def clear(self, session_id: str):
+        """Delete a session and its messages"""
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
 
 
 class ConversationMemory:
     """Manages conversation history with a sliding window"""
     
-    def __init__(self, max_messages: int = 20):
+    def __init__(self, max_messages: int = 20, max_sessions: int = 10000, path: Optional[str] = None):
         """
         Initialize conversation memory
         
         Args:
-            max_messages: Maximum number of messages to remember
+            max_messages: Maximum number of messages to remember per session
+            max_sessions: Maximum number of sessions to keep; the least
+                recently used session is dropped when a new one starts
+            path: Optional SQLite file to keep history in, so separate worker
+                processes see the same conversations (None = in-process only)
         """
         self.max_messages = max_messages
-        self.conversations = {}  # session_id -> deque of messages
+        self.max_sessions = max_sessions
+        self.conversations = OrderedDict()  # session_id -> deque of messages, LRU order
+        # session_id -> [deque of rendered lines, joined context or None];
+        # kept in step with conversations so get_conversation_context
+        # doesn't re-render the whole history every turn
+        self._rendered = {}
+        # Guards conversations and _rendered; callers come from the threadpool
+        # and from several requests' worker threads at once
+        self._lock = threading.Lock()
+        self._store = _SQLiteStore(path, max_messages, max_sessions) if path else None
     
     def add_message(self, session_id: str, role: str, content: str, metadata: Optional[Dict] = None):
         """
@@ -30,9 +146,6 @@ class ConversationMemory:
             content: Message content
             metadata: Optional metadata (source_url, etc.)
         """
-        if session_id not in self.conversations:
-            self.conversations[session_id] = deque(maxlen=self.max_messages)
-        
         message = {
             "role": role,
             "content": content,
@@ -40,7 +153,25 @@ class ConversationMemory:
             "metadata": metadata or {}
         }
         
-        self.conversations[session_id].append(message)
+        if self._store is not None:
+            self._store.add(session_id, message)
+            return
+        
+        line = _render(message)
+        with self._lock:
+            if session_id in self.conversations:
+                self.conversations.move_to_end(session_id)
+            else:
+                while len(self.conversations) >= self.max_sessions:
+                    evicted, _ = self.conversations.popitem(last=False)
+                    self._rendered.pop(evicted, None)
+                self.conversations[session_id] = deque(maxlen=self.max_messages)
+                self._rendered[session_id] = [deque(maxlen=self.max_messages), None]
+            
+            self.conversations[session_id].append(message)
+            rendered = self._rendered[session_id]
+            rendered[0].append(line)
+            rendered[1] = None
     
     def get_history(self, session_id: str, last_n: Optional[int] = None) -> List[Dict]:
         """
@@ -53,13 +184,19 @@ class ConversationMemory:
         Returns:
             List of message dictionaries
         """
-        if session_id not in self.conversations:
-            return []
+        if self._store is not None:
+            return self._store.history(session_id, last_n)
         
-        history = list(self.conversations[session_id])
-        if last_n:
-            return history[-last_n:]
-        return history
+        with self._lock:
+            messages = self.conversations.get(session_id)
+            if messages is None:
+                return []
+            self.conversations.move_to_end(session_id)
+            
+            if last_n:
+                # Copy only the requested tail, not the whole deque
+                return list(islice(messages, max(0, len(messages) - last_n), None))
+            return list(messages)
     
     def get_conversation_context(self, session_id: str) -> str:
         """
@@ -71,21 +208,28 @@ class ConversationMemory:
         Returns:
             Formatted conversation history as string
         """
-        history = self.get_history(session_id)
-        if not history:
-            return ""
-        
-        context_parts = []
-        for msg in history:
-            role = msg["role"].capitalize()
-            content = msg["content"]
-            context_parts.append(f"{role}: {content}")
+        if self._store is not None:
+            return "\n".join([_render(msg) for msg in self._store.history(session_id)])
         
-        return "\n".join(context_parts)
+        # Read and join under the lock add_message updates _rendered with, so
+        # the context never lags a concurrent add or outlives an eviction
+        with self._lock:
+            rendered = self._rendered.get(session_id)
+            if rendered is None:
+                return ""
+            self.conversations.move_to_end(session_id)
+            # Join once per new message, not once per call
+            if rendered[1] is None:
+                rendered[1] = "\n".join(rendered[0])
+            return rendered[1]
     
     def clear_session(self, session_id: str):
         """Clear conversation history for a session"""
-        if session_id in self.conversations:
-            del self.conversations[session_id]
+        if self._store is not None:
+            self._store.clear(session_id)
+        with self._lock:
+            if session_id in self.conversations:
+                del self.conversations[session_id]
+                self._rendered.pop(session_id, None)
 
 
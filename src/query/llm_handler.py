@@ -3,8 +3,79 @@ LLM handler for Gemini 2.0 Flash
 Generates answers from retrieved context
 """
 import google.generativeai as genai
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
+import asyncio
+import functools
+import orjson
 import os
+import re
+
+
+# Start of the answer returned when Gemini fails (callers use it to avoid
+# caching the failure)
+LLM_ERROR_PREFIX = "I encountered an error while generating the answer."
+
+class LLMStreamError(Exception):
+    """Gemini failed after part of a streamed answer had been sent"""
+
+
+# Static instructions that open every prompt, kept in one constant instead
+# of a copy inline in each prompt builder. Nothing per-request goes in
+# here; the source URL is given after them.
+RAG_INSTRUCTIONS = """You are a helpful FAQ assistant for Nextleap courses. Answer questions based ONLY on the provided context from Nextleap's official website.
+
+IMPORTANT RULES:
+1. Answer ONLY using information from the provided context
+2. If the information is not in the context, say "I don't have that information available"
+3. Be concise and factual - no advice, only facts
+4. Always end with "Source: " followed by the URL from the "Source URL:" line below
+5. If asked about price, format it as ₹X,XXX
+6. If asked about dates and the date is not available, clearly state that
+7. Use conversation history to understand context - if user says "the course" or "it", refer to the course from previous conversation
+8. If asked about EMI or payment options, provide ALL available EMI plans from the context
+9. Make sure to answer about the SAME course mentioned in previous conversation if user refers to "the course" or "it"
+10. CRITICAL: Answer about the course mentioned in the user's question. If the user asks about "UI UX course" or "UX/UI course", answer about UI UX Design Certification Course. If they ask about "product management", answer about Product Management Certification Course. Do NOT confuse different courses.
+
+"""
+
+# Shorter rule set that opens generate_answer_simple's prompt
+SIMPLE_INSTRUCTIONS = """You are a helpful FAQ assistant for Nextleap courses. Answer the question based ONLY on the provided context from Nextleap's official website.
+
+IMPORTANT RULES:
+1. Answer ONLY using information from the provided context
+2. If the information is not in the context, say "I don't have that information available"
+3. Be concise and factual - no advice, only facts
+4. Always end with "Source: " followed by the URL from the "Source URL:" line below
+5. If asked about price, format it as ₹X,XXX
+6. If asked about dates and the date is not available, clearly state that
+
+"""
+
+# Appended to RAG_INSTRUCTIONS when several questions share one call
+BATCH_INSTRUCTIONS = """You will get several independent questions, marked <<Q1>>, <<Q2>>, ... Each comes with its own source URL, context and previous conversation; answer each one using only its own.
+Reply with JSON only, in the form {"answers": [{"idx": 1, "text": "<answer to Q1>"}, {"idx": 2, "text": "<answer to Q2>"}]}
+
+"""
+
+# Markdown code fence Gemini sometimes wraps JSON replies in
+_JSON_FENCE_PATTERN = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+# API key genai was last configured with (configure sets process-wide state)
+_configured_api_key = None
+
+
+def _configure(api_key: str):
+    """Configure genai, skipping the call if already configured with this key"""
+    global _configured_api_key
+    if api_key != _configured_api_key:
+        genai.configure(api_key=api_key)
+        _configured_api_key = api_key
+
+
+@functools.lru_cache(maxsize=4)
+def _get_model(api_key: str, name: str) -> genai.GenerativeModel:
+    """GenerativeModel shared by all handlers using the same key and model"""
+    return genai.GenerativeModel(name)
 
 
 class GeminiLLMHandler:
@@ -23,28 +94,27 @@ class GeminiLLMHandler:
             raise ValueError("Gemini API key is required. Set GEMINI_API_KEY environment variable or pass api_key parameter.")
         
         # Configure Gemini
-        genai.configure(api_key=self.api_key)
+        _configure(self.api_key)
         
         # Initialize model - try gemini-2.0-flash-exp first, fallback to gemini-1.5-flash
         try:
-            self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+            self.model = _get_model(self.api_key, 'gemini-2.0-flash-exp')
         except Exception:
             # Fallback to gemini-1.5-flash if 2.0 is not available
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
-    
-    def generate_answer(self, query: str, contexts: List[Dict], source_url: str, conversation_history: str = "") -> str:
-        """
-        Generate answer from query and retrieved contexts using Gemini
+            self.model = _get_model(self.api_key, 'gemini-1.5-flash')
         
-        Args:
-            query: User query
-            contexts: List of retrieved context chunks
-            source_url: Source URL for citation
-            conversation_history: Previous conversation context
-            
-        Returns:
-            Generated answer string
-        """
+        # Cap on concurrent generate_answer_async calls (Gemini rate limits)
+        self.max_inflight = int(os.getenv("GEMINI_MAX_INFLIGHT", "16"))
+        self._semaphore = None
+        self._semaphore_loop = None
+        
+        # Questions per Gemini call in generate_answer_async (1 disables batching)
+        batch_size = int(os.getenv("GEMINI_BATCH_SIZE", "1"))
+        self._batcher = AnswerBatcher(self, max_batch=batch_size) if batch_size > 1 else None
+    
+    @staticmethod
+    def _question_section(query: str, contexts: List[Dict], source_url: str, conversation_history: str = "") -> str:
+        """Per-request part of the prompt: source, contexts, history and question"""
         # Build context text from retrieved chunks
         context_text = "\n\n".join([
             f"Context {i+1}:\n{ctx.get('content', '')}"
@@ -56,46 +126,192 @@ class GeminiLLMHandler:
         if conversation_history:
             history_section = f"\n\nPrevious Conversation:\n{conversation_history}\n\nIMPORTANT: Use the previous conversation to understand context. If the user says 'the course' or 'it', they are referring to the course mentioned in the previous conversation."
         
-        # Create prompt
-        prompt = f"""You are a helpful FAQ assistant for Nextleap courses. Answer questions based ONLY on the provided context from Nextleap's official website.
-
-IMPORTANT RULES:
-1. Answer ONLY using information from the provided context
-2. If the information is not in the context, say "I don't have that information available"
-3. Be concise and factual - no advice, only facts
-4. Always mention the source URL at the end: Source: {source_url}
-5. If asked about price, format it as ₹X,XXX
-6. If asked about dates and the date is not available, clearly state that
-7. Use conversation history to understand context - if user says "the course" or "it", refer to the course from previous conversation
-8. If asked about EMI or payment options, provide ALL available EMI plans from the context
-9. Make sure to answer about the SAME course mentioned in previous conversation if user refers to "the course" or "it"
-10. CRITICAL: Answer about the course mentioned in the user's question. If the user asks about "UI UX course" or "UX/UI course", answer about UI UX Design Certification Course. If they ask about "product management", answer about Product Management Certification Course. Do NOT confuse different courses.
+        return f"""Source URL: {source_url}
 
 Context from Nextleap website:
 {context_text}{history_section}
 
-User Question: {query}
-
-Answer (be concise and factual):"""
-
+User Question: {query}"""
+    
+    def _build_prompt(self, query: str, contexts: List[Dict], source_url: str, conversation_history: str = "") -> str:
+        """Build the RAG prompt from the query, retrieved contexts and conversation history"""
+        # Create prompt: the static instructions, then the per-request part
+        return (
+            RAG_INSTRUCTIONS
+            + self._question_section(query, contexts, source_url, conversation_history)
+            + "\n\nAnswer (be concise and factual):"
+        )
+    
+    def _inflight(self) -> asyncio.Semaphore:
+        """Semaphore capping concurrent async Gemini calls"""
+        # asyncio primitives belong to one loop; make a new one if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_inflight)
+            self._semaphore_loop = loop
+        return self._semaphore
+    
+    def generate_answer(self, query: str, contexts: List[Dict], source_url: str, conversation_history: str = "") -> str:
+        """
+        Generate answer from query and retrieved contexts using Gemini
+        
+        Args:
+            query: User query
+            contexts: List of retrieved context chunks
+            source_url: Source URL for citation
+            conversation_history: Previous conversation context
+        
+        Returns:
+            Generated answer string
+        """
+        prompt = self._build_prompt(query, contexts, source_url, conversation_history)
+        
         try:
             # Generate response
             response = self.model.generate_content(prompt)
-            answer = response.text.strip()
-            
-            # Ensure source URL is included
-            if source_url and source_url not in answer:
-                answer += f"\n\nSource: {source_url}"
-            
-            return answer
-            
+            return self._with_source(response.text.strip(), source_url)
+        except Exception as e:
+            return self._answer_for_error(e, query, contexts, source_url, conversation_history)
+    
+    async def generate_answer_async(self, query: str, contexts: List[Dict], source_url: str, conversation_history: str = "") -> str:
+        """
+        Generate answer like generate_answer without blocking the event loop
+        
+        At most max_inflight (GEMINI_MAX_INFLIGHT) calls run at once. With
+        GEMINI_BATCH_SIZE > 1, concurrent calls are combined into shared
+        Gemini requests (see generate_answers_batched).
+        
+        Args:
+            query: User query
+            contexts: List of retrieved context chunks
+            source_url: Source URL for citation
+            conversation_history: Previous conversation context
+        
+        Returns:
+            Generated answer string
+        """
+        if self._batcher is not None:
+            return await self._batcher.answer(query, contexts, source_url, conversation_history)
+        return await self._generate_one_async(query, contexts, source_url, conversation_history)
+    
+    async def _generate_one_async(self, query: str, contexts: List[Dict], source_url: str, conversation_history: str = "") -> str:
+        """One Gemini call for one question"""
+        prompt = self._build_prompt(query, contexts, source_url, conversation_history)
+        try:
+            async with self._inflight():
+                response = await self.model.generate_content_async(prompt)
+            return self._with_source(response.text.strip(), source_url)
+        except Exception as e:
+            return self._answer_for_error(e, query, contexts, source_url, conversation_history)
+    
+    async def generate_answers_batched(self, queries: List[str], contexts_list: List[List[Dict]], source_urls: List[str], conversation_histories: Optional[List[str]] = None) -> List[str]:
+        """
+        Answer several questions with a single Gemini call
+        
+        The questions share one copy of the instructions and one round trip;
+        Gemini replies with a JSON list of answers. Questions whose answer is
+        missing from the reply (or all of them, if it isn't valid JSON) are
+        answered with separate calls instead.
+        
+        Args:
+            queries: User queries
+            contexts_list: Retrieved context chunks for each query
+            source_urls: Source URL for each query
+            conversation_histories: Previous conversation context for each query
+        
+        Returns:
+            Answer strings, in the order of queries
+        """
+        histories = conversation_histories or [""] * len(queries)
+        if len(queries) == 1:
+            return [await self._generate_one_async(queries[0], contexts_list[0], source_urls[0], histories[0])]
+        
+        sections = [
+            f"<<Q{i}>>\n" + self._question_section(query, contexts, source_url, history)
+            for i, (query, contexts, source_url, history) in enumerate(zip(queries, contexts_list, source_urls, histories), 1)
+        ]
+        prompt = RAG_INSTRUCTIONS + BATCH_INSTRUCTIONS + "\n\n".join(sections) + "\n\nAnswers (JSON):"
+        
+        texts = {}
+        try:
+            async with self._inflight():
+                response = await self.model.generate_content_async(prompt)
+            reply = orjson.loads(_JSON_FENCE_PATTERN.sub("", response.text.strip()))
+            for item in reply["answers"]:
+                if isinstance(item.get("text"), str) and item["text"].strip():
+                    texts[int(item["idx"])] = item["text"].strip()
+        except Exception as e:
+            print(f"Warning: Batched answer failed, answering separately: {e}")
+        
+        answers = []
+        for i, (query, contexts, source_url, history) in enumerate(zip(queries, contexts_list, source_urls, histories), 1):
+            if i in texts:
+                answers.append(self._with_source(texts[i], source_url))
+            else:
+                answers.append(self._generate_one_async(query, contexts, source_url, history))
+        # Separate calls for the questions the batch didn't answer
+        pending = [answer for answer in answers if not isinstance(answer, str)]
+        results = iter(await asyncio.gather(*pending))
+        return [answer if isinstance(answer, str) else next(results) for answer in answers]
+    
+    @staticmethod
+    def _with_source(answer: str, source_url: str) -> str:
+        """Ensure source URL is included"""
+        if source_url and source_url not in answer:
+            answer += f"\n\nSource: {source_url}"
+        return answer
+    
+    def _answer_for_error(self, error: Exception, query: str, contexts: List[Dict], source_url: str, conversation_history: str = "") -> str:
+        """Answer to return when the Gemini call fails"""
+        error_msg = str(error)
+        # If quota exceeded, provide a helpful message
+        if "quota" in error_msg.lower() or "429" in error_msg:
+            # Fallback: extract answer from context directly
+            return self._extract_from_context(query, contexts, source_url, conversation_history)
+        return f"{LLM_ERROR_PREFIX} Please try again. Error: {error_msg}"
+    
+    def generate_answer_stream(self, query: str, contexts: List[Dict], source_url: str, conversation_history: str = "") -> Iterator[str]:
+        """
+        Generate answer like generate_answer, yielding text as Gemini produces it
+        
+        Args:
+            query: User query
+            contexts: List of retrieved context chunks
+            source_url: Source URL for citation
+            conversation_history: Previous conversation context
+        
+        Returns:
+            Iterator of answer text pieces (concatenated, they form the answer)
+        
+        Raises:
+            LLMStreamError: If Gemini fails after some text was yielded (the
+                answer is incomplete; before that, a fallback answer is yielded)
+        """
+        prompt = self._build_prompt(query, contexts, source_url, conversation_history)
+        answer = ""
+        
+        try:
+            for chunk in self.model.generate_content(prompt, stream=True):
+                text = chunk.text
+                if not answer:
+                    text = text.lstrip()
+                if text:
+                    answer += text
+                    yield text
         except Exception as e:
             error_msg = str(e)
-            # If quota exceeded, provide a helpful message
+            if answer:
+                # Part of the answer is out already; a fallback can't replace it
+                raise LLMStreamError(f"Answer stream interrupted: {error_msg}") from e
             if "quota" in error_msg.lower() or "429" in error_msg:
-                # Fallback: extract answer from context directly
-                return self._extract_from_context(query, contexts, source_url, conversation_history)
-            return f"I encountered an error while generating the answer. Please try again. Error: {error_msg}"
+                yield self._extract_from_context(query, contexts, source_url, conversation_history)
+            else:
+                yield f"{LLM_ERROR_PREFIX} Please try again. Error: {error_msg}"
+            return
+        
+        # Ensure source URL is included
+        if source_url and source_url not in answer:
+            yield f"\n\nSource: {source_url}"
     
     def _extract_from_context(self, query: str, contexts: List[Dict], source_url: str, conversation_history: str = "") -> str:
         """Extract answer directly from context when LLM fails"""
@@ -166,19 +382,11 @@ Answer (be concise and factual):"""
             query: User query
             context_text: Combined context text
             source_url: Source URL
-            
+        
         Returns:
             Generated answer
         """
-        prompt = f"""You are a helpful FAQ assistant for Nextleap courses. Answer the question based ONLY on the provided context from Nextleap's official website.
-
-IMPORTANT RULES:
-1. Answer ONLY using information from the provided context
-2. If the information is not in the context, say "I don't have that information available"
-3. Be concise and factual - no advice, only facts
-4. Always mention the source URL at the end: Source: {source_url}
-5. If asked about price, format it as ₹X,XXX
-6. If asked about dates and the date is not available, clearly state that
+        prompt = SIMPLE_INSTRUCTIONS + f"""Source URL: {source_url}
 
 Context from Nextleap website:
 {context_text}
@@ -186,7 +394,7 @@ Context from Nextleap website:
 User Question: {query}
 
 Answer (be concise and factual):"""
-
+        
         try:
             response = self.model.generate_content(prompt)
             answer = response.text.strip()
@@ -195,7 +403,92 @@ Answer (be concise and factual):"""
                 answer += f"\n\nSource: {source_url}"
             
             return answer
-            
+        
         except Exception as e:
-            return f"I encountered an error while generating the answer. Please try again. Error: {str(e)}"
+            return f"{LLM_ERROR_PREFIX} Please try again. Error: {str(e)}"
 
+
+class AnswerBatcher:
+    """
+    Coalesce concurrent generate_answer_async calls into batched Gemini calls
+    
+    Callers await answer(); a background task drains up to max_batch queued
+    questions (waiting at most wait_ms for more to arrive after the first)
+    and answers them with one generate_answers_batched call.
+    """
+    
+    def __init__(self, llm_handler: GeminiLLMHandler, max_batch: int = 4, wait_ms: float = 50):
+        """
+        Initialize the batching layer
+        
+        Args:
+            llm_handler: Handler that makes the Gemini calls
+            max_batch: Maximum number of questions per Gemini call
+            wait_ms: How long to wait for more questions once one has arrived
+        """
+        self.llm_handler = llm_handler
+        self.max_batch = max_batch
+        self.wait_seconds = wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # The event loop only keeps weak references to tasks, so in-flight
+        # batches are held here until they finish
+        self._batch_tasks = set()
+    
+    async def answer(self, query: str, contexts: List[Dict], source_url: str, conversation_history: str = "") -> str:
+        """
+        Generate answer for a single question, batched with concurrent callers
+        
+        Args:
+            query: User query
+            contexts: List of retrieved context chunks
+            source_url: Source URL for citation
+            conversation_history: Previous conversation context
+        
+        Returns:
+            Generated answer string
+        """
+        if self._worker is None or self._worker.done():
+            # Created lazily so the queue belongs to the running event loop
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((query, contexts, source_url, conversation_history), future))
+        return await future
+    
+    async def _run(self):
+        """Drain the queue in batches forever"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.wait_seconds
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Don't hold up the next batch while Gemini answers this one
+            task = asyncio.create_task(self._answer_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+    
+    async def _answer_batch(self, batch: List):
+        """Answer one drained batch and resolve its callers' futures"""
+        queries, contexts_list, source_urls, histories = zip(*(request for request, _ in batch))
+        try:
+            answers = await self.llm_handler.generate_answers_batched(
+                list(queries), list(contexts_list), list(source_urls), list(histories)
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), answer in zip(batch, answers):
+            if not future.done():
+                future.set_result(answer)
@@ -2,17 +2,90 @@
 Query handler for answering questions about Nextleap courses
 Uses RAG (Retrieval Augmented Generation) approach with Gemini LLM
 """
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import asyncio
+import re
 from src.embeddings.embedder import EmbeddingGenerator
-from src.embeddings.vector_db import VectorDB
-from src.query.llm_handler import GeminiLLMHandler
+from src.embeddings.vector_db import VectorDB, LIST_METADATA_MAX
+from src.query.llm_handler import GeminiLLMHandler, LLM_ERROR_PREFIX
 from src.query.conversation_memory import ConversationMemory
+from src.query.response_cache import AnswerCache, FAQAnswerCache, SemanticAnswerCache
+
+
+# Course name mapping - various ways users might refer to courses
+COURSE_KEYWORDS = {
+    "product management": "Product Management",
+    "product manager": "Product Management",
+    "pm course": "Product Management",
+    "data analyst": "Data Analyst",
+    "data analysis": "Data Analyst",
+    "business analyst": "Business Analyst",
+    "ui ux": "UI UX Design",
+    "ui/ux": "UI UX Design",
+    "ux ui": "UI UX Design",
+    "ux/ui": "UI UX Design",
+    "ui ux design": "UI UX Design",
+    "ux design": "UI UX Design",
+    "ui design": "UI UX Design",
+    "product designer": "UI UX Design",
+    "product design": "UI UX Design"
+}
+
+# All course keywords in one alternation (longest first, so "ui ux design"
+# wins over "ui ux"): a single scan finds the first course named in a text
+COURSE_PATTERN = re.compile(
+    "|".join(re.escape(keyword) for keyword in sorted(COURSE_KEYWORDS, key=len, reverse=True)),
+    re.IGNORECASE
+)
+
+# Words that make a question lean on earlier turns ("how much is it?");
+# such questions never go through the semantic cache
+REFERENTIAL_PATTERN = re.compile(r"\b(it|its|this|that|these|those|they|them|the course|the program)\b", re.IGNORECASE)
+
+# Query words that call for batch (dates, cost) or payment (EMI) chunks first
+QUERY_INTENT_KEYWORDS = {
+    "batch": frozenset({"start", "starts", "starting", "date", "dates", "when", "cost", "costs", "price", "prices", "pricing", "fee", "fees"}),
+    "payment": frozenset({"emi", "emis", "installment", "installments", "payment", "payments", "pay", "paying"})
+}
+_WORD_PATTERN = re.compile(r"[a-z]+")
+
+# Chunk type -> rank (lower first) for each intent; other types rank last
+_BATCH_RANKS = {"batch": 0}
+# Payment chunks first, then batch (for course context), then others
+_PAYMENT_RANKS = {"payment": 0, "batch": 1}
+
+# Plain lookups of one metadata field ("What is the cost of the data analyst
+# course?") are answered from the matching chunk directly, without the LLM.
+# The whole question must match, so anything more ("Is the fee refundable?",
+# "Does the price include GST?") still goes to the LLM
+_COURSE_NAME = (
+    rf"(?:the )?(?:nextleap(?:'s)? )?(?:{COURSE_PATTERN.pattern})"
+    r"(?: (?:certification )?(?:course|program|cohort))?"
+)
+DIRECT_ANSWER_PATTERNS = {
+    "cost": re.compile(
+        rf"(?:what(?: is|'s)|how much is) the (?:cost|price|fee|fees|course fee) (?:of|for) {_COURSE_NAME}"
+        rf"|how much does {_COURSE_NAME} cost"
+    ),
+    "batch_start_date": re.compile(
+        rf"when does {_COURSE_NAME} start"
+        rf"|when is the next batch of {_COURSE_NAME}"
+        rf"|what(?: is|'s) the (?:start date|batch start date|next batch date) (?:of|for) {_COURSE_NAME}"
+    ),
+    "emi_options": re.compile(rf"what are the emi options (?:for|of) {_COURSE_NAME}")
+}
+
+# Contexts handed to the LLM (GeminiLLMHandler uses the top 5)
+PROMPT_CONTEXTS = 5
+# Extra search results when chunks get reordered by type, so the
+# prioritization has a few candidates beyond n_results to choose from
+INTENT_HEADROOM = 3
 
 
 class QueryHandler:
     """Handle queries using RAG with Gemini LLM"""
     
-    def __init__(self, vector_db: VectorDB, embedder: EmbeddingGenerator, llm_handler: Optional[GeminiLLMHandler] = None, conversation_memory: Optional[ConversationMemory] = None):
+    def __init__(self, vector_db: VectorDB, embedder: EmbeddingGenerator, llm_handler: Optional[GeminiLLMHandler] = None, conversation_memory: Optional[ConversationMemory] = None, answer_cache: Optional[AnswerCache] = None, semantic_cache: Optional[SemanticAnswerCache] = None, faq_cache: Optional[FAQAnswerCache] = None):
         """
         Initialize query handler
         
@@ -21,14 +94,123 @@ class QueryHandler:
             embedder: Embedding generator instance
             llm_handler: Optional LLM handler (if None, will use simple extraction)
             conversation_memory: Optional conversation memory manager
+            answer_cache: Optional cache of answers keyed by normalized question
+            semantic_cache: Optional cache of answers keyed by question embedding
+            faq_cache: Optional precomputed answers to anticipated questions
         """
         self.vector_db = vector_db
         self.embedder = embedder
         self.llm_handler = llm_handler
         self.conversation_memory = conversation_memory or ConversationMemory(max_messages=20)
-        self.conversation_memory = conversation_memory or ConversationMemory(max_messages=20)
+        self.answer_cache = answer_cache
+        self.semantic_cache = semantic_cache
+        self.faq_cache = faq_cache
+        # Answers served by _direct_answer vs. eligible questions it left to the LLM
+        self.direct_hits = 0
+        self.direct_misses = 0
     
-    def retrieve_context(self, query: str, n_results: int = 3, course_filter: Optional[str] = None) -> List[Dict]:
+    def _is_cacheable(self, query: str, session_id: str) -> bool:
+        """
+        Whether the answer to query can be shared across sessions
+        
+        Follow-up questions depend on the conversation so far; a question is
+        only cacheable if it starts a conversation or names its course itself.
+        """
+        if self.answer_cache is None:
+            return False
+        if not self.conversation_memory.get_history(session_id, last_n=1):
+            return True
+        return COURSE_PATTERN.search(query) is not None
+    
+    def cache_stats(self) -> Dict:
+        """
+        Hit/miss counters of the answer caches
+        
+        Returns:
+            {"exact": {...}, "semantic": {...}, "faq": {...}} for the caches in
+            use, plus "direct" counters for answers built without the LLM
+        """
+        stats = {}
+        if self.answer_cache is not None:
+            stats["exact"] = self.answer_cache.stats()
+        if self.semantic_cache is not None:
+            stats["semantic"] = self.semantic_cache.stats()
+        if self.faq_cache is not None:
+            stats["faq"] = self.faq_cache.stats()
+        stats["direct"] = {"hits": self.direct_hits, "misses": self.direct_misses}
+        return stats
+    
+    def _is_semantic_cacheable(self, query: str, session_id: str) -> bool:
+        """
+        Whether a paraphrase's cached (or FAQ) answer may be used for query
+        
+        Stricter than _is_cacheable: only opening questions that don't
+        refer back to anything.
+        """
+        if self.semantic_cache is None and self.faq_cache is None:
+            return False
+        if self.conversation_memory.get_history(session_id, last_n=1):
+            return False
+        return not REFERENTIAL_PATTERN.search(query)
+    
+    @staticmethod
+    def _query_course(text: str) -> Optional[str]:
+        """First course named in the text (a query or conversation), if any"""
+        match = COURSE_PATTERN.search(text)
+        return COURSE_KEYWORDS[match.group(0).lower()] if match else None
+    
+    def _semantic_lookup(self, query: str, session_id: str, query_embedding: Optional[Sequence[float]]) -> Tuple[Optional[Dict], Optional[Sequence[float]], bool]:
+        """
+        Check the FAQ and semantic caches (embedding the query if needed)
+        
+        Returns:
+            (cached answer or None, query embedding, whether the answer may be
+            stored in the semantic cache afterwards)
+        """
+        if not self._is_semantic_cacheable(query, session_id):
+            return None, query_embedding, False
+        if query_embedding is None:
+            query_embedding = self.embedder.generate_embedding(query)
+        scope = self._query_course(query)
+        if self.faq_cache is not None:
+            cached = self.faq_cache.get(query_embedding, scope=scope)
+            if cached is not None:
+                return cached, query_embedding, False
+        if self.semantic_cache is None:
+            return None, query_embedding, False
+        return self.semantic_cache.get(query_embedding, scope=scope), query_embedding, True
+    
+    def cached_answer(self, query: str, session_id: str = "default") -> Optional[Dict]:
+        """
+        Return a cached answer for query (recording the exchange in memory) or None
+        
+        Args:
+            query: User query
+            session_id: Session identifier for conversation memory
+            
+        Returns:
+            Dictionary with answer and source URL, or None on a cache miss
+        """
+        if not self._is_cacheable(query, session_id):
+            return None
+        result = self.answer_cache.get(query)
+        if result is None:
+            return None
+        
+        self._remember_exchange(query, session_id, result)
+        return result
+    
+    def _remember_exchange(self, query: str, session_id: str, result: Dict):
+        """Record a cached answer's question and answer in memory"""
+        self.conversation_memory.add_message(session_id, "user", query)
+        self.conversation_memory.add_message(
+            session_id,
+            "assistant",
+            result["answer"],
+            {"source_url": result.get("source_url")}
+        )
+    
+    def retrieve_context(self, query: str, n_results: int = 3, course_filter: Optional[str] = None, query_embedding: Optional[Sequence[float]] = None) -> List[Dict]:
         """
         Retrieve relevant context for a query
         
@@ -36,52 +218,65 @@ class QueryHandler:
             query: User query
             n_results: Number of results to retrieve
             course_filter: Optional course name to filter/prioritize
+            query_embedding: Precomputed embedding of query (e.g. from a BatchingEmbedder)
             
         Returns:
             List of relevant chunks with metadata
         """
         # Generate query embedding
-        query_embedding = self.embedder.generate_embedding(query)
+        if query_embedding is None:
+            query_embedding = self.embedder.generate_embedding(query)
         
-        # Search vector database with more results to ensure we get batch info
-        search_results = self.vector_db.search(query_embedding, n_results=max(n_results * 2, 20))
+        # Words of the query, for the intent checks
+        query_words = set(_WORD_PATTERN.findall(query.lower()))
+        if query_words & QUERY_INTENT_KEYWORDS["payment"]:
+            ranks = _PAYMENT_RANKS
+        elif query_words & QUERY_INTENT_KEYWORDS["batch"]:
+            ranks = _BATCH_RANKS
+        else:
+            ranks = None
         
-        # Format results
+        # Only fetch what the reordering below can use: the course's chunks
+        # may rank below other courses', so a course filter searches wider
+        if course_filter:
+            n_search = n_results * 3
+        elif ranks:
+            n_search = n_results + INTENT_HEADROOM
+        else:
+            n_search = n_results
+        search_results = self.vector_db.search(query_embedding, n_results=n_search)
+        
+        # Format results (metadata is always a dict, so the loops below can
+        # index it directly)
         contexts = []
         if search_results and search_results.get("documents") and len(search_results["documents"]) > 0:
-            for i in range(len(search_results["documents"][0])):
-                contexts.append({
-                    "content": search_results["documents"][0][i],
-                    "metadata": search_results["metadatas"][0][i] if search_results.get("metadatas") else {},
-                    "distance": search_results["distances"][0][i] if search_results.get("distances") else None
-                })
+            documents = search_results["documents"][0]
+            metadatas = search_results["metadatas"][0] if search_results.get("metadatas") else [None] * len(documents)
+            distances = search_results["distances"][0] if search_results.get("distances") else [None] * len(documents)
+            contexts = [
+                {"content": document, "metadata": metadata or {}, "distance": distance}
+                for document, metadata, distance in zip(documents, metadatas, distances)
+            ]
         
         # Filter by course if specified - prioritize matching course chunks
         if course_filter:
-            # Prioritize chunks from the specified course
-            matching_course = [c for c in contexts if course_filter.lower() in c.get("metadata", {}).get("cohort_name", "").lower()]
-            other_courses = [c for c in contexts if course_filter.lower() not in c.get("metadata", {}).get("cohort_name", "").lower()]
+            # Prioritize chunks from the specified course, in one pass
+            course_lower = course_filter.lower()
+            matching_course, other_courses = [], []
+            for c in contexts:
+                if course_lower in c["metadata"].get("cohort_name", "").lower():
+                    matching_course.append(c)
+                else:
+                    other_courses.append(c)
             # Put matching course chunks first, limit other courses to avoid confusion
             contexts = matching_course + other_courses[:5]  # Limit other courses to top 5
         
-        # Prioritize batch chunks for date/start/cost queries
-        query_lower = query.lower()
-        if any(keyword in query_lower for keyword in ['start', 'date', 'when', 'cost', 'price', 'fee']):
-            # Separate batch chunks from others
-            batch_chunks = [c for c in contexts if c.get("metadata", {}).get("type") == "batch"]
-            other_chunks = [c for c in contexts if c.get("metadata", {}).get("type") != "batch"]
-            
-            # Put batch chunks first, then others
-            contexts = batch_chunks + other_chunks
-        
-        # Prioritize payment chunks for EMI/payment queries
-        if any(keyword in query_lower for keyword in ['emi', 'installment', 'payment', 'pay']):
-            payment_chunks = [c for c in contexts if c.get("metadata", {}).get("type") == "payment"]
-            batch_chunks = [c for c in contexts if c.get("metadata", {}).get("type") == "batch"]
-            other_chunks = [c for c in contexts if c.get("metadata", {}).get("type") not in ["payment", "batch"]]
-            
-            # Put payment chunks first, then batch (for course context), then others
-            contexts = payment_chunks + batch_chunks + other_chunks
+        # Prioritize payment chunks for EMI/payment queries, batch chunks for
+        # date/start/cost queries; the sort is stable, so relevance order is
+        # kept within each rank
+        if ranks:
+            last = len(ranks)
+            contexts.sort(key=lambda c: ranks.get(c["metadata"].get("type"), last))
         
         # Return top n_results
         return contexts[:n_results]
@@ -104,6 +299,10 @@ class QueryHandler:
                 "source_url": None
             }
         
+        direct = self._direct_answer(query, contexts)
+        if direct is not None:
+            return direct
+        
         # Get source URL from best context
         best_context = contexts[0]
         source_url = best_context.get("metadata", {}).get("source_url")
@@ -122,6 +321,54 @@ class QueryHandler:
             "contexts_used": len(contexts)
         }
     
+    def _direct_answer(self, query: str, contexts: List[Dict]) -> Optional[Dict]:
+        """
+        Answer a price, start date or EMI question straight from chunk metadata
+        
+        Only for questions that are nothing but a lookup of one of those
+        fields for a named course (DIRECT_ANSWER_PATTERNS), and only if a
+        retrieved chunk of that course has the field filled in. Such answers
+        are marked "direct" and never cached.
+        
+        Returns:
+            Dictionary with answer and source URL, or None to use the LLM
+        """
+        question = " ".join(query.lower().split()).rstrip("?").rstrip()
+        field = next((field for field, pattern in DIRECT_ANSWER_PATTERNS.items() if pattern.fullmatch(question)), None)
+        if field is None:
+            return None
+        course = self._query_course(question)
+        
+        course_lower = course.lower()
+        for ctx in contexts:
+            metadata = ctx["metadata"]
+            cohort_name = metadata.get("cohort_name", "")
+            if course_lower not in cohort_name.lower():
+                continue
+            if field == "emi_options":
+                # Lists are stored one element per key (see VectorDB.add_chunks)
+                options = [metadata[f"emi_options_{i}"] for i in range(LIST_METADATA_MAX) if metadata.get(f"emi_options_{i}")]
+                if not options:
+                    continue
+                answer = f"EMI options available for the {cohort_name}:\n" + "\n".join(f"- {option}" for option in options)
+            else:
+                value = metadata.get(field)
+                if not value or value == "null":
+                    continue
+                if field == "cost":
+                    answer = f"The cost of the {cohort_name} is ₹{value}."
+                else:
+                    answer = f"The next batch of the {cohort_name} starts on {value}."
+            
+            source_url = metadata.get("source_url")
+            if source_url:
+                answer += f"\n\nSource: {source_url}"
+            self.direct_hits += 1
+            return {"answer": answer, "source_url": source_url, "contexts_used": len(contexts), "direct": True}
+        
+        self.direct_misses += 1
+        return None
+    
     def _extract_answer_simple(self, query: str, contexts: List[Dict], source_url: str) -> str:
         """
         Simple answer extraction (fallback when LLM not available)
@@ -166,67 +413,172 @@ class QueryHandler:
         
         return answer
     
-    def answer_query(self, query: str, session_id: str = "default") -> Dict:
+    def answer_query(self, query: str, session_id: str = "default", query_embedding: Optional[Sequence[float]] = None) -> Dict:
         """
         Answer a query using RAG with conversation memory
         
         Args:
             query: User query
             session_id: Session identifier for conversation memory
+            query_embedding: Precomputed embedding of query (skips embedding it here)
             
         Returns:
             Dictionary with answer and source URL
         """
-        # Add user message to memory
-        self.conversation_memory.add_message(session_id, "user", query)
+        cached = self.cached_answer(query, session_id)
+        if cached is not None:
+            return cached
+        cacheable = self._is_cacheable(query, session_id)
         
-        # Get conversation history
-        conversation_history = self.conversation_memory.get_conversation_context(session_id)
+        cached, query_embedding, semantic = self._semantic_lookup(query, session_id, query_embedding)
+        if cached is not None:
+            self._remember_exchange(query, session_id, cached)
+            if cacheable:
+                self.answer_cache.set(query, cached)
+            return cached
         
-        # Extract course name from current query first, then from conversation history
-        course_filter = None
-        
-        # Course name mapping - various ways users might refer to courses
-        course_keywords = {
-            "product management": "Product Management",
-            "product manager": "Product Management",
-            "pm course": "Product Management",
-            "data analyst": "Data Analyst",
-            "data analysis": "Data Analyst",
-            "business analyst": "Business Analyst",
-            "ui ux": "UI UX Design",
-            "ui/ux": "UI UX Design",
-            "ux ui": "UI UX Design",
-            "ux/ui": "UI UX Design",
-            "ui ux design": "UI UX Design",
-            "ux design": "UI UX Design",
-            "ui design": "UI UX Design",
-            "product designer": "UI UX Design",
-            "product design": "UI UX Design"
-        }
+        contexts, conversation_history = self._prepare_contexts(query, session_id, query_embedding)
         
-        # First, check current query for course name
-        query_lower = query.lower()
-        for keyword, course_name in course_keywords.items():
-            if keyword in query_lower:
-                course_filter = course_name
-                break
+        # Format answer with conversation context
+        result = self.format_answer(query, contexts, conversation_history)
+        
+        self._record_answer(query, session_id, result, cacheable, query_embedding if semantic else None)
+        return result
+    
+    async def answer_query_async(self, query: str, session_id: str = "default", query_embedding: Optional[Sequence[float]] = None, check_cache: bool = True) -> Dict:
+        """
+        Answer a query like answer_query, awaiting the Gemini call
+        
+        Embedding and vector search run in worker threads (their libraries
+        are synchronous), so concurrent queries overlap their LLM calls.
+        
+        Args:
+            query: User query
+            session_id: Session identifier for conversation memory
+            query_embedding: Precomputed embedding of query (skips embedding it here)
+            check_cache: Look query up with cached_answer first (False if the
+                caller already has, e.g. before embedding it)
+            
+        Returns:
+            Dictionary with answer and source URL
+        """
+        # The answer cache and memory may touch SQLite files, so they run in
+        # worker threads too
+        if check_cache:
+            cached = await asyncio.to_thread(self.cached_answer, query, session_id)
+            if cached is not None:
+                return cached
+        cacheable = await asyncio.to_thread(self._is_cacheable, query, session_id)
+        
+        cached, query_embedding, semantic = await asyncio.to_thread(self._semantic_lookup, query, session_id, query_embedding)
+        if cached is not None:
+            await asyncio.to_thread(self._remember_exchange, query, session_id, cached)
+            if cacheable:
+                await asyncio.to_thread(self.answer_cache.set, query, cached)
+            return cached
+        
+        contexts, conversation_history = await asyncio.to_thread(self._prepare_contexts, query, session_id, query_embedding)
+        
+        if contexts and self.llm_handler:
+            result = self._direct_answer(query, contexts)
+            if result is None:
+                source_url = contexts[0].get("metadata", {}).get("source_url")
+                result = {
+                    "answer": await self.llm_handler.generate_answer_async(query, contexts, source_url, conversation_history),
+                    "source_url": source_url,
+                    "contexts_used": len(contexts)
+                }
+        else:
+            result = self.format_answer(query, contexts, conversation_history)
+        
+        await asyncio.to_thread(self._record_answer, query, session_id, result, cacheable, query_embedding if semantic else None)
+        return result
+    
+    def answer_query_stream(self, query: str, session_id: str = "default", query_embedding: Optional[Sequence[float]] = None, check_cache: bool = True) -> Iterator[Tuple[str, Dict]]:
+        """
+        Answer a query like answer_query, streaming the LLM output
+        
+        Args:
+            query: User query
+            session_id: Session identifier for conversation memory
+            query_embedding: Precomputed embedding of query (skips embedding it here)
+            check_cache: Look query up with cached_answer first (False if the
+                caller already has)
+            
+        Returns:
+            Iterator of (event, data) pairs: one ("source", {"source_url"}),
+            then ("token", {"text"}) pieces, then ("done", {"answer", "source_url"})
+        
+        Raises:
+            LLMStreamError: If the LLM fails mid-answer; nothing is then
+                recorded in memory or cached, so the question can be retried
+        """
+        cached = self.cached_answer(query, session_id) if check_cache else None
+        cacheable = False
+        if cached is None:
+            cacheable = self._is_cacheable(query, session_id)
+            cached, query_embedding, semantic = self._semantic_lookup(query, session_id, query_embedding)
+            if cached is not None:
+                self._remember_exchange(query, session_id, cached)
+                if cacheable:
+                    self.answer_cache.set(query, cached)
+        if cached is not None:
+            yield "source", {"source_url": cached.get("source_url")}
+            yield "token", {"text": cached["answer"]}
+            yield "done", cached
+            return
+        
+        contexts, conversation_history = self._prepare_contexts(query, session_id, query_embedding)
+        
+        direct = self._direct_answer(query, contexts) if contexts and self.llm_handler else None
+        if direct is not None or not contexts or not self.llm_handler:
+            result = direct or self.format_answer(query, contexts, conversation_history)
+            yield "source", {"source_url": result.get("source_url")}
+            yield "token", {"text": result["answer"]}
+        else:
+            source_url = contexts[0].get("metadata", {}).get("source_url")
+            yield "source", {"source_url": source_url}
+            pieces = []
+            for text in self.llm_handler.generate_answer_stream(query, contexts, source_url, conversation_history):
+                pieces.append(text)
+                yield "token", {"text": text}
+            result = {
+                "answer": "".join(pieces).strip(),
+                "source_url": source_url,
+                "contexts_used": len(contexts)
+            }
+        
+        self._record_answer(query, session_id, result, cacheable, query_embedding if semantic else None)
+        yield "done", {"answer": result["answer"], "source_url": result.get("source_url")}
+    
+    def _prepare_contexts(self, query: str, session_id: str, query_embedding: Optional[Sequence[float]]) -> Tuple[List[Dict], str]:
+        """Retrieve contexts for query (returns contexts and conversation history ending with query)"""
+        # The user message is only added to memory with its answer
+        # (_record_answer), so a failed answer leaves no orphaned question
+        previous_history = self.conversation_memory.get_conversation_context(session_id)
+        conversation_history = f"{previous_history}\nUser: {query}" if previous_history else f"User: {query}"
+        
+        # Extract course name from current query first, then from conversation history
+        course_filter = self._query_course(query)
         
         # If not found in current query, check conversation history
         if not course_filter and conversation_history:
-            history_lower = conversation_history.lower()
-            for keyword, course_name in course_keywords.items():
-                if keyword in history_lower:
-                    course_filter = course_name
-                    break
-        
-        # Retrieve relevant context - use more results to ensure we get batch info
-        contexts = self.retrieve_context(query, n_results=15, course_filter=course_filter)
+            course_filter = self._query_course(conversation_history)
         
-        # Format answer with conversation context
-        result = self.format_answer(query, contexts, conversation_history)
+        # Retrieve only as many contexts as the prompt uses
+        contexts = self.retrieve_context(query, n_results=PROMPT_CONTEXTS, course_filter=course_filter, query_embedding=query_embedding)
+        return contexts, conversation_history
+    
+    def _record_answer(self, query: str, session_id: str, result: Dict, cacheable: bool, semantic_embedding: Optional[Sequence[float]] = None):
+        """
+        Add the question and the assistant response to memory and cache it if allowed
         
-        # Add assistant response to memory
+        Answers are only cached when they came from retrieved context and the
+        LLM didn't fail (direct answers are cheap to rebuild and aren't
+        cached either); semantic_embedding also stores it in the semantic cache.
+        """
+        # Add the exchange to memory
+        self.conversation_memory.add_message(session_id, "user", query)
         self.conversation_memory.add_message(
             session_id, 
             "assistant", 
@@ -234,5 +586,11 @@ class QueryHandler:
             {"source_url": result.get("source_url")}
         )
         
-        return result
+        if not result.get("contexts_used") or result.get("direct") or result["answer"].startswith(LLM_ERROR_PREFIX):
+            return
+        answer = {"answer": result["answer"], "source_url": result.get("source_url")}
+        if cacheable:
+            self.answer_cache.set(query, answer)
+        if semantic_embedding is not None:
+            self.semantic_cache.set(semantic_embedding, answer, scope=self._query_course(query))
 
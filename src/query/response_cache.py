@@ -0,0 +1,377 @@
+"""
+Answer caches for the chatbot
+AnswerCache memoizes answers by normalized question so repeated questions
+skip embedding, vector search and the LLM call; SemanticAnswerCache also
+catches paraphrases, at the cost of embedding the question; FAQAnswerCache
+serves precomputed answers to anticipated questions (scripts/build_faq_cache.py)
+"""
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import hashlib
+import numpy as np
+import orjson
+import re
+import sqlite3
+import threading
+import time
+
+
+# Punctuation is dropped from cache keys ("What's the price?" == "whats the price")
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class AnswerCache:
+    """
+    LRU cache with a per-entry TTL, optionally backed by a SQLite file
+    
+    With a path, the file is also how separate worker processes share
+    answers: a miss looks the key up in SQLite, and a write inserts just
+    that one row, so concurrent writers never overwrite each other's
+    entries. Lookups and writes touch the disk, so async callers should
+    run them in a worker thread.
+    """
+    
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600, path: Optional[str] = None):
+        """
+        Initialize answer cache
+        
+        Args:
+            maxsize: Maximum number of cached answers
+            ttl: Seconds an answer stays valid
+            path: Optional SQLite file to share the cache between processes
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, answer dict)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        if path:
+            try:
+                self._conn = self._connect(path)
+            except Exception as e:
+                print(f"Warning: Could not open answer cache file, caching in memory only: {e}")
+    
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        """Open (creating if needed) the SQLite answer table"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL,
+                answer TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS answers_expires_at ON answers (expires_at);
+        """)
+        return conn
+    
+    @staticmethod
+    def normalize(question: str) -> str:
+        """Normalized question text (case, punctuation and whitespace insensitive)"""
+        return _WHITESPACE_PATTERN.sub(" ", _PUNCTUATION_PATTERN.sub("", question.lower())).strip()
+    
+    @classmethod
+    def key(cls, question: str) -> str:
+        """Fixed-size cache key for a question"""
+        return hashlib.blake2b(cls.normalize(question).encode("utf-8"), digest_size=16).hexdigest()
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size (of this process's copy)"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+    
+    def get(self, question: str) -> Optional[Dict]:
+        """
+        Look up a cached answer
+        
+        Args:
+            question: User question
+        
+        Returns:
+            Cached answer dictionary, or None if missing or expired
+        """
+        key = self.key(question)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                # Another worker may have answered it
+                entry = self._load(key)
+                if entry is not None:
+                    self._remember(key, entry)
+            if entry is None or entry[0] < now:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+    
+    def set(self, question: str, answer: Dict):
+        """
+        Cache an answer (and store it in the SQLite file if a path was given)
+        
+        Args:
+            question: User question
+            answer: Answer dictionary (answer, source_url)
+        """
+        key = self.key(question)
+        entry = (time.time() + self.ttl, dict(answer))
+        with self._lock:
+            self._remember(key, entry)
+            self._store(key, entry)
+    
+    def _remember(self, key: str, entry: Tuple[float, Dict]):
+        """Add an entry to the in-process LRU (call with _lock held)"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def _load(self, key: str) -> Optional[Tuple[float, Dict]]:
+        """Unexpired entry for key from the SQLite file, if any (call with _lock held)"""
+        if self._conn is None:
+            return None
+        try:
+            row = self._conn.execute(
+                "SELECT expires_at, answer FROM answers WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        except Exception as e:
+            print(f"Warning: Could not read answer cache: {e}")
+            return None
+        return (row[0], orjson.loads(row[1])) if row else None
+    
+    def _store(self, key: str, entry: Tuple[float, Dict]):
+        """Write one entry to the SQLite file, dropping expired and excess rows (call with _lock held)"""
+        if self._conn is None:
+            return
+        expires_at, answer = entry
+        conn = self._conn
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO answers (key, expires_at, answer) VALUES (?, ?, ?)",
+                    (key, expires_at, orjson.dumps(answer).decode())
+                )
+                conn.execute("DELETE FROM answers WHERE expires_at < ?", (time.time(),))
+                # Every entry has the same TTL, so the earliest to expire is the oldest
+                conn.execute(
+                    "DELETE FROM answers WHERE key IN ("
+                    "SELECT key FROM answers ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                    (self.maxsize,)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except Exception as e:
+            print(f"Warning: Could not save answer cache: {e}")
+
+
+class SemanticAnswerCache:
+    """
+    Answers keyed by question embedding, so paraphrases of a cached
+    question hit too
+    
+    Holds up to maxsize unit-length embeddings in one preallocated matrix;
+    a lookup is a single matrix-vector product. Entries expire after ttl
+    and the least recently used one is replaced when the cache is full.
+    """
+    
+    def __init__(self, threshold: float = 0.9, maxsize: int = 2000, ttl: float = 21600):
+        """
+        Initialize semantic answer cache
+        
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            maxsize: Maximum number of cached answers
+            ttl: Seconds an answer stays valid
+        """
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._matrix = None  # (maxsize, d) float32, allocated on first set
+        self._valid = np.zeros(maxsize, dtype=bool)
+        self._slots = OrderedDict()  # slot -> (expires_at, scope, answer dict), LRU order
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+    
+    def get(self, embedding, scope: Optional[str] = None) -> Optional[Dict]:
+        """
+        Look up the answer to the most similar cached question
+        
+        Args:
+            embedding: Question embedding
+            scope: Only match answers cached with the same scope (e.g. the
+                course the question names), so near-identical questions
+                about different courses don't share answers
+        
+        Returns:
+            Cached answer dictionary, or None if nothing is similar enough
+        """
+        with self._lock:
+            answer = self._lookup(embedding, scope)
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return answer
+    
+    def _lookup(self, embedding, scope: Optional[str]) -> Optional[Dict]:
+        """Best unexpired match above the threshold (call with _lock held)"""
+        if not self._slots:
+            return None
+        scores = self._matrix @ self._unit(embedding)
+        scores[~self._valid] = -np.inf
+        now = time.time()
+        for slot in np.argsort(-scores):
+            if scores[slot] < self.threshold:
+                return None
+            slot = int(slot)
+            expires_at, entry_scope, answer = self._slots[slot]
+            if expires_at < now:
+                self._free(slot)
+                continue
+            if entry_scope != scope:
+                continue
+            self._slots.move_to_end(slot)
+            return dict(answer)
+        return None
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._slots)}
+    
+    def set(self, embedding, answer: Dict, scope: Optional[str] = None):
+        """
+        Cache an answer under a question embedding
+        
+        Args:
+            embedding: Question embedding
+            answer: Answer dictionary (answer, source_url)
+            scope: Scope the answer may be reused in (see get)
+        """
+        vector = self._unit(embedding)
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.maxsize, len(vector)), dtype=np.float32)
+            if len(self._slots) >= self.maxsize:
+                self._free(next(iter(self._slots)))
+            slot = int(np.argmin(self._valid))  # first free slot
+            self._matrix[slot] = vector
+            self._valid[slot] = True
+            self._slots[slot] = (time.time() + self.ttl, scope, dict(answer))
+    
+    def _free(self, slot: int):
+        """Drop a slot (call with _lock held)"""
+        del self._slots[slot]
+        self._valid[slot] = False
+
+
+class FAQAnswerCache:
+    """
+    Read-only answers to anticipated questions, matched by embedding
+    
+    Built offline by scripts/build_faq_cache.py as two files: <path>.npy with
+    the unit-length question embeddings (memory-mapped, not read into
+    memory) and <path>.json with one {question, scope, answer, source_url}
+    entry per row. Entries don't expire; rebuild after re-scraping.
+    """
+    
+    def __init__(self, path: str = "data/processed/faq_cache", threshold: float = 0.88):
+        """
+        Initialize FAQ answer cache (empty if the files don't exist)
+        
+        Args:
+            path: Path of the cache files, without extension
+            threshold: Minimum cosine similarity for a hit
+        """
+        self.path = Path(path)
+        self.threshold = threshold
+        self._matrix = None
+        self._entries: List[Dict] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+        vectors_file = self.path.with_suffix(".npy")
+        entries_file = self.path.with_suffix(".json")
+        if not (vectors_file.exists() and entries_file.exists()):
+            return
+        try:
+            matrix = np.load(vectors_file, mmap_mode="r")
+            entries = orjson.loads(entries_file.read_bytes())
+            if len(entries) != len(matrix):
+                raise ValueError(f"{len(matrix)} embeddings but {len(entries)} answers")
+            self._matrix, self._entries = matrix, entries
+            print(f"Loaded {len(entries)} FAQ answers")
+        except Exception as e:
+            print(f"Warning: Could not load FAQ cache: {e}")
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    @staticmethod
+    def save(path: str, embeddings: np.ndarray, entries: List[Dict]):
+        """
+        Write the cache files
+        
+        Args:
+            path: Path of the cache files, without extension
+            embeddings: Question embeddings, one row per entry
+            entries: {question, scope, answer, source_url} dictionaries
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(entries), -1)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.save(path.with_suffix(".npy"), vectors)
+        path.with_suffix(".json").write_bytes(orjson.dumps(entries))
+    
+    def get(self, embedding, scope: Optional[str] = None) -> Optional[Dict]:
+        """
+        Look up the answer to the most similar anticipated question
+        
+        Args:
+            embedding: Question embedding
+            scope: Only match answers for the same course (see SemanticAnswerCache.get)
+        
+        Returns:
+            Answer dictionary (answer, source_url), or None if nothing is similar enough
+        """
+        answer = None
+        if self._entries:
+            scores = self._matrix @ SemanticAnswerCache._unit(embedding)
+            for row in np.argsort(-scores):
+                if scores[row] < self.threshold:
+                    break
+                entry = self._entries[int(row)]
+                if entry.get("scope") == scope:
+                    answer = {"answer": entry["answer"], "source_url": entry.get("source_url")}
+                    break
+        with self._lock:
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return answer
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
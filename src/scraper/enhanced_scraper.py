@@ -2,18 +2,68 @@
 Enhanced scraper that combines static HTML and Selenium-based scraping
 with data validation and consistency checks
 """
-from typing import Dict, Optional
-from src.scraper.scraper import NextleapScraper
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import re
+import threading
+from src.scraper.scraper import NextleapScraper, element_text
 from src.scraper.selenium_scraper import SeleniumScraper, SELENIUM_AVAILABLE
-import json
+
+
+# The amount in a cost string such as "₹49,999", "Rs. 49,999" or "49999.00"
+_COST_AMOUNT_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?")
 
 
 class EnhancedScraper(NextleapScraper):
-    """Enhanced scraper with JavaScript rendering and validation"""
+    """
+    Enhanced scraper with JavaScript rendering and validation
+    
+    The Selenium browser is started on first use and kept for later pages;
+    call close() (or use the scraper as a context manager) when done.
+    """
     
-    def __init__(self, base_url: str = "https://nextleap.app", use_selenium: bool = True):
-        super().__init__(base_url)
+    def __init__(self, base_url: str = "https://nextleap.app", use_selenium: bool = True, http_cache: Optional[str] = None,
+                 selenium_workers: int = 1, selenium_cache: Optional[str] = None):
+        """
+        Initialize enhanced scraper
+        
+        Args:
+            base_url: Site root
+            use_selenium: Render pages missing critical data with Selenium
+            http_cache: Optional SQLite file for an on-disk HTTP cache
+            selenium_workers: Browsers rendering pages in parallel when several
+                need Selenium (each worker thread drives its own Chrome)
+            selenium_cache: Optional directory for an on-disk cache of pages
+                rendered by Selenium (see SeleniumScraper)
+        """
+        super().__init__(base_url, http_cache=http_cache)
         self.use_selenium = use_selenium and SELENIUM_AVAILABLE
+        self.selenium_workers = selenium_workers
+        self.selenium_cache = selenium_cache
+        self._selenium_scraper = None  # started lazily by _selenium
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def close(self):
+        """Quit the Selenium browser, if one was started"""
+        if self._selenium_scraper:
+            self._selenium_scraper.close()
+            self._selenium_scraper = None
+    
+    def _selenium(self) -> Optional[SeleniumScraper]:
+        """The shared Selenium scraper, started on first call (None if Chrome can't start)"""
+        if self._selenium_scraper is None:
+            selenium_scraper = SeleniumScraper(headless=True, cache_dir=self.selenium_cache)
+            if not selenium_scraper.start():
+                # Don't try again for every page
+                self.use_selenium = False
+                return None
+            self._selenium_scraper = selenium_scraper
+        return self._selenium_scraper
         
     def scrape_course_page_enhanced(self, url: str) -> Dict:
         """
@@ -25,53 +75,138 @@ class EnhancedScraper(NextleapScraper):
         Returns:
             Dictionary with scraped course data
         """
-        # First, try static HTML scraping
-        soup = self.fetch_page(url)
-        if not soup:
+        return self.scrape_all([url])[0]
+    
+    def scrape_all(self, urls: List[str], max_workers: int = 8) -> List[Dict]:
+        """
+        Scrape several course pages, rendering with Selenium only where needed
+        
+        Static pages are fetched concurrently (network-bound), and their
+        text is searched for a missing start date or cost the same way a
+        rendered page's would be, since many pages render server-side. Pages
+        still missing critical data are then rendered one after another in the
+        scraper's browser, a few at a time in separate tabs, so Chrome starts
+        at most once per scraper (or, with selenium_workers > 1, in that
+        many browsers side by side).
+        
+        Args:
+            urls: Course page URLs
+            max_workers: Concurrent static fetches
+            
+        Returns:
+            Scraped course data per URL, in order ({} for pages that failed)
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(self._scrape_static, urls))
+        
+        # If Selenium is available and we're missing critical data, try Selenium
+        needs_selenium = [course_data for course_data in results if course_data and self._missing_critical(course_data)]
+        if self.use_selenium and needs_selenium:
+            try:
+                if self.selenium_workers > 1 and len(needs_selenium) > 1:
+                    self._fill_from_selenium_parallel(needs_selenium)
+                else:
+                    selenium_scraper = self._selenium()
+                    if selenium_scraper:
+                        self._fill_from_selenium_tabs(needs_selenium, selenium_scraper)
+            except Exception as e:
+                print(f"  ⚠ Selenium scraping failed: {e}")
+        
+        return results
+    
+    def _scrape_static(self, url: str) -> Dict:
+        """Scrape a course page from its static HTML ({} if it can't be fetched)"""
+        tree = self.fetch_page(url)
+        if tree is None:
             return {}
         
-        json_ld = self.extract_json_ld(soup)
+        json_ld = self.extract_json_ld(tree)
+        headings = self.find_headings(tree)
         
         # Extract data using base scraper
         course_data = {
             "source_url": url,
-            "cohort": self.extract_cohort_name(soup, url, json_ld),
-            "batch": self.extract_batch_info(soup, url, json_ld),
-            "curriculum": self.extract_curriculum(soup, url, json_ld),
-            "mentors_instructors": self.extract_mentors_instructors(soup, url, json_ld),
-            "placements": self.extract_placements(soup, url, json_ld),
-            "reviews": self.extract_reviews(soup, url, json_ld),
+            "cohort": self.extract_cohort_name(tree, url, json_ld),
+            "batch": self.extract_batch_info(tree, url, json_ld),
+            "curriculum": self.extract_curriculum(tree, url, json_ld, headings),
+            "mentors_instructors": self.extract_mentors_instructors(tree, url, json_ld, headings),
+            "placements": self.extract_placements(tree, url, headings),
+            "reviews": self.extract_reviews(tree, url, headings),
         }
         
-        # If Selenium is available and we're missing critical data, try Selenium
-        if self.use_selenium:
-            missing_critical = (
-                not course_data["batch"].get("batch_start_date") or
-                not course_data["batch"].get("cost")
-            )
-            
-            if missing_critical:
-                print(f"Missing critical data for {url}, trying Selenium...")
-                try:
-                    with SeleniumScraper(headless=True) as selenium_scraper:
-                        if selenium_scraper:
-                            selenium_soup = selenium_scraper.scrape_page(url, wait_time=5)
-                            if selenium_soup:
-                                dynamic_data = selenium_scraper.extract_dynamic_content(selenium_soup)
-                                
-                                # Update batch info with dynamic data
-                                if dynamic_data.get('batch_start_date') and not course_data["batch"].get("batch_start_date"):
-                                    course_data["batch"]["batch_start_date"] = dynamic_data['batch_start_date']
-                                    print(f"  ✓ Extracted start date: {dynamic_data['batch_start_date']}")
-                                
-                                if dynamic_data.get('cost') and not course_data["batch"].get("cost"):
-                                    course_data["batch"]["cost"] = dynamic_data['cost']
-                                    print(f"  ✓ Extracted cost: {dynamic_data['cost']}")
-                except Exception as e:
-                    print(f"  ⚠ Selenium scraping failed: {e}")
-        
+        # The rendered-text patterns often find what the base scraper missed
+        # in the static HTML already, without starting a browser
+        if self._missing_critical(course_data):
+            self._fill_batch(course_data, SeleniumScraper.extract_dynamic_content_from_text(element_text(tree)))
         return course_data
     
+    @staticmethod
+    def _missing_critical(course_data: Dict) -> bool:
+        """Whether the start date or cost is missing"""
+        return not course_data["batch"].get("batch_start_date") or not course_data["batch"].get("cost")
+    
+    def _fill_from_selenium_parallel(self, pages: List[Dict]):
+        """
+        Fill several pages from Selenium, one Chrome per worker thread
+        
+        A WebDriver must not be shared between threads, so each worker starts
+        its own browser on its first page; they are all quit at the end.
+        """
+        worker_state = threading.local()
+        started = []
+        started_lock = threading.Lock()
+        
+        def fill(course_data: Dict):
+            selenium_scraper = getattr(worker_state, "selenium_scraper", None)
+            if selenium_scraper is None:
+                selenium_scraper = worker_state.selenium_scraper = SeleniumScraper(headless=True, cache_dir=self.selenium_cache)
+                if selenium_scraper.start():
+                    with started_lock:
+                        started.append(selenium_scraper)
+            if selenium_scraper.driver:
+                self._fill_from_selenium(course_data, selenium_scraper)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.selenium_workers, len(pages))) as executor:
+                list(executor.map(fill, pages))
+        finally:
+            for selenium_scraper in started:
+                selenium_scraper.close()
+    
+    def _fill_from_selenium_tabs(self, pages: List[Dict], selenium_scraper: SeleniumScraper):
+        """Fill several pages from Selenium, loading them side by side in one browser's tabs"""
+        for course_data in pages:
+            print(f"Missing critical data for {course_data['source_url']}, trying Selenium...")
+        # Browser navigations share the static fetches' request throttle
+        page_texts = selenium_scraper.scrape_text_batch([course_data["source_url"] for course_data in pages],
+                                                        wait_time=5, throttle=self._throttle)
+        for course_data in pages:
+            page_text = page_texts.get(course_data["source_url"])
+            if page_text:
+                self._fill_batch(course_data, selenium_scraper.extract_dynamic_content_from_text(page_text))
+    
+    def _fill_from_selenium(self, course_data: Dict, selenium_scraper: SeleniumScraper):
+        """Fill a page's missing start date and cost from its rendered version"""
+        url = course_data["source_url"]
+        print(f"Missing critical data for {url}, trying Selenium...")
+        # Browser navigations share the static fetches' request throttle
+        self._throttle()
+        page_text = selenium_scraper.scrape_text(url, wait_time=5)
+        if not page_text:
+            return
+        self._fill_batch(course_data, selenium_scraper.extract_dynamic_content_from_text(page_text))
+    
+    @staticmethod
+    def _fill_batch(course_data: Dict, dynamic_data: Dict):
+        """Fill a page's missing start date and cost from extract_dynamic_content_from_text output"""
+        if dynamic_data.get('batch_start_date') and not course_data["batch"].get("batch_start_date"):
+            course_data["batch"]["batch_start_date"] = dynamic_data['batch_start_date']
+            print(f"  ✓ Extracted start date: {dynamic_data['batch_start_date']}")
+        
+        if dynamic_data.get('cost') and not course_data["batch"].get("cost"):
+            course_data["batch"]["cost"] = dynamic_data['cost']
+            print(f"  ✓ Extracted cost: {dynamic_data['cost']}")
+    
     def validate_and_fix_data(self, course_data: Dict) -> Dict:
         """
         Validate scraped data and fix inconsistencies
@@ -99,13 +234,12 @@ class EnhancedScraper(NextleapScraper):
             # Ensure cost is in correct format
             cost = batch["cost"]
             if isinstance(cost, str):
-                # Remove currency symbols and ensure proper formatting
-                cost_clean = cost.replace('₹', '').replace('Rs', '').replace(',', '').strip()
-                try:
-                    cost_int = int(float(cost_clean))
-                    batch["cost"] = f"{cost_int:,}"
-                except ValueError:
-                    print(f"  ⚠ Warning: Invalid cost format: {cost}")
+                # Drop currency symbols and separators in one scan and ensure proper formatting
+                match = _COST_AMOUNT_PATTERN.search(cost)
+                if match:
+                    batch["cost"] = f"{int(float(match.group(0).replace(',', ''))):,}"
+                else:
+                    print(f"  ⚠ Warning: Invalid cost format for {url}: {cost}")
         
         return course_data
 
@@ -1,7 +1,7 @@
 """
 List of Nextleap course pages to scrape
 """
-from typing import List
+from typing import Tuple
 
 # Base URL
 BASE_URL = "https://nextleap.app"
@@ -15,10 +15,14 @@ KNOWN_COURSES = [
     # Add more as discovered
 ]
 
-def get_all_course_urls() -> List[str]:
+# Full URLs, built once (duplicates dropped, order kept)
+_ALL_COURSE_URLS = tuple(dict.fromkeys(f"{BASE_URL}{path}" for path in KNOWN_COURSES))
+
+
+def get_all_course_urls() -> Tuple[str, ...]:
     """
-    Returns list of all course URLs to scrape.
+    Returns all course URLs to scrape (an immutable tuple).
     This will be expanded to discover courses dynamically.
     """
-    return [f"{BASE_URL}{path}" for path in KNOWN_COURSES]
+    return _ALL_COURSE_URLS
 
@@ -3,82 +3,380 @@ Web scraper for Nextleap course pages
 Extracts: cohorts, batches, curriculum, mentors, instructors, placements, reviews
 """
 import requests
-from bs4 import BeautifulSoup
-from typing import Dict, List, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
+from lxml import etree
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor
 import re
-import json
+import orjson
 from datetime import datetime
+from io import BytesIO
+import threading
 import time
 
+# requests-cache is optional; without it every run fetches pages afresh
+try:
+    from requests_cache import CachedSession
+    REQUESTS_CACHE_AVAILABLE = True
+except ImportError:
+    REQUESTS_CACHE_AVAILABLE = False
+
+
+# Hosts the scraper may fetch from
+ALLOWED_DOMAINS = frozenset({'nextleap.app', 'www.nextleap.app'})
+
+# Statuses worth retrying (rate limited or a transient server error)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Keep-alive connections per host; above any worker count used with the scraper
+POOL_MAXSIZE = 32
+
+# Patterns used on every page, compiled once at import
+_TITLE_BRAND_PATTERN = re.compile(r'\s*NextLeap\s*', re.I)
+_TITLE_PLACEMENT_PATTERN = re.compile(r'\s*with Placement Support\s*', re.I)
+
+# Prices next to a course fee, cost or price keyword, in one pass: the
+# keyword before the amount ("Course fee: ₹40,000") or after it ("40,000 fee")
+_PRICE_KEYWORDS = r'(?:course fee|enrollment fee|program fee|course cost|course price|cost|price|fee)'
+_PRICE_CONTEXT_PATTERN = re.compile(
+    rf'{_PRICE_KEYWORDS}[:\s]*[₹Rs\.\s]*(?P<after>\d{{1,3}}(?:,\d{{3}})*)'
+    rf'|[₹Rs\.\s]*(?P<before>\d{{1,3}}(?:,\d{{3}})*)\s*{_PRICE_KEYWORDS}',
+    re.IGNORECASE
+)
+# Words near a price that make it more (or less) likely to be the course fee
+_PRICE_SUBJECT_PATTERN = re.compile(r'course|program|enrollment', re.IGNORECASE)
+_PRICE_FEE_PATTERN = re.compile(r'fee|cost|price', re.IGNORECASE)
+_PRICE_NEGATIVE_PATTERN = re.compile(r'discount|offer|save|was|original', re.IGNORECASE)
+
+# Start dates like "Jan 3", "January 3", "Jan 3, 2026", "starts from", "next batch starts"
+_DATE_PATTERNS = [
+    re.compile(r'(?:starts?|batch starts?|next batch|begins?|commences?)\s+(?:from|on)?\s*(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}(?:,\s+\d{4})?', re.IGNORECASE),
+    re.compile(r'(?:starts?|batch starts?|next batch|begins?|commences?)\s+(?:from|on)?\s*(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2}(?:,\s+\d{4})?', re.IGNORECASE),
+    re.compile(r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}(?:,\s+\d{4})?(?:\s+(?:starts?|batch))', re.IGNORECASE),
+]
+# Label words stripped from a matched start date
+_DATE_LABEL_PATTERN = re.compile(r'(?:starts?|batch starts?|next batch|begins?|commences?|from|on)\s*', re.I)
+
+# General price search (fallback)
+_COST_PATTERNS = [
+    re.compile(r'[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'),
+    re.compile(r'(\d{1,3}(?:,\d{3})*)\s*(?:INR|Rs|₹)'),
+]
+
+# EMI plans: amount alone, or amount and duration in either order
+_EMI_PATTERNS = [
+    re.compile(r'EMI\s+(?:of|starting\s+from|from)?\s*[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)\s*(?:per\s+month|/month|monthly)', re.IGNORECASE),
+    re.compile(r'[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)\s*(?:per\s+month|/month|monthly)\s*EMI', re.IGNORECASE),
+    re.compile(r'EMI\s+[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)\s*(?:for|over)\s*(\d+)\s*(?:months?|installments?)', re.IGNORECASE),
+    re.compile(r'(\d+)\s*(?:months?|installments?)\s*EMI\s+[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)', re.IGNORECASE),
+    re.compile(r'EMI\s+[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)\s*(?:×|x)\s*(\d+)', re.IGNORECASE),
+]
+
+# EMI mentions anywhere in the page, and the monthly amount near one
+_EMI_TEXT_PATTERN = re.compile(r'EMI', re.I)
+_EMI_AMOUNT_PATTERN = re.compile(r'[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)\s*(?:per\s+month|/month|monthly)', re.I)
+
+# Section headings, and the lowercase keywords that mark each section
+# (keywords are tried in order)
+HEADING_TAGS = frozenset(('h1', 'h2', 'h3', 'h4'))
+_CURRICULUM_HEADING_KEYWORDS = ('curriculum', 'syllabus', 'course content', 'what you will learn', 'modules')
+_MENTOR_HEADING_KEYWORDS = ('mentor', 'instructor', 'teacher', 'faculty', 'expert')
+_PLACEMENT_HEADING_KEYWORDS = ('placement', 'job', 'career', 'hiring', 'companies', 'recruitment')
+_REVIEW_HEADING_KEYWORDS = ('review', 'testimonial', 'feedback', 'student', 'alumni')
+
+# Tags whose text a section's sibling walk collects
+_LIST_TAGS = frozenset(('ul', 'ol'))
+_MENTOR_TEXT_TAGS = frozenset(('p', 'div', 'span'))
+_PLACEMENT_TEXT_TAGS = frozenset(('p', 'div', 'ul', 'ol'))
+_REVIEW_TEXT_TAGS = frozenset(('p', 'div', 'blockquote'))
+
+# XPath queries, compiled once. Visible text leaves out comments and
+# script, style and template contents
+_HEADINGS_XPATH = etree.XPath('//h1|//h2|//h3|//h4')
+_VISIBLE_TEXT_XPATH = etree.XPath('.//text()[not(ancestor::script or ancestor::style or ancestor::template)]', smart_strings=False)
+_ALL_TEXT_XPATH = etree.XPath('//text()')
+_JSON_LD_XPATH = etree.XPath('//script[@type="application/ld+json"]')
+
+
+def element_text(element, strip: bool = False) -> str:
+    """
+    Visible text of an element and its descendants
+    
+    Args:
+        element: lxml element
+        strip: Strip each text node and drop empty ones before joining
+    """
+    strings = _VISIBLE_TEXT_XPATH(element)
+    if strip:
+        return ''.join(stripped for stripped in (string.strip() for string in strings) if stripped)
+    return ''.join(strings)
+
+
+def _single_string(element) -> Optional[str]:
+    """An element's text if it is its only content, looking through a single child element"""
+    if len(element) == 0:
+        return element.text
+    if len(element) == 1 and not element.text and not element[0].tail and isinstance(element[0].tag, str):
+        return _single_string(element[0])
+    return None
+
 
 class NextleapScraper:
     """Scraper for Nextleap course pages"""
     
-    def __init__(self, base_url: str = "https://nextleap.app"):
+    def __init__(self, base_url: str = "https://nextleap.app", min_request_interval: float = 0.25, max_retries: int = 3,
+                 http_cache: Optional[str] = None):
+        """
+        Initialize scraper
+        
+        Args:
+            base_url: Site root
+            min_request_interval: Minimum seconds between the starts of any two
+                requests, across all worker threads (be respectful with requests)
+            max_retries: Retries of a page fetch on 429/5xx responses
+            http_cache: Optional SQLite file for an on-disk HTTP cache
+                (needs requests-cache); re-runs revalidate pages with
+                ETag/Last-Modified and unchanged pages come back as 304s
+        """
         self.base_url = base_url
-        self.session = requests.Session()
+        if http_cache and REQUESTS_CACHE_AVAILABLE:
+            self.session = CachedSession(http_cache, backend='sqlite', expire_after=3600, cache_control=True,
+                                         allowable_methods=('GET', 'HEAD'))
+        else:
+            if http_cache:
+                print("Warning: requests-cache is not installed, HTTP cache disabled")
+            self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         })
+        # Connection errors and dropped reads are retried by the adapter;
+        # 429/5xx responses are retried in fetch_page, under the throttle
+        retry = Retry(total=max_retries, connect=max_retries, read=max_retries,
+                      backoff_factor=0.5, allowed_methods=('GET', 'HEAD'))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.valid_urls = set()
+        self._url_status: Dict[str, bool] = {}  # url -> validate_url result
+        self._url_status_lock = threading.Lock()
+        self.min_request_interval = min_request_interval
+        self.max_retries = max_retries
+        self._throttle_lock = threading.Lock()
+        self._next_request_at = 0.0
+    
+    def _throttle(self):
+        """Wait for this request's slot so requests start min_request_interval apart"""
+        with self._throttle_lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_request_at)
+            self._next_request_at = start_at + self.min_request_interval
+        if start_at > now:
+            time.sleep(start_at - now)
+    
+    def _pause(self, seconds: float):
+        """Hold back every worker's next request for at least seconds"""
+        if seconds <= 0:
+            return
+        with self._throttle_lock:
+            self._next_request_at = max(self._next_request_at, time.monotonic() + seconds)
+    
+    @staticmethod
+    def _rate_limit_delay(response: requests.Response) -> float:
+        """Seconds until the server's rate limit window resets, if it says the quota is used up"""
+        remaining = response.headers.get('X-RateLimit-Remaining', '')
+        reset = response.headers.get('X-RateLimit-Reset', '')
+        if remaining != '0' or not reset.isdigit():
+            return 0.0
+        reset = float(reset)
+        # Either seconds to wait or a Unix timestamp, depending on the server
+        return reset - time.time() if reset > 1e9 else reset
+    
+    @staticmethod
+    def _retry_delay(response: requests.Response, attempt: int) -> float:
+        """Seconds to wait before retrying: the server's Retry-After, else exponential backoff"""
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            return float(retry_after)
+        return float(2 ** attempt)
+    
+    @staticmethod
+    def find_headings(tree: lxml.html.HtmlElement) -> List[Tuple[str, lxml.html.HtmlElement]]:
+        """
+        Index of the page's h1-h4 headings, shared by the section extractors
+        
+        One DOM walk per page. Only headings whose text is their whole
+        content are indexed (looking through a single wrapping tag such as
+        <span>), so headings with several parts never match a keyword.
         
+        Returns:
+            (lowercased heading text, heading element) pairs in document order
+        """
+        headings = []
+        for heading in _HEADINGS_XPATH(tree):
+            text = _single_string(heading)
+            if text:
+                headings.append((text.lower(), heading))
+        return headings
+    
+    @staticmethod
+    def _headings_matching(headings: List[Tuple[str, lxml.html.HtmlElement]], keyword: str) -> List:
+        """Headings (from find_headings) whose text contains keyword"""
+        return [heading for text, heading in headings if keyword in text]
+    
+    @staticmethod
+    def _domain_ok(url: str) -> bool:
+        """Whether URL is on a Nextleap domain (no network)"""
+        try:
+            return urlparse(url).netloc in ALLOWED_DOMAINS
+        except ValueError:
+            return False
+    
+    def _record_url_status(self, url: str, ok: bool):
+        """Cache a URL's validation result"""
+        with self._url_status_lock:
+            self._url_status[url] = ok
+            if ok:
+                self.valid_urls.add(url)
+    
     def validate_url(self, url: str) -> bool:
         """
         Validate if URL is a valid Nextleap URL
+        
+        Checks the domain, then that the page is accessible with a HEAD
+        request. Results (success and failure) are cached per URL, so each
+        URL is checked over the network at most once.
         """
+        if not self._domain_ok(url):
+            return False
+        with self._url_status_lock:
+            cached = self._url_status.get(url)
+        if cached is not None:
+            return cached
+        
         try:
-            parsed = urlparse(url)
-            # Check if URL belongs to nextleap.app domain
-            if parsed.netloc not in ['nextleap.app', 'www.nextleap.app']:
-                return False
-            
             # Check if URL is accessible
+            self._throttle()
             response = self.session.head(url, timeout=10, allow_redirects=True)
-            if response.status_code == 200:
-                self.valid_urls.add(url)
-                return True
-            return False
+            self._pause(self._rate_limit_delay(response))
+            ok = response.status_code == 200
         except Exception as e:
             print(f"Error validating URL {url}: {e}")
-            return False
+            ok = False
+        self._record_url_status(url, ok)
+        return ok
     
-    def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
+    def _get(self, url: str) -> Optional[requests.Response]:
         """
-        Fetch and parse a webpage
+        GET a Nextleap page, retrying 429/5xx responses
+        
+        Args:
+            url: Page URL
+            
+        Returns:
+            Successful response, or None if the page can't be fetched
         """
-        if not self.validate_url(url):
+        # Domain check only: the GET's status code says whether the page is
+        # accessible, so a HEAD first would just add a round-trip
+        if not self._domain_ok(url):
             print(f"Invalid URL: {url}")
             return None
             
         try:
-            response = self.session.get(url, timeout=15)
+            for attempt in range(self.max_retries + 1):
+                self._throttle()
+                response = self.session.get(url, timeout=15)
+                self._pause(self._rate_limit_delay(response))
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    break
+                # Back off all workers, not just this one: the server is
+                # overloaded or rate limiting the whole scrape
+                delay = self._retry_delay(response, attempt)
+                print(f"  {response.status_code} from {url}, retrying in {delay:.0f}s")
+                self._pause(delay)
+            self._record_url_status(url, response.ok)
             response.raise_for_status()
-            return BeautifulSoup(response.content, 'lxml')
+            return response
         except requests.RequestException as e:
             print(f"Error fetching {url}: {e}")
             return None
     
-    def extract_json_ld(self, soup: BeautifulSoup) -> List[Dict]:
+    @staticmethod
+    def _encoding(response: requests.Response) -> str:
+        """The charset the server names, else UTF-8 (lxml would read undeclared bytes as Latin-1 and mangle ₹)"""
+        has_charset = 'charset=' in response.headers.get('Content-Type', '').lower()
+        return response.encoding if has_charset else 'utf-8'
+    
+    def fetch_page(self, url: str) -> Optional[lxml.html.HtmlElement]:
+        """
+        Fetch and parse a webpage
+        
+        Args:
+            url: Page URL
+            
+        Returns:
+            Root element of the parsed page, or None if it can't be fetched
+        """
+        response = self._get(url)
+        if response is None:
+            return None
+        try:
+            return lxml.html.fromstring(response.content.decode(self._encoding(response), errors='replace'))
+        except (etree.LxmlError, ValueError, LookupError) as e:
+            print(f"Error parsing {url}: {e}")
+            return None
+    
+    def fetch_links(self, url: str) -> List[str]:
+        """
+        Fetch a webpage and return its link targets, without keeping its tree
+        
+        The page is stream-parsed and each element is emptied as soon as it
+        has been read, so peak memory stays small however large the page is.
+        
+        Args:
+            url: Page URL
+            
+        Returns:
+            href of every link, in document order ([] if the page can't be fetched)
+        """
+        response = self._get(url)
+        if response is None:
+            return []
+        hrefs = []
+        try:
+            for _, element in etree.iterparse(BytesIO(response.content), events=('end',), html=True,
+                                              encoding=self._encoding(response)):
+                if element.tag == 'a':
+                    href = element.get('href')
+                    if href:
+                        hrefs.append(href)
+                element.clear(keep_tail=True)
+        except (etree.LxmlError, LookupError) as e:
+            print(f"Error parsing {url}: {e}")
+        return hrefs
+    
+    def extract_json_ld(self, tree: lxml.html.HtmlElement) -> List[Dict]:
         """
         Extract JSON-LD structured data from page
         """
         json_ld_data = []
-        scripts = soup.find_all('script', type='application/ld+json')
+        scripts = _JSON_LD_XPATH(tree)
         
         for script in scripts:
             try:
-                data = json.loads(script.string)
+                data = orjson.loads(script.text)
                 if isinstance(data, list):
                     json_ld_data.extend(data)
                 else:
                     json_ld_data.append(data)
-            except (json.JSONDecodeError, AttributeError):
+            except (orjson.JSONDecodeError, TypeError):  # TypeError: empty script tag
                 continue
         
         return json_ld_data
     
-    def extract_cohort_name(self, soup: BeautifulSoup, url: str, json_ld: List[Dict] = None) -> Dict:
+    def extract_cohort_name(self, tree: lxml.html.HtmlElement, url: str, json_ld: List[Dict] = None) -> Dict:
         """
         Extract cohort/course name
         """
@@ -101,12 +399,12 @@ class NextleapScraper:
         # Fallback to HTML parsing
         if not data["cohort_name"]:
             # Try title tag
-            title_tag = soup.find('title')
-            if title_tag:
-                title_text = title_tag.get_text(strip=True)
+            title_tag = tree.find('.//title')
+            if title_tag is not None:
+                title_text = element_text(title_tag, strip=True)
                 # Clean up title (remove "NextLeap" and "with Placement Support" etc)
-                title_text = re.sub(r'\s*NextLeap\s*', '', title_text, flags=re.I)
-                title_text = re.sub(r'\s*with Placement Support\s*', '', title_text, flags=re.I)
+                title_text = _TITLE_BRAND_PATTERN.sub('', title_text)
+                title_text = _TITLE_PLACEMENT_PATTERN.sub('', title_text)
                 title_text = title_text.strip()
                 if title_text:
                     data["cohort_name"] = title_text
@@ -114,9 +412,9 @@ class NextleapScraper:
             # Try h1 or h2 in main content
             if not data["cohort_name"]:
                 for tag in ['h1', 'h2']:
-                    element = soup.find(tag)
-                    if element:
-                        text = element.get_text(strip=True)
+                    element = tree.find(f'.//{tag}')
+                    if element is not None:
+                        text = element_text(element, strip=True)
                         if text and len(text) > 5 and 'NextLeap' not in text:
                             data["cohort_name"] = text
                             break
@@ -124,21 +422,21 @@ class NextleapScraper:
         # Extract description from HTML if not found in JSON-LD
         if not data["cohort_description"]:
             # Look for meta description
-            meta_desc = soup.find('meta', property='og:description')
-            if meta_desc and meta_desc.get('content'):
-                data["cohort_description"] = meta_desc['content']
+            meta_desc = tree.find('.//meta[@property="og:description"]')
+            if meta_desc is not None and meta_desc.get('content'):
+                data["cohort_description"] = meta_desc.get('content')
             else:
                 # Look for first meaningful paragraph
-                paragraphs = soup.find_all('p')
+                paragraphs = tree.findall('.//p')
                 for p in paragraphs[:5]:
-                    text = p.get_text(strip=True)
+                    text = element_text(p, strip=True)
                     if text and len(text) > 50 and 'NextLeap' in text:
                         data["cohort_description"] = text
                         break
         
         return data
     
-    def extract_batch_info(self, soup: BeautifulSoup, url: str, json_ld: List[Dict] = None) -> Dict:
+    def extract_batch_info(self, tree: lxml.html.HtmlElement, url: str, json_ld: List[Dict] = None, page_text: Optional[str] = None) -> Dict:
         """
         Extract batch information: start date, cost, course type (live/self-paced)
         """
@@ -151,58 +449,29 @@ class NextleapScraper:
         
         # Extract cost from page text first (more accurate, may be updated dynamically)
         # Look for prices in visible text before checking JSON-LD
-        page_text = soup.get_text()
-        
-        # Look for prices in context of course fee, cost, price keywords
-        # Prioritize patterns that are more specific to course pricing
-        price_context_patterns = [
-            # Most specific: course fee, enrollment fee, etc.
-            r'(?:course fee|enrollment fee|program fee|course cost|course price)[:\s]*[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)',
-            # Specific cost/price mentions
-            r'(?:cost|price|fee)[:\s]*[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)',
-            # Price before keywords
-            r'[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)\s*(?:course fee|enrollment fee|program fee|cost|price|fee)',
-        ]
-        
-        # Collect all potential prices with their context
-        candidate_prices = []
-        
-        for pattern in price_context_patterns:
-            matches = re.finditer(pattern, page_text, re.IGNORECASE)
-            for match in matches:
-                price_str = match.group(1).replace(',', '')
-                try:
-                    price = float(price_str)
-                    if 20000 <= price <= 60000:  # Reasonable range for course fees
-                        # Get context around the match
-                        start = max(0, match.start() - 50)
-                        end = min(len(page_text), match.end() + 50)
-                        context = page_text[start:end].lower()
-                        
-                        # Score based on context relevance
-                        score = 0
-                        if 'course' in context or 'program' in context or 'enrollment' in context:
-                            score += 3
-                        if 'fee' in context or 'cost' in context or 'price' in context:
-                            score += 2
-                        # Penalize if it's clearly about something else
-                        if any(word in context for word in ['discount', 'offer', 'save', 'was', 'original']):
-                            score -= 2
-                        
-                        candidate_prices.append({
-                            'price': price,
-                            'formatted': f"{int(price):,}",
-                            'score': score,
-                            'context': context
-                        })
-                except ValueError:
-                    continue
-        
-        # Sort by score (highest first) and take the best match
-        if candidate_prices:
-            candidate_prices.sort(key=lambda x: x['score'], reverse=True)
-            data["cost"] = candidate_prices[0]['formatted']
-            print(f"  Extracted cost: ₹{data['cost']} (score: {candidate_prices[0]['score']})")
+        if page_text is None:
+            page_text = element_text(tree)
+        
+        # Look for prices in context of course fee, cost, price keywords and
+        # keep the best scoring one (the first of equals)
+        best_price, best_score = None, None
+        for match in _PRICE_CONTEXT_PATTERN.finditer(page_text):
+            price = int((match.group('after') or match.group('before')).replace(',', ''))
+            if not 20000 <= price <= 60000:  # Reasonable range for course fees
+                continue
+            # Score based on relevance of the text around the match (searched
+            # in place, without slicing or lowercasing a copy)
+            start, end = max(0, match.start() - 50), match.end() + 50
+            score = (3 * bool(_PRICE_SUBJECT_PATTERN.search(page_text, start, end))
+                     + 2 * bool(_PRICE_FEE_PATTERN.search(page_text, start, end))
+                     # Penalize if it's clearly about something else
+                     - 2 * bool(_PRICE_NEGATIVE_PATTERN.search(page_text, start, end)))
+            if best_score is None or score > best_score:
+                best_price, best_score = price, score
+        
+        if best_price is not None:
+            data["cost"] = f"{best_price:,}"
+            print(f"  Extracted cost: ₹{data['cost']} (score: {best_score})")
         
         # Extract from JSON-LD if not found in text (fallback, but JSON-LD may be outdated)
         if not data["cost"] and json_ld:
@@ -229,18 +498,12 @@ class NextleapScraper:
         
         # Extract start date - look for patterns like "Jan 3", "January 3", "Jan 3, 2026"
         # Also look for "starts from", "next batch starts"
-        date_patterns = [
-            r'(?:starts?|batch starts?|next batch|begins?|commences?)\s+(?:from|on)?\s*(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}(?:,\s+\d{4})?',
-            r'(?:starts?|batch starts?|next batch|begins?|commences?)\s+(?:from|on)?\s*(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2}(?:,\s+\d{4})?',
-            r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}(?:,\s+\d{4})?(?:\s+(?:starts?|batch))',
-        ]
-        
-        for pattern in date_patterns:
-            matches = re.finditer(pattern, page_text, re.IGNORECASE)
+        for pattern in _DATE_PATTERNS:
+            matches = pattern.finditer(page_text)
             for match in matches:
                 date_str = match.group(0)
                 # Clean up the date string
-                date_str = re.sub(r'(?:starts?|batch starts?|next batch|begins?|commences?|from|on)\s*', '', date_str, flags=re.I)
+                date_str = _DATE_LABEL_PATTERN.sub('', date_str)
                 date_str = date_str.strip()
                 if date_str:
                     data["batch_start_date"] = date_str
@@ -250,13 +513,8 @@ class NextleapScraper:
         
         # Extract cost from HTML if not found yet (fallback to general price search)
         if not data["cost"]:
-            cost_patterns = [
-                r'[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-                r'(\d{1,3}(?:,\d{3})*)\s*(?:INR|Rs|₹)'
-            ]
-            
-            for pattern in cost_patterns:
-                matches = re.findall(pattern, page_text)
+            for pattern in _COST_PATTERNS:
+                matches = pattern.findall(page_text)
                 if matches:
                     # Filter reasonable price ranges (typically 20k-60k for courses)
                     for match in matches:
@@ -291,13 +549,14 @@ class NextleapScraper:
         
         return data
     
-    def extract_payment_options(self, soup: BeautifulSoup, url: str) -> Dict:
+    def extract_payment_options(self, tree: lxml.html.HtmlElement, url: str, page_text: Optional[str] = None) -> Dict:
         """
         Extract payment options including EMI plans
         
         Args:
-            soup: BeautifulSoup object
+            tree: Parsed page (fetch_page)
             url: Source URL
+            page_text: element_text(tree), if the caller already has it
             
         Returns:
             Dictionary with payment/EMI information
@@ -308,19 +567,12 @@ class NextleapScraper:
             "source_url": url
         }
         
-        page_text = soup.get_text()
+        if page_text is None:
+            page_text = element_text(tree)
         
         # Extract EMI information - multiple patterns
-        emi_patterns = [
-            r'EMI\s+(?:of|starting\s+from|from)?\s*[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)\s*(?:per\s+month|/month|monthly)',
-            r'[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)\s*(?:per\s+month|/month|monthly)\s*EMI',
-            r'EMI\s+[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)\s*(?:for|over)\s*(\d+)\s*(?:months?|installments?)',
-            r'(\d+)\s*(?:months?|installments?)\s*EMI\s+[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)',
-            r'EMI\s+[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)\s*(?:×|x)\s*(\d+)',
-        ]
-        
-        for pattern in emi_patterns:
-            matches = re.finditer(pattern, page_text, re.IGNORECASE)
+        for pattern in _EMI_PATTERNS:
+            matches = pattern.finditer(page_text)
             for match in matches:
                 groups = match.groups()
                 if len(groups) == 1:
@@ -355,13 +607,16 @@ class NextleapScraper:
                         continue
         
         # Also look for EMI in structured data (JSON-LD, data attributes, etc.)
-        # Check for EMI in any data attributes or structured content
-        emi_elements = soup.find_all(string=re.compile(r'EMI', re.I))
-        for elem in emi_elements:
-            if elem.parent:
-                parent_text = elem.parent.get_text()
+        # Check for EMI in any data attributes or structured content; only
+        # needed (it walks every text node) when the page text had no plans
+        emi_strings = [string for string in _ALL_TEXT_XPATH(tree) if _EMI_TEXT_PATTERN.search(string)] if not data["emi_options"] else []
+        for string in emi_strings:
+            # A tail string's parent is the element it follows, not the one containing it
+            parent = string.getparent().getparent() if string.is_tail else string.getparent()
+            if parent is not None:
+                parent_text = element_text(parent)
                 # Extract EMI amount from parent context
-                emi_match = re.search(r'[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)\s*(?:per\s+month|/month|monthly)', parent_text, re.I)
+                emi_match = _EMI_AMOUNT_PATTERN.search(parent_text)
                 if emi_match:
                     amount = emi_match.group(1).replace(',', '')
                     try:
@@ -374,7 +629,7 @@ class NextleapScraper:
         
         return data
     
-    def extract_curriculum(self, soup: BeautifulSoup, url: str, json_ld: List[Dict] = None) -> Dict:
+    def extract_curriculum(self, tree: lxml.html.HtmlElement, url: str, json_ld: List[Dict] = None, headings: Optional[List] = None) -> Dict:
         """
         Extract curriculum information
         """
@@ -406,37 +661,30 @@ class NextleapScraper:
         
         # Fallback to HTML parsing if JSON-LD didn't provide curriculum
         if not data["curriculum"]:
-            # Look for curriculum sections
-            curriculum_keywords = ['curriculum', 'syllabus', 'course content', 'what you will learn', 'modules']
+            if headings is None:
+                headings = self.find_headings(tree)
             
             # Find sections that might contain curriculum
-            for keyword in curriculum_keywords:
+            for keyword in _CURRICULUM_HEADING_KEYWORDS:
                 # Look for headings containing these keywords
-                headings = soup.find_all(['h1', 'h2', 'h3', 'h4'], string=re.compile(keyword, re.I))
-                
-                for heading in headings:
+                for heading in self._headings_matching(headings, keyword):
                     # Get content after this heading
                     curriculum_section = []
-                    current = heading.next_sibling
                     
-                    while current:
-                        if hasattr(current, 'name'):
-                            if current.name in ['h1', 'h2', 'h3', 'h4']:
-                                break
-                            if current.name in ['ul', 'ol']:
-                                items = current.find_all('li')
-                                for item in items:
-                                    text = item.get_text(strip=True)
-                                    if text:
-                                        curriculum_section.append(text)
-                            elif current.name == 'p':
-                                text = current.get_text(strip=True)
+                    for current in heading.itersiblings():
+                        tag = current.tag
+                        if tag in HEADING_TAGS:
+                            break
+                        if tag in _LIST_TAGS:
+                            items = current.iter('li')
+                            for item in items:
+                                text = element_text(item, strip=True)
                                 if text:
                                     curriculum_section.append(text)
-                        elif isinstance(current, str) and current.strip():
-                            curriculum_section.append(current.strip())
-                        
-                        current = current.next_sibling
+                        elif tag == 'p':
+                            text = element_text(current, strip=True)
+                            if text:
+                                curriculum_section.append(text)
                     
                     if curriculum_section:
                         data["curriculum"] = curriculum_section
@@ -448,11 +696,11 @@ class NextleapScraper:
             
             # If no structured curriculum found, look for lists
             if not data["curriculum"]:
-                lists = soup.find_all(['ul', 'ol'])
+                lists = tree.iter('ul', 'ol')
                 for list_elem in lists:
-                    items = list_elem.find_all('li')
+                    items = list(list_elem.iter('li'))
                     if len(items) >= 3:  # Likely a curriculum list
-                        curriculum_items = [item.get_text(strip=True) for item in items if item.get_text(strip=True)]
+                        curriculum_items = [text for text in (element_text(item, strip=True) for item in items) if text]
                         if curriculum_items:
                             data["curriculum"] = curriculum_items
                             data["curriculum_text"] = '\n'.join(curriculum_items)
@@ -460,7 +708,7 @@ class NextleapScraper:
         
         return data
     
-    def extract_mentors_instructors(self, soup: BeautifulSoup, url: str, json_ld: List[Dict] = None) -> Dict:
+    def extract_mentors_instructors(self, tree: lxml.html.HtmlElement, url: str, json_ld: List[Dict] = None, headings: Optional[List] = None) -> Dict:
         """
         Extract mentors and instructors information
         """
@@ -488,28 +736,23 @@ class NextleapScraper:
         # Fallback to HTML parsing
         if not data["instructors"]:
             # Look for mentor/instructor sections
-            keywords = ['mentor', 'instructor', 'teacher', 'faculty', 'expert']
-            
-            page_text = soup.get_text()
             mentor_sections = []
+            if headings is None:
+                headings = self.find_headings(tree)
             
-            for keyword in keywords:
+            for keyword in _MENTOR_HEADING_KEYWORDS:
                 # Find headings with these keywords
-                headings = soup.find_all(['h1', 'h2', 'h3', 'h4'], string=re.compile(keyword, re.I))
-                
-                for heading in headings:
+                for heading in self._headings_matching(headings, keyword):
                     section_text = []
-                    current = heading.next_sibling
                     
-                    while current:
-                        if hasattr(current, 'name'):
-                            if current.name in ['h1', 'h2', 'h3', 'h4']:
-                                break
-                            if current.name in ['p', 'div', 'span']:
-                                text = current.get_text(strip=True)
-                                if text:
-                                    section_text.append(text)
-                        current = current.next_sibling
+                    for current in heading.itersiblings():
+                        tag = current.tag
+                        if tag in HEADING_TAGS:
+                            break
+                        if tag in _MENTOR_TEXT_TAGS:
+                            text = element_text(current, strip=True)
+                            if text:
+                                section_text.append(text)
                     
                     if section_text:
                         mentor_sections.extend(section_text)
@@ -534,7 +777,7 @@ class NextleapScraper:
         
         return data
     
-    def extract_placements(self, soup: BeautifulSoup, url: str) -> Dict:
+    def extract_placements(self, tree: lxml.html.HtmlElement, url: str, headings: Optional[List] = None) -> Dict:
         """
         Extract placement information
         """
@@ -545,26 +788,22 @@ class NextleapScraper:
         }
         
         # Look for placement-related keywords
-        keywords = ['placement', 'job', 'career', 'hiring', 'companies', 'recruitment']
-        
         placement_sections = []
+        if headings is None:
+            headings = self.find_headings(tree)
         
-        for keyword in keywords:
-            headings = soup.find_all(['h1', 'h2', 'h3', 'h4'], string=re.compile(keyword, re.I))
-            
-            for heading in headings:
+        for keyword in _PLACEMENT_HEADING_KEYWORDS:
+            for heading in self._headings_matching(headings, keyword):
                 section_text = []
-                current = heading.next_sibling
                 
-                while current:
-                    if hasattr(current, 'name'):
-                        if current.name in ['h1', 'h2', 'h3', 'h4']:
-                            break
-                        if current.name in ['p', 'div', 'ul', 'ol']:
-                            text = current.get_text(strip=True)
-                            if text and len(text) > 20:  # Meaningful content
-                                section_text.append(text)
-                    current = current.next_sibling
+                for current in heading.itersiblings():
+                    tag = current.tag
+                    if tag in HEADING_TAGS:
+                        break
+                    if tag in _PLACEMENT_TEXT_TAGS:
+                        text = element_text(current, strip=True)
+                        if text and len(text) > 20:  # Meaningful content
+                            section_text.append(text)
                 
                 if section_text:
                     placement_sections.extend(section_text)
@@ -575,7 +814,7 @@ class NextleapScraper:
         
         return data
     
-    def extract_reviews(self, soup: BeautifulSoup, url: str) -> Dict:
+    def extract_reviews(self, tree: lxml.html.HtmlElement, url: str, headings: Optional[List] = None) -> Dict:
         """
         Extract reviews/testimonials
         """
@@ -586,34 +825,30 @@ class NextleapScraper:
         }
         
         # Look for review-related keywords
-        keywords = ['review', 'testimonial', 'feedback', 'student', 'alumni']
-        
         review_sections = []
+        if headings is None:
+            headings = self.find_headings(tree)
         
-        for keyword in keywords:
-            headings = soup.find_all(['h1', 'h2', 'h3', 'h4'], string=re.compile(keyword, re.I))
-            
-            for heading in headings:
+        for keyword in _REVIEW_HEADING_KEYWORDS:
+            for heading in self._headings_matching(headings, keyword):
                 section_text = []
-                current = heading.next_sibling
                 
-                while current:
-                    if hasattr(current, 'name'):
-                        if current.name in ['h1', 'h2', 'h3', 'h4']:
-                            break
-                        if current.name in ['p', 'div', 'blockquote']:
-                            text = current.get_text(strip=True)
-                            if text and len(text) > 30:  # Meaningful review
-                                section_text.append(text)
-                    current = current.next_sibling
+                for current in heading.itersiblings():
+                    tag = current.tag
+                    if tag in HEADING_TAGS:
+                        break
+                    if tag in _REVIEW_TEXT_TAGS:
+                        text = element_text(current, strip=True)
+                        if text and len(text) > 30:  # Meaningful review
+                            section_text.append(text)
                 
                 if section_text:
                     review_sections.extend(section_text)
         
         # Also look for blockquotes which often contain testimonials
-        blockquotes = soup.find_all('blockquote')
+        blockquotes = tree.iter('blockquote')
         for quote in blockquotes:
-            text = quote.get_text(strip=True)
+            text = element_text(quote, strip=True)
             if text and len(text) > 30:
                 review_sections.append(text)
         
@@ -629,24 +864,28 @@ class NextleapScraper:
         """
         print(f"\nScraping: {url}")
         
-        soup = self.fetch_page(url)
-        if not soup:
+        tree = self.fetch_page(url)
+        if tree is None:
             return None
         
         # Extract JSON-LD structured data first
-        json_ld = self.extract_json_ld(soup)
+        json_ld = self.extract_json_ld(tree)
+        # One walk for the headings every section extractor looks through,
+        # and one for the page text the batch and payment extractors search
+        headings = self.find_headings(tree)
+        page_text = element_text(tree)
         
         # Extract all data (pass json_ld to methods that can use it)
         course_data = {
             "scraped_at": datetime.now().isoformat(),
             "source_url": url,
-            "cohort": self.extract_cohort_name(soup, url, json_ld),
-            "batch": self.extract_batch_info(soup, url, json_ld),
-            "payment_options": self.extract_payment_options(soup, url),
-            "curriculum": self.extract_curriculum(soup, url, json_ld),
-            "mentors_instructors": self.extract_mentors_instructors(soup, url, json_ld),
-            "placements": self.extract_placements(soup, url),
-            "reviews": self.extract_reviews(soup, url)
+            "cohort": self.extract_cohort_name(tree, url, json_ld),
+            "batch": self.extract_batch_info(tree, url, json_ld, page_text),
+            "payment_options": self.extract_payment_options(tree, url, page_text),
+            "curriculum": self.extract_curriculum(tree, url, json_ld, headings),
+            "mentors_instructors": self.extract_mentors_instructors(tree, url, json_ld, headings),
+            "placements": self.extract_placements(tree, url, headings),
+            "reviews": self.extract_reviews(tree, url, headings)
         }
         
         return course_data
@@ -655,7 +894,7 @@ class NextleapScraper:
         """
         Discover all course URLs from the website
         """
-        discovered_urls = []
+        discovered_urls = set()
         
         # Try to find course links from homepage or courses page
         possible_pages = [
@@ -665,32 +904,25 @@ class NextleapScraper:
         ]
         
         for page_url in possible_pages:
-            soup = self.fetch_page(page_url)
-            if soup:
-                # Find all links that might be course pages
-                links = soup.find_all('a', href=True)
-                for link in links:
-                    href = link.get('href', '')
-                    full_url = urljoin(self.base_url, href)
-                    
-                    # Check if it's a course URL
-                    if '/course/' in full_url and self.validate_url(full_url):
-                        if full_url not in discovered_urls:
-                            discovered_urls.append(full_url)
+            # Find all links that might be course pages
+            for href in self.fetch_links(page_url):
+                full_url = urljoin(self.base_url, href)
+                
+                # Check if it's a course URL (duplicates first: no request needed)
+                if '/course/' in full_url and full_url not in discovered_urls and self.validate_url(full_url):
+                    discovered_urls.add(full_url)
         
-        return discovered_urls
+        return sorted(discovered_urls)
     
-    def scrape_all_courses(self, course_urls: List[str]) -> List[Dict]:
+    def scrape_all_courses(self, course_urls: List[str], max_workers: int = 4) -> List[Dict]:
         """
         Scrape all provided course URLs
-        """
-        all_data = []
-        
-        for url in course_urls:
-            data = self.scrape_course_page(url)
-            if data:
-                all_data.append(data)
-            time.sleep(1)  # Be respectful with requests
         
-        return all_data
+        Pages are fetched concurrently (the work is network-bound) by a small
+        pool sharing this scraper's session; results keep the input order.
+        The shared request throttle, not per-worker sleeps, keeps the pool polite.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(self.scrape_course_page, course_urls)
+            return [data for data in results if data]
 
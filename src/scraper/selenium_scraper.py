@@ -2,10 +2,16 @@
 Selenium-based scraper for JavaScript-rendered content
 Falls back to requests-based scraper if Selenium is not available
 """
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Union
+from pathlib import Path
+import hashlib
+import os
 import re
+import threading
 import time
-from bs4 import BeautifulSoup
+import zlib
+import lxml.html
+from src.scraper.scraper import element_text
 
 try:
     from selenium import webdriver
@@ -20,14 +26,107 @@ except ImportError:
     SELENIUM_AVAILABLE = False
 
 
+# The patterns below are matched against lowercased page text (see
+# _lowercase), so they are written in lowercase and case-sensitive, which
+# is several times faster than re.IGNORECASE
+
+# Start dates in rendered page text, in one pass: a label before the date
+# ("Next batch starts on Jan 3, 2026") or after it ("January 3 batch").
+# Month names are matched by their first three letters, so both abbreviated
+# and full names are found
+_MONTH = r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*'
+_DATE_PATTERN = re.compile(
+    rf'(?:starts?|batch starts?|next batch|begins?|commences?|starting)\s+(?:on|from)?\s*'
+    rf'(?P<month>{_MONTH})\s+(?P<day>\d{{1,2}})(?:,\s+\d{{4}})?'
+    rf'|(?P<month_first>{_MONTH})\s+(?P<day_first>\d{{1,2}})(?:,\s+\d{{4}})?\s+(?:starts?|batch|starting)'
+)
+
+# Page-load polling: seconds between checks, and how long to wait for an
+# element that shows the course content has rendered
+POLL_INTERVAL = 0.1
+CONTENT_WAIT = 3
+CONTENT_SELECTOR = 'main, article, [class*="course"], [class*="batch"]'
+
+# Pages scrape_text_batch loads at once, each in its own tab
+TAB_BATCH = 4
+
+_INNER_TEXT_SCRIPT = "return document.body ? document.body.innerText : ''"
+# Markup of just the main content (scrape_page with content_only): far
+# smaller over the WebDriver protocol than the whole page's source
+_CONTENT_HTML_SCRIPT = (
+    "var root = document.querySelector('main, article, #content') || document.body;"
+    "return root ? root.outerHTML : '';"
+)
+
+# Seconds a rendered page stays in the on-disk cache (see SeleniumScraper)
+CACHE_TTL = 86400
+
+# Characters of page text searched before falling back to all of it
+PREFIX_CHARS = 20000
+_WHITESPACE_PATTERN = re.compile(r'\s')
+
+# Every date match contains a label word and every price match a fee
+# keyword; finding the first one is a cheap literal scan, and the heavier
+# patterns then start just before it (or are skipped if there is none)
+_DATE_ANCHOR_PATTERN = re.compile(r'start|batch|begin|commence')
+_PRICE_ANCHOR_PATTERN = re.compile(r'fee|cost|price|enrollment')
+# How far before its anchor word a match can begin ("September 30, 2026 batch")
+ANCHOR_LOOKBACK = 60
+
+# Prices next to a fee/cost/price keyword, before or after the amount
+_PRICE_CONTEXT_PATTERNS = [
+    re.compile(r'(?:course fee|cost|price|fee|enrollment)[:\s]*[₹rs\.\s]*(\d{1,3}(?:,\d{3})*)'),
+    re.compile(r'[₹rs\.\s]*(\d{1,3}(?:,\d{3})*)\s*(?:course fee|cost|price|fee|enrollment)'),
+]
+
+
+def _lowercase(text: str) -> str:
+    """Lowercased text with the same length, so match offsets index text too"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters (e.g. "İ") lowercase to two; leave those as they are
+    return ''.join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
 class SeleniumScraper:
-    """Selenium-based scraper for JavaScript-rendered content"""
+    """
+    Selenium-based scraper for JavaScript-rendered content
+    
+    One Chrome process serves every scrape_page call until close(); use it
+    as a context manager, or call start() and close() to keep it longer.
+    
+    With a cache_dir, rendered pages are also kept on disk for cache_ttl
+    seconds (one zlib-compressed file per URL and kind), so repeated runs
+    against the same URLs skip the browser entirely.
+    """
     
-    def __init__(self, headless: bool = True):
+    def __init__(self, headless: bool = True, cache_dir: Optional[str] = None, cache_ttl: float = CACHE_TTL):
+        """
+        Initialize Selenium scraper (Chrome starts on start() or __enter__)
+        
+        Args:
+            headless: Run Chrome without a window
+            cache_dir: Optional directory for an on-disk cache of rendered pages
+            cache_ttl: Seconds a cached page stays valid
+        """
         self.headless = headless
         self.driver = None
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.cache_ttl = cache_ttl
         
     def __enter__(self):
+        return self if self.start() else None
+    
+    def start(self) -> bool:
+        """
+        Start Chrome unless it is already running
+        
+        Returns:
+            Whether a browser is available
+        """
+        if self.driver:
+            return True
         if SELENIUM_AVAILABLE:
             try:
                 chrome_options = Options()
@@ -38,113 +137,331 @@ class SeleniumScraper:
                 chrome_options.add_argument('--disable-gpu')
                 chrome_options.add_argument('--window-size=1920,1080')
                 chrome_options.add_argument('user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+                # Only page text is read: return once the DOM is ready instead
+                # of after every subresource, and don't fetch images at all
+                chrome_options.page_load_strategy = 'eager'
+                chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+                chrome_options.add_experimental_option('prefs', {
+                    'profile.managed_default_content_settings.images': 2,
+                    'profile.default_content_setting_values.notifications': 2
+                })
+                for flag in ('--disable-extensions', '--disable-background-networking', '--disable-sync', '--disable-translate'):
+                    chrome_options.add_argument(flag)
                 
                 self.driver = webdriver.Chrome(options=chrome_options)
-                return self
+                return True
             except Exception as e:
                 print(f"Warning: Could not initialize Selenium: {e}")
                 print("Falling back to static HTML scraping")
-                return None
-        return None
+                return False
+        return False
     
     def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def close(self):
+        """Quit Chrome"""
         if self.driver:
             try:
                 self.driver.quit()
             except:
                 pass
+            self.driver = None
     
-    def scrape_page(self, url: str, wait_time: int = 5) -> Optional[BeautifulSoup]:
+    def scrape_page(self, url: str, wait_time: int = 5, content_only: bool = False) -> Optional[lxml.html.HtmlElement]:
         """
         Scrape a page with JavaScript rendering
         
         Args:
             url: URL to scrape
-            wait_time: Time to wait for page to load (seconds)
+            wait_time: Maximum time to wait for page to load (seconds)
+            content_only: Transfer only the main content element (main,
+                article or #content, else body) instead of the whole page
+                source, which also carries head, scripts and styles
             
         Returns:
-            BeautifulSoup object or None if failed
+            Root element of the rendered page (as NextleapScraper.fetch_page),
+            or the content element with content_only, or None if failed
         """
+        kind = 'content' if content_only else 'html'
+        page_source = self._cached(kind, url)
+        if page_source is not None:
+            return lxml.html.fromstring(page_source)
         if not self.driver:
             return None
             
         try:
-            self.driver.get(url)
-            # Wait for page to load
-            time.sleep(wait_time)
+            ready = self._load(url, wait_time)
+            # Get page source after JavaScript execution
+            page_source = self.driver.execute_script(_CONTENT_HTML_SCRIPT) if content_only else self.driver.page_source
+            # A page that timed out may be half-rendered; use it but don't cache it
+            if ready and page_source:
+                self._store(kind, url, page_source)
+            return lxml.html.fromstring(page_source)
             
-            # Try to wait for specific elements that indicate page is loaded
-            try:
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-            except TimeoutException:
-                pass
+        except Exception as e:
+            print(f"Error scraping {url} with Selenium: {e}")
+            return None
+    
+    def scrape_text(self, url: str, wait_time: int = 5) -> Optional[str]:
+        """
+        Rendered text of a page, read in the browser
+        
+        Cheaper than scrape_page when only text is needed: one script call
+        returns document.body.innerText, with no page source transfer or
+        HTML parse.
+        
+        Args:
+            url: URL to scrape
+            wait_time: Maximum time to wait for page to load (seconds)
             
-            # Get page source after JavaScript execution
-            page_source = self.driver.page_source
-            return BeautifulSoup(page_source, 'lxml')
+        Returns:
+            Page text or None if failed
+        """
+        page_text = self._cached('text', url)
+        if page_text is not None:
+            return page_text
+        if not self.driver:
+            return None
+            
+        try:
+            ready = self._load(url, wait_time)
+            page_text = self.driver.execute_script(_INNER_TEXT_SCRIPT)
+            if ready and page_text:
+                self._store('text', url, page_text)
+            return page_text
             
         except Exception as e:
             print(f"Error scraping {url} with Selenium: {e}")
             return None
     
-    def extract_dynamic_content(self, soup: BeautifulSoup) -> Dict:
+    def scrape_text_batch(self, urls: List[str], wait_time: int = 5,
+                          throttle: Optional[Callable[[], None]] = None) -> Dict[str, Optional[str]]:
+        """
+        Rendered text of several pages (as scrape_text), loaded side by side in tabs
+        
+        Up to TAB_BATCH pages load at once in one browser: each gets a new
+        tab whose navigation is started without waiting for it, and the
+        tabs are then read and closed in turn. Opening a tab is far cheaper
+        than starting another browser.
+        
+        Args:
+            urls: URLs to scrape
+            wait_time: Maximum time to wait for each page to load (seconds)
+            throttle: Optional callable run before each navigation (e.g. a rate limit)
+            
+        Returns:
+            Page text per URL (None for pages that failed)
+        """
+        texts = {}
+        pending = []
+        for url in urls:
+            page_text = self._cached('text', url)
+            if page_text is None:
+                pending.append(url)
+            else:
+                texts[url] = page_text
+        
+        for start in range(0, len(pending), TAB_BATCH):
+            batch = pending[start:start + TAB_BATCH]
+            if self.driver:
+                texts.update(self._scrape_tabs(batch, wait_time, throttle))
+            else:
+                texts.update((url, None) for url in batch)
+        return texts
+    
+    def _scrape_tabs(self, urls: List[str], wait_time: int,
+                     throttle: Optional[Callable[[], None]]) -> Dict[str, Optional[str]]:
+        """Load urls in new tabs at once, then read each page's text and close its tab"""
+        texts = {url: None for url in urls}
+        main_window = self.driver.current_window_handle
+        tabs = []
+        try:
+            for url in urls:
+                if throttle:
+                    throttle()
+                self.driver.switch_to.new_window('tab')
+                tabs.append((url, self.driver.current_window_handle))
+                # Unlike get(), assigning the location returns immediately,
+                # so the pages load concurrently
+                self.driver.execute_script("window.location.href = arguments[0]", url)
+            
+            for url, handle in tabs:
+                try:
+                    self.driver.switch_to.window(handle)
+                    ready = self._wait_for_content(wait_time)
+                    page_text = self.driver.execute_script(_INNER_TEXT_SCRIPT)
+                    if ready and page_text:
+                        self._store('text', url, page_text)
+                    texts[url] = page_text
+                except Exception as e:
+                    print(f"Error scraping {url} with Selenium: {e}")
+        except Exception as e:
+            print(f"Error opening tabs in Selenium: {e}")
+        finally:
+            for _, handle in tabs:
+                try:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+                except Exception:
+                    pass
+            try:
+                self.driver.switch_to.window(main_window)
+            except Exception:
+                pass
+        return texts
+    
+    def _cache_file(self, kind: str, url: str) -> Path:
+        """Cache file for one kind ('html', 'content' or 'text') of a URL's rendered page"""
+        key = hashlib.blake2b(url.encode('utf-8'), digest_size=16).hexdigest()
+        return self.cache_dir / f"{key}.{kind}.z"
+    
+    def _cached(self, kind: str, url: str) -> Optional[str]:
+        """Cached rendered page, or None if there is no cache or no fresh entry"""
+        if not self.cache_dir:
+            return None
+        cache_file = self._cache_file(kind, url)
+        try:
+            if cache_file.stat().st_mtime + self.cache_ttl < time.time():
+                return None
+            return zlib.decompress(cache_file.read_bytes()).decode('utf-8')
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Warning: Could not read cached page for {url}: {e}")
+            return None
+    
+    def _store(self, kind: str, url: str, content: str):
+        """Write a rendered page to the cache atomically (no-op without a cache)"""
+        if not self.cache_dir:
+            return
+        cache_file = self._cache_file(kind, url)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_file.write_bytes(zlib.compress(content.encode('utf-8'), 3))
+            os.replace(tmp_file, cache_file)
+        except Exception as e:
+            print(f"Warning: Could not cache page for {url}: {e}")
+    
+    def _load(self, url: str, wait_time: int) -> bool:
+        """Navigate to url and wait until its content has rendered (see _wait_for_content)"""
+        self.driver.get(url)
+        return self._wait_for_content(wait_time)
+    
+    def _wait_for_content(self, wait_time: int) -> bool:
+        """
+        Wait until the current tab's page has rendered (or the waits time out)
+        
+        Returns:
+            True if the page rendered, False if either wait timed out (the
+            page may still be blank or half-rendered, so it isn't cached)
+        """
+        # Wait for the DOM to be ready (the eager load strategy usually
+        # returns at that point already), polling so fast pages return
+        # quickly while slow ones still get the full wait_time. A tab from
+        # scrape_text_batch may still show its blank start page
+        try:
+            WebDriverWait(self.driver, wait_time, poll_frequency=POLL_INTERVAL).until(
+                lambda driver: driver.execute_script(
+                    "return document.URL !== 'about:blank' && document.readyState !== 'loading'"
+                )
+            )
+        except TimeoutException:
+            return False
+        
+        # Then briefly for an element that indicates the content has rendered
+        try:
+            WebDriverWait(self.driver, CONTENT_WAIT, poll_frequency=POLL_INTERVAL).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, CONTENT_SELECTOR))
+            )
+        except TimeoutException:
+            return False
+        return True
+    
+    def extract_dynamic_content(self, page: Union[lxml.html.HtmlElement, str, None]) -> Dict:
         """
         Extract content that's typically loaded via JavaScript
         
+        Args:
+            page: Rendered page from scrape_page, or its text (scrape_text)
+        
         Returns:
             Dictionary with extracted dynamic content
         """
-        if not soup:
+        if page is None:
             return {}
+        return self.extract_dynamic_content_from_text(page if isinstance(page, str) else element_text(page))
+    
+    @staticmethod
+    def extract_dynamic_content_from_text(page_text: str) -> Dict:
+        """
+        Extract the start date and cost from rendered page text (scrape_text)
         
+        Needs no browser, so it also works on the text of static HTML
+        (EnhancedScraper tries that before rendering a page).
+        
+        Returns:
+            Dictionary with extracted dynamic content
+        """
         data = {}
-        page_text = soup.get_text()
-        
-        # Extract dates - more comprehensive patterns
-        date_patterns = [
-            r'(?:starts?|batch starts?|next batch|begins?|commences?|starting)\s+(?:on|from)?\s*(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2}(?:,\s+\d{4})?',
-            r'(?:starts?|batch starts?|next batch|begins?|commences?|starting)\s+(?:on|from)?\s*(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2}(?:,\s+\d{4})?',
-            r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2}(?:,\s+\d{4})?(?:\s+(?:starts?|batch|starting))',
-            r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2}(?:,\s+\d{4})?(?:\s+(?:starts?|batch|starting))',
-        ]
-        
-        for pattern in date_patterns:
-            matches = re.finditer(pattern, page_text, re.IGNORECASE)
-            for match in matches:
-                date_str = match.group(0)
-                # Clean up the date string
-                date_str = re.sub(r'(?:starts?|batch starts?|next batch|begins?|commences?|from|on|starting)\s*', '', date_str, flags=re.I)
-                date_str = date_str.strip()
-                # Extract just the date part (e.g., "Jan 3")
-                date_match = re.search(r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2}', date_str, re.I)
-                if date_match:
-                    data['batch_start_date'] = date_match.group(0)
-                    break
-            if data.get('batch_start_date'):
-                break
+        page_lower = _lowercase(page_text)
         
-        # Extract prices from visible text (more accurate than JSON-LD)
-        price_context_patterns = [
-            r'(?:course fee|cost|price|fee|enrollment)[:\s]*[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)',
-            r'[₹Rs\.\s]*(\d{1,3}(?:,\d{3})*)\s*(?:course fee|cost|price|fee|enrollment)',
-        ]
+        # field -> (finder, position to search from)
+        searches = {}
+        for field, finder, anchor_pattern in (('batch_start_date', SeleniumScraper._find_start_date, _DATE_ANCHOR_PATTERN),
+                                              ('cost', SeleniumScraper._find_cost, _PRICE_ANCHOR_PATTERN)):
+            anchor = anchor_pattern.search(page_lower)
+            if anchor:
+                searches[field] = (finder, max(0, anchor.start() - ANCHOR_LOOKBACK))
         
-        for pattern in price_context_patterns:
-            matches = re.finditer(pattern, page_text, re.IGNORECASE)
-            for match in matches:
-                price_str = match.group(1).replace(',', '')
-                try:
-                    price = float(price_str)
-                    if 20000 <= price <= 60000:  # Reasonable range
-                        data['cost'] = f"{int(price):,}"
-                        break
-                except ValueError:
-                    continue
-            if data.get('cost'):
+        # Dates and prices are almost always near the top of the page: search
+        # a prefix first (ending at whitespace so no date or amount is cut in
+        # half), and the whole text only for what the prefix didn't have
+        prefix_end = _WHITESPACE_PATTERN.search(page_text, PREFIX_CHARS)
+        ends = (prefix_end.start(), len(page_text)) if prefix_end else (len(page_text),)
+        for endpos in ends:
+            for field, (finder, pos) in list(searches.items()):
+                value = finder(page_text, page_lower, pos, endpos)
+                if value:
+                    data[field] = value
+                    del searches[field]
+            if not searches:
                 break
         
         return data
-
-
+    
+    @staticmethod
+    def _find_start_date(page_text: str, page_lower: str, pos: int, endpos: int) -> Optional[str]:
+        """Batch start date (e.g. "Jan 3") in page_text[pos:endpos], or None (page_lower is _lowercase(page_text))"""
+        # A date after its label ("starts on Jan 3") wins; otherwise the
+        # first date followed by one ("Jan 3 batch")
+        # (search from the end of each match rather than finditer: the
+        # first match usually decides, and search skips building an iterator)
+        date_match = match = _DATE_PATTERN.search(page_lower, pos, endpos)
+        while match and not match.group('month'):
+            match = _DATE_PATTERN.search(page_lower, match.end(), endpos)
+        if match:
+            date_match = match
+        if not date_match:
+            return None
+        # Just the date part (e.g., "Jan 3"), cased as on the page
+        month = 'month' if date_match.group('month') else 'month_first'
+        day = 'day' if date_match.group('day') else 'day_first'
+        return f"{page_text[date_match.start(month):date_match.end(month)]} {date_match.group(day)}"
+    
+    @staticmethod
+    def _find_cost(page_text: str, page_lower: str, pos: int, endpos: int) -> Optional[str]:
+        """Course fee from visible text (more accurate than JSON-LD) in page_text[pos:endpos], or None"""
+        for pattern in _PRICE_CONTEXT_PATTERNS:
+            match = pattern.search(page_lower, pos, endpos)
+            while match:
+                # All digits, so a length check rules out most amounts
+                # before any conversion (the reasonable range is 5 digits)
+                price_str = match.group(1).replace(',', '')
+                if len(price_str) == 5:
+                    price = int(price_str)
+                    if 20000 <= price <= 60000:  # Reasonable range
+                        return f"{price:,}"
+                match = pattern.search(page_lower, match.end(), endpos)
+        return None